@@ -1,27 +1,80 @@
-from .file_link import FileLink
-from .toggleable_file_link import ToggleableFileLink
-from .models import (
-    Attachment,
-    command_status,
-    CommandAttachment,
-    CommandStatus,
-    FileAttachment,
-)
-
-from .config import (
-    __version__,
-    check_namespace_value,
-    get_bundled_config,
-    init_config,
-    is_resource,
-    load_config,
-)
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from textual_filelink import FileLink
+    from .models import (
+        Attachment,
+        command_status,
+        CommandAttachment,
+        CommandConfig,
+        CommandStatus,
+        FileAttachment,
+        VibedirSettings,
+    )
+
+    from .command_runner import CommandScheduler
+    from .config_watcher import ConfigChange, ConfigWatcher
+    from .config import (
+        __version__,
+        check_namespace_value,
+        clear_config_cache,
+        get_bundled_config,
+        init_config,
+        is_resource,
+        load_config,
+        load_settings,
+    )
+
+# Public names are imported on first access so that `import vibedir` stays cheap
+# (Dynaconf, tomlkit, pydantic and Textual are only loaded when actually used).
+_LAZY_ATTRIBUTES = {
+    "__version__": ".config",
+    "Attachment": ".models",
+    "check_namespace_value": ".config",
+    "clear_config_cache": ".config",
+    "ConfigChange": ".config_watcher",
+    "ConfigWatcher": ".config_watcher",
+    "command_status": ".models",
+    "CommandAttachment": ".models",
+    "CommandConfig": ".models",
+    "CommandScheduler": ".command_runner",
+    "CommandStatus": ".models",
+    "FileAttachment": ".models",
+    "FileLink": "textual_filelink",
+    "get_bundled_config": ".config",
+    "init_config": ".config",
+    "is_resource": ".config",
+    "load_config": ".config",
+    "load_settings": ".config",
+    "VibedirSettings": ".models",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value  # Cache so later lookups are plain attribute access
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
 __all__ = [
-    "__version__", 
+    "__version__",
     "Attachment",
     "check_namespace_value",
+    "clear_config_cache",
     "command_status",
+    "ConfigChange",
+    "ConfigWatcher",
     "CommandAttachment",
+    "CommandConfig",
+    "CommandScheduler",
     "CommandStatus",
     "FileAttachment",
     "FileLink",
@@ -29,5 +82,6 @@ __all__ = [
     "init_config",
     "is_resource",
     "load_config",
-    "ToggleableFileLink",
+    "load_settings",
+    "VibedirSettings",
     ]
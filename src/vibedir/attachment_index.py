@@ -0,0 +1,247 @@
+# vibedir/attachment_index.py
+import logging
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from .models.attachment import Attachment, FileAttachment
+from .models.command_attachment import CommandAttachment
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_HASH_SIZE = 32  # SHA256 digest bytes
+_NONE = 0xFFFFFFFF  # Missing string id
+
+FILE, COMMAND = 0, 1
+_TYPES = {"file": FILE, "command": COMMAND}
+
+# Flag bits
+_HAS_HASH = 1
+_AWARE = 2  # Timestamp was timezone-aware (stored as UTC)
+_SUCCESS_SET = 4
+_SUCCESS_TRUE = 8
+
+
+def _micros(timestamp: datetime) -> int:
+    """Microseconds since the epoch; aware timestamps are converted to UTC, naive ones kept as they are."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+class AttachmentIndex:
+    """
+    Compact columnar store of history attachments.
+
+    Each attachment is a row across typed arrays: type (uint8), path and other strings as
+    interned ids (uint32), timestamp as int64 microseconds since the epoch and the SHA256 as 32
+    raw bytes, instead of a pydantic model with its own datetime, Path and string objects. A
+    postings list per path (as path or original_path) answers "all attachments for file X"
+    without a scan. Models are only built, without re-validation, when a row is requested.
+    """
+
+    def __init__(self, attachments: Iterable[Attachment] = ()):
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._types = array("B")
+        self._flags = array("B")
+        self._timestamps = array("q")
+        self._paths = array("I")
+        self._original_paths = array("I")  # FileAttachment.original_path
+        self._names = array("I")  # CommandAttachment.name
+        self._statuses = array("I")
+        self._output_paths = array("I")
+        self._output_formats = array("I")
+        self._hashes = bytearray()
+        self._extra: Dict[int, dict] = {}  # Rare values that do not fit the columns (inline output, odd hashes)
+        self._postings: Dict[int, array] = {}
+        self.extend(attachments)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def _intern(self, value: Optional[object]) -> int:
+        if value is None:
+            return _NONE
+        text = str(value)
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self._strings)
+            self._strings.append(text)
+        return string_id
+
+    def _string(self, string_id: int) -> Optional[str]:
+        return None if string_id == _NONE else self._strings[string_id]
+
+    def _post(self, string_id: int, row: int) -> None:
+        if string_id == _NONE:
+            return
+        rows = self._postings.get(string_id)
+        if rows is None:
+            rows = self._postings[string_id] = array("I")
+        if not rows or rows[-1] != row:
+            rows.append(row)
+
+    def append(self, attachment: Attachment) -> int:
+        """Add an attachment; returns its row number."""
+        row = len(self)
+        flags = 0
+        extra = {}
+
+        if attachment.timestamp.tzinfo is not None:
+            flags |= _AWARE
+        self._timestamps.append(_micros(attachment.timestamp))
+
+        path_id = self._intern(attachment.path)
+        original_id = self._intern(getattr(attachment, "original_path", None))
+        self._types.append(_TYPES[attachment.type])
+        self._paths.append(path_id)
+        self._original_paths.append(original_id)
+
+        digest = getattr(attachment, "hash", None)
+        raw = None
+        if digest:
+            try:
+                raw = bytes.fromhex(digest)
+            except ValueError:
+                pass
+            if raw is None or len(raw) != _HASH_SIZE:
+                raw = None
+                extra["hash"] = digest
+        if raw is not None:
+            flags |= _HAS_HASH
+        self._hashes += raw or bytes(_HASH_SIZE)
+
+        if attachment.type == "command":
+            self._names.append(self._intern(attachment.name))
+            self._statuses.append(self._intern(attachment.status))
+            self._output_paths.append(self._intern(attachment.output_path))
+            self._output_formats.append(self._intern(attachment.output_format))
+            if attachment.success_value is not None:
+                flags |= _SUCCESS_SET | (_SUCCESS_TRUE if attachment.success_value else 0)
+            if attachment.output is not None:
+                extra["output"] = attachment.output
+        else:
+            for column in (self._names, self._statuses, self._output_paths, self._output_formats):
+                column.append(_NONE)
+
+        self._flags.append(flags)
+        if extra:
+            self._extra[row] = extra
+        self._post(path_id, row)
+        self._post(original_id, row)
+        return row
+
+    def extend(self, attachments: Iterable[Attachment]) -> None:
+        for attachment in attachments:
+            self.append(attachment)
+
+    def timestamp(self, row: int) -> datetime:
+        timestamp = _EPOCH + timedelta(microseconds=self._timestamps[row])
+        if self._flags[row] & _AWARE:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp
+
+    def hash(self, row: int) -> Optional[str]:
+        if self._flags[row] & _HAS_HASH:
+            return self._hashes[row * _HASH_SIZE : (row + 1) * _HASH_SIZE].hex()
+        return self._extra.get(row, {}).get("hash")
+
+    def path(self, row: int) -> Path:
+        return Path(self._strings[self._paths[row]])
+
+    def __getitem__(self, row: int) -> Attachment:
+        """Materialise one row as its pydantic model (without re-running path validation)."""
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"Attachment row {row} out of range")
+        common = {"path": self.path(row), "timestamp": self.timestamp(row)}
+        if self._types[row] == FILE:
+            original = self._string(self._original_paths[row])
+            return FileAttachment.model_construct(
+                **common, original_path=Path(original) if original else None, hash=self.hash(row)
+            )
+        flags = self._flags[row]
+        output_path = self._string(self._output_paths[row])
+        return CommandAttachment.model_construct(
+            **common,
+            name=self._string(self._names[row]),
+            status=self._string(self._statuses[row]),
+            output=self._extra.get(row, {}).get("output"),
+            success_value=bool(flags & _SUCCESS_TRUE) if flags & _SUCCESS_SET else None,
+            output_path=Path(output_path) if output_path else None,
+            output_format=self._string(self._output_formats[row]),
+        )
+
+    def rows_for_path(self, path: Union[str, Path]) -> array:
+        """Rows whose path or original_path is path (in insertion order)."""
+        string_id = self._string_ids.get(str(path))
+        if string_id is None:
+            return array("I")
+        return array("I", self._postings.get(string_id, ()))
+
+    def select(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        hash: Optional[str] = None,
+    ) -> array:
+        """
+        Rows matching all given filters, evaluated on the columns without building models.
+
+        Args:
+            path: Attachments of this file (as path or original_path)
+            type: "file" or "command"
+            since: Timestamp >= since (naive timestamps compare as stored)
+            until: Timestamp < until
+            hash: SHA256 hex digest
+        """
+        rows: Iterable[int] = self.rows_for_path(path) if path is not None else range(len(self))
+        if type is not None:
+            code = _TYPES[type]
+            types = self._types
+            rows = [row for row in rows if types[row] == code]
+        if since is not None or until is not None:
+            low = _micros(since) if since else None
+            high = _micros(until) if until else None
+            stamps = self._timestamps
+            rows = [
+                row for row in rows if (low is None or stamps[row] >= low) and (high is None or stamps[row] < high)
+            ]
+        if hash is not None:
+            try:
+                raw = bytes.fromhex(hash)
+            except ValueError:
+                raw = b""
+            if len(raw) == _HASH_SIZE:
+                rows = self._rows_with_hash(raw, rows)
+            else:
+                rows = [row for row in rows if self._extra.get(row, {}).get("hash") == hash]
+        return array("I", rows)
+
+    def _rows_with_hash(self, raw: bytes, rows: Iterable[int]) -> List[int]:
+        # bytearray.find scans the whole column in C; then keep aligned matches among rows
+        matches = set()
+        start = self._hashes.find(raw)
+        while start != -1:
+            if start % _HASH_SIZE == 0 and self._flags[start // _HASH_SIZE] & _HAS_HASH:
+                matches.add(start // _HASH_SIZE)
+            start = self._hashes.find(raw, start + 1)
+        return [row for row in rows if row in matches]
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the columns and interned strings."""
+        columns = (
+            self._types, self._flags, self._timestamps, self._paths, self._original_paths,
+            self._names, self._statuses, self._output_paths, self._output_formats,
+        )
+        total = sum(column.itemsize * len(column) for column in columns) + len(self._hashes)
+        total += sum(len(text) for text in self._strings)
+        total += sum(rows.itemsize * len(rows) for rows in self._postings.values())
+        return total
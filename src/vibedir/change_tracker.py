@@ -0,0 +1,328 @@
+# vibedir/change_tracker.py
+import hashlib
+import json
+import logging
+import os
+import stat
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from .gitignore import IgnoreRules
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "file_index.json"
+DEFAULT_EXCLUDE = ("__pycache__", "node_modules")
+
+# (mtime_ns, size, inode, sha256 or None if unreadable)
+_Entry = Tuple[int, int, int, Optional[str]]
+
+
+def _hash(path: str) -> Optional[str]:
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class ChangeTracker:
+    """
+    Find the files changed in the working tree since the last prompt send, in process.
+
+    The index holds (mtime, size, inode, SHA256) per file as of the last send (the baseline) and is
+    kept in .vibedir/file_index.json. On start() a stat sweep over the tree (directories scanned
+    in parallel threads) compares every file with it; only files whose stat signature moved are
+    hashed, and a file whose content hash is unchanged (a touch, a checkout of the same content)
+    does not count as changed. After that, filesystem events mark paths dirty and each query
+    re-checks only those, so changed_files() stays cheap however big the tree is.
+
+    Without an index, the first sweep hashes every file once to create the baseline. Hidden
+    directories (.git, .vibedir, .venv, ...) and the directory names in exclude are skipped, and
+    in a git work tree so is everything git ignores (.gitignore files, .git/info/exclude and
+    core.excludesFile, as git applies them, matched in process by vibedir.gitignore): build output,
+    virtualenvs and coverage reports are not user changes. Untracked files git does not ignore do
+    count as changes. The rules are read during the sweep, and again (with a new sweep) when a
+    .gitignore file changes.
+    """
+
+    def __init__(
+        self,
+        base_directory: Path,
+        index_path: Optional[Path] = None,
+        exclude: Iterable[str] = DEFAULT_EXCLUDE,
+        workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            base_directory: Root of the working tree
+            index_path: Where the index is kept (default <base_directory>/.vibedir/file_index.json)
+            exclude: Directory names to skip (besides hidden directories)
+            workers: Threads for the startup sweep (default: min(32, CPUs + 4))
+        """
+        self.base_directory = Path(base_directory).resolve()
+        self.index_path = Path(index_path) if index_path else self.base_directory / ".vibedir" / INDEX_NAME
+        self.exclude = frozenset(exclude)
+        self.workers = workers
+        self._baseline: Dict[str, _Entry] = {}
+        self._changed: Dict[str, Optional[_Entry]] = {}  # Differs from the baseline; None = deleted
+        self._dirty: Set[str] = set()
+        self._dirty_dirs: Set[str] = set()  # Directories created, moved or deleted
+        self._lock = threading.RLock()
+        self._observer: Optional[Observer] = None
+        self._swept = False
+        self._ignore: Optional[IgnoreRules] = None  # Git's ignore rules (None outside a git work tree)
+        self._has_index = self._load_index()
+
+    def _load_index(self) -> bool:
+        if not self.index_path.is_file():
+            return False
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            self._baseline = {path: tuple(entry) for path, entry in data["files"].items()}
+            return True
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning(f"Ignoring unreadable file index {self.index_path}: {exc}")
+            self._baseline = {}
+            return False
+
+    def save(self) -> None:
+        """Write the baseline to the index file."""
+        with self._lock:
+            text = json.dumps({"version": 1, "files": self._baseline}, separators=(",", ":"))
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(f"{self.index_path.name}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def _is_ignored(self, rel: str, directory: bool = False) -> bool:
+        return self._ignore is not None and self._ignore.ignored(rel, directory)
+
+    def _relative(self, path: str, directory: bool = False) -> Optional[str]:
+        """Index key of an absolute path, or None if it is outside the tree or skipped."""
+        rel = os.path.relpath(os.fsdecode(path), self.base_directory)
+        if rel == "." or rel.startswith(".." + os.sep) or rel == "..":
+            return None
+        parts = rel.split(os.sep)
+        if any(part.startswith(".") or part in self.exclude for part in (parts if directory else parts[:-1])):
+            return None
+        return "/".join(parts)
+
+    def _scan_directory(
+        self, directory: str, prefix: str
+    ) -> Tuple[List[Tuple[str, Tuple[int, int, int]]], List[Tuple[str, str]]]:
+        """Files (index key, stat signature) and subdirectories (path, key prefix) of one directory."""
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as exc:
+            logger.debug(f"Cannot scan {directory}: {exc}")
+            return files, subdirs
+        if self._ignore is not None and any(entry.name == ".gitignore" for entry in entries):
+            self._ignore.load_directory(prefix.rstrip("/"))  # Before anything in this directory is checked
+        for entry in entries:
+            rel = f"{prefix}{entry.name}"
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if (
+                        not entry.name.startswith(".")
+                        and entry.name not in self.exclude
+                        and not self._is_ignored(rel, True)
+                    ):
+                        subdirs.append((entry.path, f"{rel}/"))
+                elif entry.is_file(follow_symlinks=False) and not self._is_ignored(rel):
+                    st = entry.stat(follow_symlinks=False)
+                    files.append((rel, (st.st_mtime_ns, st.st_size, st.st_ino)))
+            except OSError:
+                pass
+        return files, subdirs
+
+    def _walk(self, rel_root: str, executor: ThreadPoolExecutor) -> Dict[str, Tuple[int, int, int]]:
+        """Stat signatures of all files under rel_root ("" for the whole tree), scanning directories in parallel."""
+        found: Dict[str, Tuple[int, int, int]] = {}
+        prefix = f"{rel_root}/" if rel_root else ""
+        pending = {executor.submit(self._scan_directory, str(self.base_directory / rel_root), prefix)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                found.update(files)
+                pending |= {executor.submit(self._scan_directory, *subdir) for subdir in subdirs}
+        return found
+
+    def sweep(self) -> None:
+        """Compare the whole tree with the baseline (run by start(); the first sweep also seeds a new index)."""
+        self._ignore = IgnoreRules.find(self.base_directory)
+        if self._ignore is None:
+            logger.debug(f"{self.base_directory} is not in a git work tree; ignore rules are not applied")
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vibedir-sweep") as executor:
+            found = self._walk("", executor)
+            if not self._has_index:
+                # No earlier send to compare with: the tree as it is now is the baseline (hashed once)
+                items = list(found.items())
+                hashes = list(executor.map(lambda item: _hash(str(self.base_directory / item[0])), items))
+                with self._lock:
+                    self._baseline = {rel: (*signature, digest) for (rel, signature), digest in zip(items, hashes)}
+                    self._has_index = True
+            with self._lock:
+                # Ignored paths in an older index (e.g. from before a .gitignore entry) are not deletions
+                gone = [rel for rel in self._baseline.keys() - found.keys() if not self._is_ignored(rel)]
+                self._changed = dict.fromkeys(gone)
+                moved = [(rel, signature) for rel, signature in found.items() if self._moved(rel, signature)]
+            hashes = list(executor.map(lambda item: _hash(str(self.base_directory / item[0])), moved))
+            with self._lock:
+                for (rel, signature), digest in zip(moved, hashes):
+                    self._record(rel, signature, digest)
+        self._swept = True
+        self.save()
+        logger.info(f"Swept {len(found)} files under {self.base_directory}: {len(self._changed)} changed")
+
+    def _moved(self, rel: str, signature: Tuple[int, int, int]) -> bool:
+        base = self._baseline.get(rel)
+        return base is None or tuple(base[:3]) != signature
+
+    def _record(self, rel: str, signature: Tuple[int, int, int], digest: Optional[str]) -> None:
+        base = self._baseline.get(rel)
+        if base is not None and digest is not None and base[3] == digest:
+            self._baseline[rel] = (*signature, digest)  # Same content: remember the new signature
+            self._changed.pop(rel, None)
+        else:
+            self._changed[rel] = (*signature, digest)
+
+    def _check(self, rel: str) -> Tuple[str, Optional[Tuple[int, int, int]], Optional[str], bool]:
+        """
+        Stat one path, and hash it if its signature moved (called without the lock held).
+
+        Returns:
+            (rel, stat signature or None if it is not a file, content hash, whether it was hashed)
+        """
+        path = self.base_directory / rel
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return rel, None, None, False
+        if not stat.S_ISREG(st.st_mode):
+            return rel, None, None, False
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        current = self._changed.get(rel)
+        if not self._moved(rel, signature) or (current is not None and tuple(current[:3]) == signature):
+            return rel, signature, None, False  # Unchanged, or already hashed at this signature
+        return rel, signature, _hash(str(path)), True
+
+    def _apply(self, rel: str, signature: Optional[Tuple[int, int, int]], digest: Optional[str], hashed: bool) -> None:
+        """Re-check one path against the baseline from the result of _check (lock held)."""
+        if signature is None:
+            if rel in self._baseline:
+                self._changed[rel] = None
+            else:
+                self._changed.pop(rel, None)
+        elif not self._moved(rel, signature):
+            self._changed.pop(rel, None)
+        elif hashed:
+            self._record(rel, signature, digest)
+        else:
+            current = self._changed.get(rel)
+            if current is None or tuple(current[:3]) != signature:
+                self._dirty.add(rel)  # The baseline moved while the path was checked; check it on the next query
+
+    def notify(self, path: str, directory: bool = False) -> None:
+        """Mark an absolute path as possibly changed (directory: it was created, moved or deleted)."""
+        rel = self._relative(path, directory)
+        if rel is not None:
+            with self._lock:
+                (self._dirty_dirs if directory else self._dirty).add(rel)
+
+    def _process_dirty(self) -> None:
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            dirty_dirs, self._dirty_dirs = self._dirty_dirs, set()
+        if any(rel == ".gitignore" or rel.endswith("/.gitignore") for rel in dirty):
+            # Ignore rules changed: paths anywhere below may have become ignored or visible
+            self.sweep()
+            return
+        if self._ignore is not None:
+            dirty |= self._ignore.refresh_tracked()  # Ignored files added to or removed from the index
+        if not dirty and not dirty_dirs:
+            return
+        paths = set(dirty)
+        for rel in dirty_dirs:
+            if self._is_ignored(rel, True):
+                continue
+            # Files known under the directory (gone if it was removed or moved away) and any now there
+            prefix = f"{rel}/"
+            with self._lock:
+                paths.update(p for p in (*self._baseline, *self._changed) if p.startswith(prefix))
+            if (self.base_directory / rel).is_dir():
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    paths.update(self._walk(rel, executor))
+        checks = [self._check(rel) for rel in paths if not self._is_ignored(rel)]
+        with self._lock:
+            for check in checks:
+                self._apply(*check)
+
+    def changed_files(self) -> List[Path]:
+        """Paths (relative to base_directory) added, modified or deleted since the last send, sorted."""
+        if not self._swept:
+            self.sweep()
+        self._process_dirty()
+        with self._lock:
+            return [Path(rel) for rel in sorted(self._changed)]
+
+    def has_changes(self) -> bool:
+        """Whether any file changed since the last send (checked in process, without running changes_exist_command)."""
+        return bool(self.changed_files())
+
+    def mark_sent(self) -> None:
+        """Make the current tree the baseline (call after a prompt is sent) and save the index."""
+        self._process_dirty()
+        with self._lock:
+            for rel, entry in self._changed.items():
+                if entry is None:
+                    self._baseline.pop(rel, None)
+                else:
+                    self._baseline[rel] = entry
+            self._changed.clear()
+        self.save()
+
+    def start(self) -> None:
+        """Keep the index current from filesystem events, then sweep the tree."""
+        if self._observer is not None:
+            return
+        # Watch first: edits made while the sweep runs are queued as dirty paths and checked on the next query
+        observer = Observer()
+        observer.schedule(_TreeEventHandler(self), str(self.base_directory), recursive=True)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        self.sweep()
+
+    def stop(self) -> None:
+        """Stop watching and save the index."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        self.save()
+
+
+class _TreeEventHandler(FileSystemEventHandler):
+    def __init__(self, tracker: ChangeTracker):
+        self.tracker = tracker
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        if event.is_directory and event.event_type == "modified":
+            return  # Only says an entry inside changed; that entry has its own event
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.tracker.notify(path, event.is_directory)
@@ -0,0 +1,300 @@
+# vibedir/codebase_snapshot.py
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = "codebase_cache.json"
+_IOV_MAX = 1024  # Buffers per writev call (POSIX minimum for IOV_MAX)
+
+
+def _prepdir_header(processor) -> str:
+    """
+    The header prepdir writes above a single-part listing, from the processor's public settings.
+
+    prepdir only builds it privately; test_codebase_snapshot checks this copy against its output.
+    """
+    from prepdir import __version__ as prepdir_version
+
+    timestamp = datetime.now().isoformat()
+    header = f"File listing generated {timestamp} by prepdir version {prepdir_version} (pip install prepdir)\n"
+    header += f"Base directory is '{processor.directory}'\n"
+    placeholders = "unique placeholders (e.g., PREPDIR_UUID_PLACEHOLDER_n)"
+    if processor.scrub_hyphenated_uuids:
+        replacement = placeholders if processor.use_unique_placeholders else f"'{processor.replacement_uuid}'"
+        header += f"Note: Valid (hyphenated) UUIDs in file contents will be scrubbed and replaced with {replacement}.\n"
+    if processor.scrub_hyphenless_uuids:
+        hyphenless = processor.replacement_uuid.replace("-", "")
+        replacement = placeholders if processor.use_unique_placeholders else f"'{hyphenless}'"
+        header += f"Note: Valid hyphen-less UUIDs in file contents will be scrubbed and replaced with {replacement}.\n"
+    return header
+
+
+@dataclass
+class _FileState:
+    signature: Tuple[int, int, int]  # (mtime_ns, size, inode)
+    key: str  # Section cache key: SHA256 of relative path + content
+    excluded: bool = False  # A prepdir output file
+
+
+@dataclass
+class CodebaseSnapshot:
+    """The [CODEBASE] text of one build: prepdir's header and one section per file, kept as separate buffers."""
+
+    header: bytes
+    sections: List[bytes]
+    rendered: int = 0  # Sections rendered by prepdir in this build
+    reused: int = 0  # Sections taken from the cache
+    paths: List[str] = field(default_factory=list)  # Relative path of each section
+
+    def chunks(self) -> Iterator[bytes]:
+        """The snapshot as a sequence of buffers (header, then sections separated by newlines), without joining."""
+        yield self.header
+        for i, section in enumerate(self.sections):
+            if i:
+                yield b"\n"
+            yield section
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.header) + sum(len(s) for s in self.sections) + max(len(self.sections) - 1, 0)
+
+    def text(self) -> str:
+        return b"".join(self.chunks()).decode("utf-8")
+
+    def write(self, path: Union[str, Path]) -> int:
+        """Write the snapshot to path with gathered writes (no joined copy). Returns bytes written."""
+        with open(path, "wb") as f:
+            return write_chunks(f.fileno(), self.chunks())
+
+
+def write_chunks(fd: int, chunks) -> int:
+    """Write buffers to a file descriptor with os.writev where available (os.write elsewhere)."""
+    written = 0
+    writev = getattr(os, "writev", None)
+    batch: List[bytes] = []
+
+    def flush() -> int:
+        total = 0
+        views = [memoryview(b) for b in batch]
+        while views:
+            n = writev(fd, views[:_IOV_MAX]) if writev else os.write(fd, views[0])
+            total += n
+            while views and n >= len(views[0]):  # Drop fully written buffers, trim a partial one
+                n -= len(views[0])
+                views.pop(0)
+            if views and n:
+                views[0] = views[0][n:]
+        batch.clear()
+        return total
+
+    for chunk in chunks:
+        if chunk:
+            batch.append(chunk)
+            if len(batch) >= _IOV_MAX:
+                written += flush()
+    return written + flush()
+
+
+class CodebaseSnapshotBuilder:
+    """
+    Build the prepdir codebase dump for the [CODEBASE] prompt section, re-rendering only changed files.
+
+    File selection, UUID scrubbing and section format come from prepdir (its config, extensions and
+    exclusions). Each file's rendered section is cached under the SHA256 of its relative path and
+    content; a file whose (mtime, size, inode) did not change is not even read. prepdir's check for
+    its own output files, which parses every file, is cached the same way. The cache is kept in
+    .vibedir/codebase_cache.json so a new session starts warm.
+
+    With use_unique_placeholders, placeholders are numbered across files, so sections depend on
+    every file before them; they are then rendered on each build, as prepdir does.
+    """
+
+    def __init__(
+        self,
+        base_directory: Union[str, Path],
+        cache_path: Union[Path, bool, None] = None,
+        extensions: Optional[List[str]] = None,
+        config_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            base_directory: Directory to snapshot
+            cache_path: Section cache file (default <base_directory>/.vibedir/codebase_cache.json; False keeps it in memory)
+            extensions: File extensions to include (default from prepdir's config)
+            config_path: Custom prepdir config file
+        """
+        from prepdir import PrepdirProcessor  # Imported on first use; prepdir loads Dynaconf
+
+        self.base_directory = Path(base_directory).resolve()
+        self.processor = PrepdirProcessor(
+            str(self.base_directory), extensions=extensions, config_path=config_path, output_file=None, quiet=True
+        )
+        self.cache_path = cache_path if cache_path is not None else self.base_directory / ".vibedir" / CACHE_NAME
+        self._files: Dict[str, _FileState] = {}
+        self._sections: Dict[str, Optional[str]] = {}  # key -> section (None: excluded output file)
+        self._encoded: Dict[str, bytes] = {}
+        self._path_excluded: Dict[str, bool] = {}
+        self._rendered = 0
+        self._changed = False
+        self._load_cache()
+
+    def _settings_fingerprint(self) -> str:
+        from prepdir import __version__ as prepdir_version
+
+        p = self.processor
+        settings = [prepdir_version, p.scrub_hyphenated_uuids, p.scrub_hyphenless_uuids, p.replacement_uuid]
+        settings.append(p.include_prepdir_files)
+        return hashlib.sha256(json.dumps(settings).encode()).hexdigest()
+
+    def _load_cache(self) -> None:
+        if not self.cache_path or not Path(self.cache_path).is_file():
+            return
+        try:
+            data = json.loads(Path(self.cache_path).read_text(encoding="utf-8"))
+            if data.get("settings") != self._settings_fingerprint():
+                return  # Rendered with other scrubbing settings or another prepdir version
+            self._files = {rel: _FileState(tuple(sig), key, excluded) for rel, (sig, key, excluded) in data["files"].items()}
+            self._sections = dict(data["sections"])
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning(f"Ignoring unreadable codebase cache {self.cache_path}: {exc}")
+            self._files, self._sections = {}, {}
+
+    def save(self) -> None:
+        if not self.cache_path:
+            return
+        path = Path(self.cache_path)
+        data = {
+            "settings": self._settings_fingerprint(),
+            "files": {rel: [list(s.signature), s.key, s.excluded] for rel, s in self._files.items()},
+            "sections": self._sections,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _candidates(self) -> Iterator[Tuple[str, str]]:
+        """(absolute path, relative path) of the files prepdir would consider, in prepdir's order."""
+        p = self.processor
+        output_file = os.path.abspath(p.output_file) if p.output_file else None
+        listing = []
+        for root, dirnames, filenames in os.walk(p.directory):
+            dirnames[:] = [d for d in dirnames if not p.is_excluded_dir(d, root)]
+            listing.append((root, sorted(filenames)))
+        for root, filenames in sorted(listing):
+            prefix = os.path.relpath(root, p.directory)
+            prefix = "" if prefix == "." else prefix + os.sep
+            for filename in filenames:
+                if p.extensions and not any(filename.endswith(f".{ext}") for ext in p.extensions):
+                    continue
+                rel = prefix + filename
+                excluded = self._path_excluded.get(rel)
+                if excluded is None:
+                    # Exclusion patterns only depend on the path; prepdir's check is costly per file
+                    path = os.path.join(root, filename)
+                    excluded = self._path_excluded[rel] = p.is_excluded_file(filename, root) or (
+                        output_file is not None and os.path.abspath(path) == output_file
+                    )
+                if not excluded:
+                    yield os.path.join(root, filename), rel
+
+    def _is_output_file(self, path: str, raw: bytes) -> bool:
+        """prepdir's is_excluded_output_file, on content already read."""
+        from prepdir import PrepdirFileEntry
+
+        if self.processor.include_prepdir_files:
+            return False
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            return False
+        return PrepdirFileEntry.is_prepdir_outputfile_format(text, file_full_path=path)
+
+    def _render(self, path: str) -> str:
+        from prepdir import PrepdirFileEntry
+
+        p = self.processor
+        entry, _, _ = PrepdirFileEntry.from_file_path(
+            file_path=Path(path),
+            base_directory=p.directory,
+            scrub_hyphenated_uuids=p.scrub_hyphenated_uuids,
+            scrub_hyphenless_uuids=p.scrub_hyphenless_uuids,
+            replacement_uuid=p.replacement_uuid,
+            use_unique_placeholders=False,
+            quiet=True,
+        )
+        return entry.to_output()
+
+    def _state(self, path: str, rel: str) -> Optional[_FileState]:
+        """Current cache state of a file, reading and rendering it only if it changed."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        state = self._files.get(rel)
+        if state is not None and state.signature == signature and state.key in self._sections:
+            return state
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError as exc:
+            logger.warning(f"Cannot read {path}: {exc}")
+            return None
+        key = hashlib.sha256(rel.encode() + b"\0" + raw).hexdigest()
+        if key not in self._sections:
+            excluded = self._is_output_file(path, raw)
+            self._sections[key] = None if excluded else self._render(path)
+            self._rendered += 1
+        state = _FileState(signature, key, self._sections[key] is None)
+        self._files[rel] = state
+        self._changed = True
+        return state
+
+    def build(self) -> CodebaseSnapshot:
+        """Snapshot the codebase now."""
+        if self.processor.use_unique_placeholders:
+            return self._build_uncached()
+        self._rendered = 0
+        sections: List[bytes] = []
+        paths: List[str] = []
+        seen = set()
+        for path, rel in self._candidates():
+            state = self._state(path, rel)
+            if state is None:
+                continue
+            seen.add(rel)
+            if state.excluded:
+                continue
+            encoded = self._encoded.get(state.key)
+            if encoded is None:
+                encoded = self._encoded[state.key] = self._sections[state.key].encode("utf-8")
+            sections.append(encoded)
+            paths.append(rel)
+
+        if self._changed or len(seen) != len(self._files):
+            # Forget files that are gone and sections no file uses any more
+            self._files = {rel: s for rel, s in self._files.items() if rel in seen}
+            live = {s.key for s in self._files.values()}
+            self._sections = {k: v for k, v in self._sections.items() if k in live}
+            self._encoded = {k: v for k, v in self._encoded.items() if k in live}
+            self.save()
+            self._changed = False
+
+        header = _prepdir_header(self.processor).encode("utf-8")
+        snapshot = CodebaseSnapshot(header, sections, self._rendered, len(sections) - self._rendered, paths)
+        logger.debug(f"Codebase snapshot: {snapshot.rendered} sections rendered, {snapshot.reused} reused")
+        return snapshot
+
+    def _build_uncached(self) -> CodebaseSnapshot:
+        entries, _ = self.processor.generate_file_entries()
+        header = _prepdir_header(self.processor).encode("utf-8")
+        sections = [entry.to_output().encode("utf-8") for entry in entries]
+        return CodebaseSnapshot(header, sections, rendered=len(sections), paths=[e.relative_path for e in entries])
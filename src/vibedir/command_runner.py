@@ -0,0 +1,685 @@
+# vibedir/command_runner.py
+import asyncio
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Mapping, Optional, Sequence, Set, Tuple
+
+from .impact import ImpactSelector, RunPlan
+from .models.command_attachment import CommandAttachment
+from .models.command_status import CommandStatus
+from .models.settings import CommandConfig, VibedirSettings, validate_command_graph
+from .warm_runner import WarmCommand, WarmRunner, resolve_warm_command
+
+logger = logging.getLogger(__name__)
+
+_TEMPLATE_VARIABLE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_SELECTED_TESTS = re.compile(r"\{\{\s*selected_tests\s*\}\}")
+_READ_CHUNK_SIZE = 64 * 1024
+# Never searched for command inputs (besides hidden directories such as .git, .venv and .vibedir)
+_SKIPPED_DIRECTORIES = frozenset({"__pycache__", "node_modules"})
+
+
+def render_command(template: str, variables: Mapping[str, str]) -> str:
+    """
+    Fill {{ name }} template variables in a command.
+
+    Values may themselves contain variables (e.g. tests_directory = '{{ base_directory }}/tests').
+    Unknown variables are left untouched.
+
+    Raises:
+        ValueError: If variables reference each other in a loop.
+    """
+    for _ in range(10):
+        rendered = _TEMPLATE_VARIABLE.sub(lambda m: str(variables.get(m.group(1), m.group(0))), template)
+        if rendered == template:
+            return rendered
+        template = rendered
+    raise ValueError(f"Template variables nest too deeply in command: {template}")
+
+
+class OutputTail:
+    """Bounded ring buffer holding the last max_bytes of a command's output, for live display."""
+
+    def __init__(self, max_bytes: int = 64 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0  # Everything ever appended, including what was dropped
+        self._chunks: deque = deque()
+        self._size = 0
+
+    def append(self, chunk: bytes) -> None:
+        self.total_bytes += len(chunk)
+        if len(chunk) >= self.max_bytes:
+            self._chunks.clear()
+            self._size = 0
+            chunk = chunk[-self.max_bytes :]
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        while self._size > self.max_bytes:
+            excess = self._size - self.max_bytes
+            head = self._chunks[0]
+            if len(head) <= excess:
+                self._chunks.popleft()
+                self._size -= len(head)
+            else:
+                self._chunks[0] = head[excess:]
+                self._size -= excess
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_bytes > self._size
+
+    def text(self) -> str:
+        return b"".join(self._chunks).decode("utf-8", errors="replace")
+
+
+def _glob_regex(pattern: str) -> "re.Pattern[str]":
+    """Compile a Path.glob pattern ("**" for any number of directories) to a regex on relative posix paths."""
+    segments = [segment for segment in pattern.split("/") if segment not in ("", ".")]
+    regex = ""
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            regex += "(?:[^/]+/)*[^/]+" if last else "(?:[^/]+/)*"
+            continue
+        j = 0
+        while j < len(segment):
+            char = segment[j]
+            end = segment.find("]", j + 2) if char == "[" else -1
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif end != -1:
+                body = segment[j + 1 : end]
+                regex += "[" + ("^" + body[1:] if body.startswith("!") else body).replace("\\", "\\\\") + "]"
+                j = end
+            else:
+                regex += re.escape(char)
+            j += 1
+        if not last:
+            regex += "/"
+    return re.compile(regex + r"\Z")
+
+
+def _matching_files(base: Path, pattern: str, excluded: Set[str]) -> Set[str]:
+    """
+    Relative posix paths of the files under base matching the glob pattern.
+
+    The walk starts at the pattern's literal leading directories. While a wildcard level ("**", "*")
+    is expanded, hidden directories (.git, .venv, .vibedir), _SKIPPED_DIRECTORIES and excluded paths
+    are pruned before they are entered, unless the pattern names them (".github/workflows/*.yml",
+    "**/.hidden/*.py").
+    """
+    regex = _glob_regex(pattern)
+    segments = [segment for segment in pattern.split("/") if segment not in ("", ".")]
+    literal = []
+    for segment in segments[:-1]:
+        if any(char in segment for char in "*?["):
+            break
+        literal.append(segment)
+    recursive = len(literal) < len(segments) - 1  # A wildcard directory level ("**", "*") follows
+    named = [segment for segment in segments[len(literal) : -1] if segment != "**"]
+    root = base.joinpath(*literal)
+    if str(root) in excluded:
+        return set()
+
+    def pruned(directory: str, name: str) -> bool:
+        if os.path.join(directory, name) in excluded:
+            return True
+        if not name.startswith(".") and name not in _SKIPPED_DIRECTORIES:
+            return False
+        # "*" does not reach into .git or node_modules, but a segment that spells out the start of the name does
+        return not any(fnmatch.fnmatchcase(name, segment) and segment[0] not in "*?[" for segment in named)
+
+    matched: Set[str] = set()
+    prefix = "".join(f"{segment}/" for segment in literal)
+    for directory, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(directory, root)
+        rel_dir = prefix if rel == "." else f"{prefix}{rel.replace(os.sep, '/')}/"
+        if recursive:
+            dirnames[:] = [d for d in dirnames if not pruned(directory, d)]
+        else:
+            dirnames.clear()
+        matched.update(rel_dir + name for name in filenames if regex.match(rel_dir + name))
+    return matched
+
+
+class CommandResultCache:
+    """
+    Persistent cache of command results, stored as CommandAttachment JSON plus a copy of the output file.
+
+    A run is keyed on the rendered command, the template variables and a content hash of the files
+    matching the command's inputs globs, so a command is only re-run when something it reads changed
+    (a revert back to an already-tested tree is a hit too). Commands without inputs are never cached.
+    """
+
+    def __init__(self, directory: Path):
+        """
+        Args:
+            directory: Directory holding <key>.json and <key>_output.txt entries (e.g. .vibedir/command_cache)
+        """
+        self.directory = Path(directory)
+        # Per-file content hashes, reused while (mtime_ns, size) is unchanged
+        self._file_digests: Dict[Path, Tuple[Tuple[int, int], str]] = {}
+        self._empty_patterns: Set[Tuple[Path, str]] = set()  # Already warned about matching nothing
+
+    def inputs_digest(self, base_directory: Path, patterns: Iterable[str], exclude: Iterable[Path] = ()) -> str:
+        """Hash the paths and contents of the files under base_directory matching the glob patterns."""
+        base = Path(base_directory).resolve()
+        excluded = {str(Path(p).resolve()) for p in (self.directory, *exclude)}
+        files: Set[str] = set()
+        for pattern in patterns:
+            matched = _matching_files(base, pattern, excluded)
+            if not matched and (base, pattern) not in self._empty_patterns:
+                self._empty_patterns.add((base, pattern))
+                logger.warning(f"Command input '{pattern}' matches no files under {base}")
+            files |= matched
+        digest = hashlib.sha256()
+        for rel in sorted(files):
+            digest.update(rel.encode())
+            digest.update(b"\0")
+            digest.update(self._file_digest(base / rel).encode())
+        return digest.hexdigest()
+
+    def _file_digest(self, path: Path) -> str:
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._file_digests.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        digest = hashlib.sha256()
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        self._file_digests[path] = (signature, digest.hexdigest())
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(command: str, variables: Mapping[str, str], inputs_digest: str) -> str:
+        payload = json.dumps({"command": command, "variables": dict(variables), "inputs": inputs_digest}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CommandAttachment]:
+        """Return the stored attachment for key, or None on a miss (or an incomplete entry)."""
+        path = self.directory / f"{key}.json"
+        if not path.is_file():
+            return None
+        try:
+            attachment = CommandAttachment.model_validate_json(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Ignoring unreadable command cache entry {path}: {exc}")
+            return None
+        if attachment.output_path is not None and not attachment.output_path.is_file():
+            return None
+        return attachment
+
+    def set(self, key: str, result: "CommandResult") -> CommandAttachment:
+        """Store a result (with a copy of its output file, if any) under key and return the stored attachment."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{key}.json"
+        path.touch()
+        stored = CommandAttachment(name=result.name, status=result.status, path=path, success_value=result.success)
+        source = result.attachment.output_path if result.attachment is not None else None
+        if source is not None and source.is_file():
+            stored = stored.model_copy(update={"output_path": stored.compute_output_path()})
+            shutil.copyfile(source, stored.output_path)
+        else:
+            stored = stored.model_copy(update={"output": result.output})
+        path.write_text(stored.model_dump_json(indent=2), encoding="utf-8")
+        return stored
+
+
+@dataclass
+class CommandResult:
+    """Outcome of one command run."""
+
+    name: str
+    command: str
+    status: str  # One of CommandStatus.valid_statuses()
+    returncode: Optional[int] = None
+    output: str = ""  # Tail of the output (see OutputTail); the full output is in attachment.output_path
+    duration: float = 0.0
+    attachment: Optional[CommandAttachment] = None
+    cached: bool = False  # True if reused from a CommandResultCache instead of run
+
+    @property
+    def success(self) -> bool:
+        return self.status == CommandStatus.SUCCESS
+
+
+class CommandScheduler:
+    """
+    Run [[command]] entries for an event, in parallel where possible and in depends_on order otherwise.
+
+    All commands triggered by an event start at once, except that a command waits for the commands
+    it depends_on (when they are triggered by the same event) to finish. At most max_parallel
+    commands run at the same time. Starting a new run with schedule() cancels a run still in
+    progress (e.g. when a new change set arrives), killing its subprocesses.
+
+    Output is streamed in chunks: to <output_dir>/<name>_output.txt (referenced by the CommandAttachment
+    written to <output_dir>/<name>.json), to an OutputTail per command and to on_output. Memory per
+    command stays bounded no matter how much output it produces.
+
+    With a CommandResultCache, commands that declare inputs are skipped when an earlier run saw the
+    same command, variables and input contents; the stored result is reported instead.
+
+    Commands using {{ selected_tests }} get the tests affected by the run's changed_files when an
+    ImpactSelector is set (and the whole tests directory otherwise); after they run, the selector's
+    file-to-test map is updated from the coverage data they wrote. When no tests are affected the
+    command is skipped only if its last run passed; otherwise all tests run.
+
+    Commands with warm = true run in a fork of a worker that already imported their entry point
+    (see vibedir.warm_runner), falling back to a cold subprocess when that is not possible.
+    Call close() to stop the workers.
+    """
+
+    def __init__(
+        self,
+        commands: Sequence[CommandConfig],
+        base_directory: Path,
+        variables: Optional[Mapping[str, str]] = None,
+        max_parallel: Optional[int] = None,
+        on_status: Optional[Callable[[str, str], None]] = None,
+        output_dir: Optional[Path] = None,
+        on_output: Optional[Callable[[str, bytes], None]] = None,
+        tail_bytes: int = 64 * 1024,
+        cache: Optional[CommandResultCache] = None,
+        test_impact: Optional[ImpactSelector] = None,
+    ):
+        """
+        Args:
+            commands: Command configs, in config order
+            base_directory: Working directory for commands and the {{ base_directory }} variable
+            variables: Extra template variables (e.g. tests_directory)
+            max_parallel: Max concurrent commands (default: number of CPUs)
+            on_status: Called with (command name, status) on every status change
+            output_dir: Directory for <name>.json attachments and their output files (None: keep only the tail)
+            on_output: Called with (command name, output chunk) as output arrives
+            tail_bytes: Size of the per-command OutputTail
+            cache: Optional result cache for commands with inputs
+            test_impact: Optional selector filling {{ selected_tests }} with the affected tests
+        """
+        validate_command_graph(tuple(commands))
+        self.commands: Dict[str, CommandConfig] = {cmd.name: cmd for cmd in commands}
+        self.base_directory = Path(base_directory)
+        self.variables = {
+            "selected_tests": "{{ tests_directory }}",
+            **(variables or {}),
+            "base_directory": str(self.base_directory),
+        }
+        self.max_parallel = max_parallel or os.cpu_count() or 1
+        self.on_status = on_status
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.on_output = on_output
+        self.tail_bytes = tail_bytes
+        self.tails: Dict[str, OutputTail] = {}
+        self.cache = cache
+        self.test_impact = test_impact
+        self._warm_runners: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], WarmRunner] = {}
+        self.statuses: Dict[str, str] = {
+            cmd.name: CommandStatus.NOT_RUN if cmd.configured else CommandStatus.NOT_CONFIGURED for cmd in commands
+        }
+        self._finished: Dict[str, str] = {}  # Status each command had when it last completed
+        self._current: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings: VibedirSettings, base_directory: Path, **kwargs) -> "CommandScheduler":
+        """Build a scheduler from the compiled config (see vibedir.config.load_settings)."""
+        impact = settings.test_impact
+        if impact.enabled and "test_impact" not in kwargs:
+            base_directory = Path(base_directory)
+            kwargs["test_impact"] = ImpactSelector(
+                base_directory,
+                Path(render_command(settings.tests_directory, {"base_directory": str(base_directory)})),
+                base_directory / impact.map_file,
+                Path(impact.coverage_file),
+                impact.full_run_every,
+            )
+        return cls(
+            settings.commands,
+            base_directory,
+            variables={"tests_directory": settings.tests_directory},
+            max_parallel=settings.max_parallel,
+            **kwargs,
+        )
+
+    def select(self, event: Optional[str] = None, names: Optional[Iterable[str]] = None) -> list[CommandConfig]:
+        """Commands to run for an event and/or explicit names, in config order."""
+        wanted = set(names or ())
+        return [
+            cmd
+            for cmd in self.commands.values()
+            if cmd.name in wanted or (event is not None and event in cmd.run_on)
+        ]
+
+    def schedule(
+        self,
+        event: Optional[str] = None,
+        names: Optional[Iterable[str]] = None,
+        changed_files: Optional[Iterable[Path]] = None,
+    ) -> asyncio.Task:
+        """
+        Start a run in the background, cancelling the previous run if it is still in progress.
+
+        The new run sets no status until the cancelled one has finished unwinding, so the cancelled
+        run's reset of its waiting and running commands cannot overwrite the new run's statuses.
+        """
+        previous = self._current
+        if previous is not None and not previous.done():
+            logger.info("Cancelling stale command run")
+            previous.cancel()
+        else:
+            previous = None
+        self._current = asyncio.ensure_future(self._run_after(previous, event, names, changed_files))
+        return self._current
+
+    async def _run_after(
+        self,
+        previous: Optional[asyncio.Task],
+        event: Optional[str],
+        names: Optional[Iterable[str]],
+        changed_files: Optional[Iterable[Path]],
+    ) -> Dict[str, CommandResult]:
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        return await self.run(event, names, changed_files)
+
+    async def cancel(self) -> None:
+        """Cancel the background run started by schedule(), if any, and wait for it to stop."""
+        if self._current is not None and not self._current.done():
+            self._current.cancel()
+            try:
+                await self._current
+            except asyncio.CancelledError:
+                pass
+
+    async def run(
+        self,
+        event: Optional[str] = None,
+        names: Optional[Iterable[str]] = None,
+        changed_files: Optional[Iterable[Path]] = None,
+    ) -> Dict[str, CommandResult]:
+        """
+        Run the selected commands and wait for them.
+
+        Args:
+            event: Run the commands with this event in run_on
+            names: Also run these commands
+            changed_files: Files changed by the change set, for test impact selection (None: run all tests)
+
+        Returns:
+            Results by command name (commands without a command string are reported not_configured)
+        """
+        selected = self.select(event, names)
+        changed_files = None if changed_files is None else tuple(changed_files)
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        tasks: Dict[str, asyncio.Task] = {}
+
+        for cmd in selected:
+            self._set_status(cmd.name, CommandStatus.WAITING if cmd.configured else CommandStatus.NOT_CONFIGURED)
+
+        async def run_one(cmd: CommandConfig) -> CommandResult:
+            dependencies = [tasks[dep] for dep in cmd.depends_on if dep in tasks]
+            if dependencies:
+                await asyncio.wait(dependencies)
+            if not cmd.configured:
+                return CommandResult(cmd.name, cmd.command, CommandStatus.NOT_CONFIGURED)
+            async with semaphore:
+                try:
+                    return await self._execute(cmd, changed_files)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    # Report it as this command's failure rather than failing the gather with siblings still running
+                    logger.error(f"Command '{cmd.name}' failed to run: {exc}")
+                    self._set_status(cmd.name, CommandStatus.FAILED)
+                    return CommandResult(cmd.name, cmd.command, CommandStatus.FAILED, output=str(exc))
+
+        # All tasks exist before any of them starts, so dependents can always find their dependencies
+        for cmd in selected:
+            tasks[cmd.name] = asyncio.ensure_future(run_one(cmd))
+
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            for cmd in selected:
+                if self.statuses[cmd.name] in (CommandStatus.WAITING, CommandStatus.RUNNING):
+                    self._set_status(cmd.name, CommandStatus.NOT_RUN)
+            raise
+        return {result.name: result for result in results}
+
+    async def _execute(self, cmd: CommandConfig, changed_files: Optional[Tuple[Path, ...]] = None) -> CommandResult:
+        started = time.perf_counter()
+        variables = self.variables
+        plan = None
+        if self.test_impact is not None and _SELECTED_TESTS.search(cmd.command):
+            plan = self.test_impact.plan(changed_files)
+            last = self._finished.get(cmd.name, CommandStatus.NOT_RUN)
+            if plan.empty and last != CommandStatus.SUCCESS:
+                # Which tests failed last time is not known, and a failure must not turn into success unrun
+                plan = RunPlan(full=True, reason=f"no tests affected, but the last run was {last}")
+            logger.info(f"Command '{cmd.name}' test selection: {plan.reason}")
+            if plan.empty:
+                self._set_status(cmd.name, CommandStatus.SUCCESS)
+                return CommandResult(
+                    cmd.name, cmd.command, CommandStatus.SUCCESS, output="No tests affected by the changes"
+                )
+            variables = {**variables, **self.test_impact.variables(plan)}
+        command = render_command(cmd.command, variables)
+        self._set_status(cmd.name, CommandStatus.RUNNING)
+
+        tail = OutputTail(self.tail_bytes)
+        self.tails[cmd.name] = tail
+
+        cache_key, inputs_digest, cached = await self._look_up_cache(cmd, command, variables)
+        if cached is not None:
+            try:
+                return self._reuse_cached(cmd, command, cached, tail, started)
+            except Exception as exc:
+                logger.warning(f"Could not reuse the cached result of '{cmd.name}', running it: {exc}")
+                tail = self.tails[cmd.name] = OutputTail(self.tail_bytes)
+
+        attachment = output_file = None
+
+        def sink(chunk: bytes) -> None:
+            tail.append(chunk)
+            if output_file is not None:
+                output_file.write(chunk)
+            if self.on_output is not None:
+                self.on_output(cmd.name, chunk)
+
+        try:
+            attachment = self._start_attachment(cmd)
+            output_file = open(attachment.output_path, "wb") if attachment else None
+            returncode = await self._run_command(cmd, command, sink)
+            if cmd.success == "exit_code":
+                success = returncode == 0
+            else:
+                # success names a command whose exit code decides success
+                success = await self._run_shell(render_command(cmd.success, variables)) == 0
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error(f"Command '{cmd.name}' failed to run: {exc}")
+            sink(str(exc).encode())
+            returncode, success = None, False
+        finally:
+            if output_file is not None:
+                output_file.close()
+
+        status = CommandStatus.SUCCESS if success else CommandStatus.FAILED
+        if attachment is not None:
+            attachment = attachment.model_copy(update={"status": status, "success_value": success})
+            try:
+                attachment.path.write_text(attachment.model_dump_json(indent=2), encoding="utf-8")
+            except OSError as exc:
+                logger.error(f"Could not write attachment {attachment.path} for '{cmd.name}': {exc}")
+        if plan is not None and returncode is not None:
+            try:
+                await asyncio.to_thread(self.test_impact.record_run, plan)
+            except Exception as exc:
+                logger.error(f"Could not update test impact map after '{cmd.name}': {exc}")
+        result = CommandResult(
+            cmd.name, command, status, returncode, tail.text(), time.perf_counter() - started, attachment
+        )
+        if cache_key is not None and returncode is not None:
+            try:
+                # A command that rewrote its own inputs (e.g. a formatter) must run again next time
+                if await asyncio.to_thread(self._inputs_digest, cmd) == inputs_digest:
+                    self.cache.set(cache_key, result)
+            except Exception as exc:
+                logger.warning(f"Could not cache the result of '{cmd.name}': {exc}")
+        self._set_status(cmd.name, status)
+        return result
+
+    async def _look_up_cache(
+        self, cmd: CommandConfig, command: str, variables: Mapping[str, str]
+    ) -> Tuple[Optional[str], Optional[str], Optional[CommandAttachment]]:
+        """
+        (cache key, inputs digest, cached result) of a command run; all None when it is not cached.
+
+        A failed lookup (a file vanishing while the inputs are hashed, an unreadable entry) is
+        logged and the command runs uncached.
+        """
+        if self.cache is None or not cmd.inputs:
+            return None, None, None
+        try:
+            inputs_digest = await asyncio.to_thread(self._inputs_digest, cmd)
+            cache_key = self.cache.key(command, variables, inputs_digest)
+            return cache_key, inputs_digest, self.cache.get(cache_key)
+        except Exception as exc:
+            logger.warning(f"Could not check the inputs of '{cmd.name}', running it uncached: {exc}")
+            return None, None, None
+
+    def _inputs_digest(self, cmd: CommandConfig) -> str:
+        exclude = (self.output_dir,) if self.output_dir else ()
+        return self.cache.inputs_digest(self.base_directory, cmd.inputs, exclude)
+
+    def _reuse_cached(
+        self, cmd: CommandConfig, command: str, cached: CommandAttachment, tail: OutputTail, started: float
+    ) -> CommandResult:
+        logger.info(f"Command '{cmd.name}' inputs unchanged, reusing cached {cached.status} result")
+        tail.append(cached.read_output(max_bytes=self.tail_bytes).encode())
+        attachment = self._start_attachment(cmd)
+        if attachment is None:
+            attachment = cached
+        else:
+            if cached.output_path is not None:
+                shutil.copyfile(cached.output_path, attachment.output_path)
+            else:
+                attachment.output_path.write_text(cached.read_output(), encoding="utf-8")
+            attachment = attachment.model_copy(update={"status": cached.status, "success_value": cached.success_value})
+            attachment.path.write_text(attachment.model_dump_json(indent=2), encoding="utf-8")
+        self._set_status(cmd.name, cached.status)
+        return CommandResult(
+            cmd.name, command, cached.status, None, tail.text(), time.perf_counter() - started, attachment, cached=True
+        )
+
+    def _start_attachment(self, cmd: CommandConfig) -> Optional[CommandAttachment]:
+        """Create <output_dir>/<name>.json (status running) pointing at the output file, if output_dir is set."""
+        if self.output_dir is None:
+            return None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{re.sub(r'[^A-Za-z0-9._-]', '_', cmd.name)}.json"
+        path.touch()
+        attachment = CommandAttachment(name=cmd.name, status=CommandStatus.RUNNING, path=path)
+        attachment = attachment.model_copy(update={"output_path": attachment.compute_output_path()})
+        path.write_text(attachment.model_dump_json(indent=2), encoding="utf-8")
+        return attachment
+
+    async def _run_command(self, cmd: CommandConfig, command: str, sink: Callable[[bytes], None]) -> int:
+        if cmd.warm:
+            returncode = await self._run_warm(cmd, command, sink)
+            if returncode is not None:
+                return returncode
+        return await self._run_shell(command, sink)
+
+    def _warm_runner(self, cmd: CommandConfig, command: str) -> Optional[Tuple[WarmRunner, WarmCommand]]:
+        warm = resolve_warm_command(command) if WarmRunner.supported() else None
+        if warm is None:
+            logger.debug(f"Command '{cmd.name}' cannot run warm, using a cold subprocess")
+            return None
+        preload, if_package = warm.preload
+        key = (tuple(sorted({*preload, *cmd.preload})), if_package)
+        runner = self._warm_runners.get(key)
+        if runner is None:
+            runner = self._warm_runners[key] = WarmRunner(key[0], self.base_directory, if_package)
+        return runner, warm
+
+    async def _run_warm(self, cmd: CommandConfig, command: str, sink: Callable[[bytes], None]) -> Optional[int]:
+        resolved = self._warm_runner(cmd, command)
+        if resolved is None:
+            return None
+        runner, warm = resolved
+        return await runner.run(warm, sink)
+
+    async def warm_up(self) -> None:
+        """Start the warm workers for all warm commands now instead of on their first run."""
+        runners = []
+        for cmd in self.commands.values():
+            if cmd.warm and cmd.configured:
+                resolved = self._warm_runner(cmd, render_command(cmd.command, self.variables))
+                if resolved is not None:
+                    runners.append(resolved[0])
+        await asyncio.gather(*(asyncio.to_thread(runner.start) for runner in set(runners)))
+
+    def close(self) -> None:
+        """Stop the warm workers."""
+        for runner in self._warm_runners.values():
+            runner.close()
+        self._warm_runners.clear()
+
+    async def _run_shell(self, command: str, sink: Optional[Callable[[bytes], None]] = None) -> int:
+        """Run a shell command, streaming its combined stdout/stderr to sink in chunks (discarded if None)."""
+        proc = await asyncio.create_subprocess_shell(
+            command,
+            cwd=str(self.base_directory),
+            stdout=asyncio.subprocess.PIPE if sink else asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=os.name == "posix",  # Own process group, so cancelling also kills children
+        )
+        try:
+            if sink is not None:
+                while True:
+                    chunk = await proc.stdout.read(_READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sink(chunk)
+            return await proc.wait()
+        except asyncio.CancelledError:
+            _kill_process_tree(proc)
+            await proc.wait()
+            raise
+
+    def _set_status(self, name: str, status: str) -> None:
+        self.statuses[name] = status
+        if status in (CommandStatus.SUCCESS, CommandStatus.FAILED):
+            self._finished[name] = status
+        if self.on_status is not None:
+            self.on_status(name, status)
+
+
+def _kill_process_tree(proc: asyncio.subprocess.Process) -> None:
+    """Kill a shell started by CommandScheduler and everything it spawned."""
+    if proc.returncode is not None:
+        return
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
@@ -1,14 +1,23 @@
 # vibedir/config.py
+import copy
 import logging
 import os
+import stat
 import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Any, Optional, Tuple
 
 import tomlkit  # pip install tomlkit
 from dynaconf import Dynaconf
 from importlib import resources
 
+if TYPE_CHECKING:
+    from .models.settings import VibedirSettings
+
 __version__ = "0.0.0"
 
 try:
@@ -21,6 +30,20 @@ except Exception as e:
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _CachedConfig:
+    """A loaded config: the (mtime_ns, size) signature of its files, the settings and their compiled form."""
+
+    signature: Optional[tuple]
+    settings: Dynaconf
+    typed: Optional["VibedirSettings"] = None
+
+
+# Process-wide cache of loaded settings, keyed on their resolved sources
+_config_cache: dict[tuple, _CachedConfig] = {}
+_config_cache_lock = threading.Lock()
+
+
 def check_namespace_value(namespace: str) -> None:
     """Validate that the namespace is a valid Python identifier."""
     if not namespace:
@@ -45,54 +68,47 @@ def home_and_local_config_path(namespace: str) -> Tuple[Path, Path]:
     return home_path, local_path
 
 
+@lru_cache(maxsize=None)
 def get_bundled_config(namespace: str) -> str:
-    """Read the bundled default config.toml from the package."""
+    """Read the bundled default config.toml from the package (read once per process)."""
     if not is_resource(namespace, "config.toml"):
         raise ValueError(f"No bundled config.toml found in package '{namespace}'")
     path = resources.files(namespace) / "config.toml"
     return path.read_text(encoding="utf-8")
 
 
-def _load_toml_file(path: Path) -> tomlkit.TOMLDocument:
-    """Safely load a TOML file with tomlkit (preserves formatting/comments)."""
-    if not path.is_file():
-        raise FileNotFoundError(f"Config file not found: {path}")
-    with path.open("r", encoding="utf-8") as f:
-        return tomlkit.load(f)
+@lru_cache(maxsize=None)
+def _bundled_config_data(text: str) -> dict:
+    return tomlkit.loads(text).unwrap()
 
 
-def load_config(
-    namespace: str,
-    config_path: Optional[str] = None,
-    quiet: bool = False,
-) -> Dynaconf:
-    """
-    Load configuration with precedence: custom > local > home > bundled.
-    Merges all available sources (bundled always as base unless skipped).
-    """
-    check_namespace_value(namespace)
-    settings_files: list[Path] = []
+def _parse_bundled_config(text: str) -> dict:
+    """The bundled config as plain Python data (parsed once; a deep copy per call, as Dynaconf keeps references)."""
+    return copy.deepcopy(_bundled_config_data(text))
 
-    skip_file_load = os.environ.get("VIBEDIR_SKIP_CONFIG_FILE_LOAD", "false").lower() == "true"
-    skip_bundled = os.environ.get("VIBEDIR_SKIP_BUNDLED_CONFIG_LOAD", "false").lower() == "true"
 
-    temp_path: Optional[Path] = None
+def clear_config_cache() -> None:
+    """Drop all settings cached by load_config."""
+    with _config_cache_lock:
+        _config_cache.clear()
 
-    # Bundled as base (lowest precedence)
-    if not skip_bundled:
+
+def _file_signature(paths: list[Path]) -> Optional[tuple]:
+    """Return (mtime_ns, size) for each path, or None if any of them can no longer be stat'ed."""
+    signature = []
+    for path in paths:
         try:
-            content = get_bundled_config(namespace)
-            tmp = tempfile.NamedTemporaryFile(
-                mode="w", suffix=f"_{namespace}_bundled.toml", delete=False, encoding="utf-8"
-            )
-            tmp.write(content)
-            tmp.close()
-            temp_path = Path(tmp.name)
-            settings_files.append(temp_path)
-            if not quiet:
-                print("Using bundled default config (as base)")
-        except Exception as exc:
-            logger.warning(f"Could not load bundled config: {exc}")
+            st = path.stat()
+        except OSError:
+            return None
+        signature.append((st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def _config_file_sources(namespace: str, config_path: Optional[str], quiet: bool) -> list[Path]:
+    """Resolve the config files to merge over the bundled defaults, lowest precedence first."""
+    settings_files: list[Path] = []
+    skip_file_load = os.environ.get("VIBEDIR_SKIP_CONFIG_FILE_LOAD", "false").lower() == "true"
 
     # Home then local (increasing precedence)
     if not skip_file_load:
@@ -118,30 +134,101 @@ def load_config(
         if not quiet:
             print(f"Using custom config: {cfg_path}")
 
-    if not settings_files:
+    return settings_files
+
+
+def _load_toml_file(path: Path) -> tomlkit.TOMLDocument:
+    """Safely load a TOML file with tomlkit (preserves formatting/comments)."""
+    if not path.is_file():
+        raise FileNotFoundError(f"Config file not found: {path}")
+    with path.open("r", encoding="utf-8") as f:
+        return tomlkit.load(f)
+
+
+def load_config(
+    namespace: str,
+    config_path: Optional[str] = None,
+    quiet: bool = False,
+) -> Dynaconf:
+    """
+    Load configuration with precedence: custom > local > home > bundled.
+    Merges all available sources (bundled always as base unless skipped).
+
+    Results are cached per process, keyed on the resolved source files and their mtimes/sizes,
+    so repeated calls only stat the sources. The bundled defaults are loaded from memory (no temp
+    file). The returned settings object is shared between callers and should be treated as read-only.
+    """
+    return _load_config_entry(namespace, config_path, quiet).settings
+
+
+def load_settings(
+    namespace: str = "vibedir",
+    config_path: Optional[str] = None,
+    quiet: bool = True,
+) -> "VibedirSettings":
+    """
+    Load configuration (as load_config) compiled into a frozen, validated VibedirSettings.
+
+    Compilation happens once per loaded config, so hot-path reads are plain attribute access.
+
+    Raises:
+        pydantic.ValidationError: If the merged config does not match the schema.
+    """
+    entry = _load_config_entry(namespace, config_path, quiet)
+    if entry.typed is None:
+        from .models.settings import VibedirSettings  # Deferred: pydantic is only needed here
+
+        entry.typed = VibedirSettings.from_dynaconf(entry.settings)
+    return entry.typed
+
+
+def _load_config_entry(namespace: str, config_path: Optional[str], quiet: bool) -> _CachedConfig:
+    """Load the merged settings for load_config/load_settings, or reuse the cached entry if unchanged."""
+    check_namespace_value(namespace)
+
+    skip_bundled = os.environ.get("VIBEDIR_SKIP_BUNDLED_CONFIG_LOAD", "false").lower() == "true"
+
+    # Bundled as base (lowest precedence)
+    bundled: Optional[str] = None
+    if not skip_bundled:
+        try:
+            bundled = get_bundled_config(namespace)
+            if not quiet:
+                print("Using bundled default config (as base)")
+        except Exception as exc:
+            logger.warning(f"Could not load bundled config: {exc}")
+
+    settings_files = _config_file_sources(namespace, config_path, quiet)
+
+    if bundled is None and not settings_files:
         logger.debug("No config files found – Dynaconf will use empty defaults")
 
-    # Create Dynaconf with merge (later files override earlier)
+    sources = (namespace, bundled is not None, tuple(settings_files))
+    signature = _file_signature(settings_files)
+    with _config_cache_lock:
+        cached = _config_cache.get(sources)
+    if cached and signature is not None and cached.signature == signature:
+        logger.debug(f"Using cached config for {namespace}")
+        return cached
+
+    # Create Dynaconf with merge (later sources override earlier)
     settings = Dynaconf(
-        settings_files=[str(p) for p in settings_files],
+        settings_files=[],
         merge_enabled=True,
         load_dotenv=False,
         lowercase_read_for_dynaconf=True,
     )
+    if bundled is not None:
+        settings.update(_parse_bundled_config(bundled), loader_identifier="toml")
+    for path in settings_files:
+        settings.load_file(path=str(path))
 
-    # Force eager loading before cleanup
-    if temp_path:
-        settings.to_dict()
-
-    # Cleanup temp bundled file
-    if temp_path and temp_path.exists():
-        try:
-            temp_path.unlink()
-            logger.debug(f"Cleaned up temporary bundled config {temp_path}")
-        except Exception as exc:
-            logger.warning(f"Failed to remove temp config {temp_path}: {exc}")
+    entry = _CachedConfig(signature, settings)
+    if signature is not None:
+        with _config_cache_lock:
+            _config_cache[sources] = entry
 
-    return settings
+    return entry
 
 
 def save_config(
@@ -164,25 +251,38 @@ def save_config(
         Path to the file that was written
     """
     check_namespace_value(namespace)
+    config_path = _save_target_path(namespace, target)
+    doc = _load_save_target(namespace, config_path, quiet)
+    _apply_config_updates(doc, updates)
+    _write_toml_atomic(config_path, doc)
+
+    logger.info(f"Config saved to {config_path}")
+    if not quiet:
+        print(f"Config saved → {config_path}")
+
+    return config_path
+
 
+def _save_target_path(namespace: str, target: Optional[str]) -> Path:
+    """Resolve the file save_config writes to: explicit target, else the local config."""
     if target:
-        config_path = Path(target).expanduser().resolve()
-    else:
-        _, config_path = home_and_local_config_path(namespace)
+        return Path(target).expanduser().resolve()
+    _, config_path = home_and_local_config_path(namespace)
+    return config_path
 
-    # Ensure parent directory exists
-    config_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # If file doesn't exist, start from bundled defaults
+def _load_save_target(namespace: str, config_path: Path, quiet: bool) -> tomlkit.TOMLDocument:
+    """Load the TOML document at config_path, starting from bundled defaults if it doesn't exist."""
     if not config_path.is_file():
         content = get_bundled_config(namespace)
-        doc = tomlkit.loads(content)
         if not quiet:
             print(f"Created new config file: {config_path}")
-    else:
-        doc = _load_toml_file(config_path)
+        return tomlkit.loads(content)
+    return _load_toml_file(config_path)
+
 
-    # Apply updates (supports nested dotted notation)
+def _apply_config_updates(doc: tomlkit.TOMLDocument, updates: dict) -> None:
+    """Apply updates (supports nested dotted notation) to a tomlkit document in place."""
     for key_path, value in updates.items():
         parts = key_path.split(".")
         current = doc
@@ -192,15 +292,140 @@ def save_config(
             current = current[part]
         current[parts[-1]] = value
 
-    # Write back with nice formatting
-    with config_path.open("w", encoding="utf-8") as f:
-        tomlkit.dump(doc, f)
 
-    logger.info(f"Config saved to {config_path}")
-    if not quiet:
-        print(f"Config saved → {config_path}")
+def _write_toml_atomic(config_path: Path, doc: tomlkit.TOMLDocument) -> None:
+    """
+    Write a TOML document via a temp file in the same directory + rename, so readers (and crashes)
+    never see a partially written config.
+    """
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{config_path.name}.", suffix=".tmp", dir=config_path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            tomlkit.dump(doc, f)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_name, stat.S_IMODE(config_path.stat().st_mode))
+        except FileNotFoundError:
+            os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, config_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    clear_config_cache()
 
-    return config_path
+
+class ConfigWriter:
+    """
+    Buffered config writer that coalesces bursts of updates (e.g. UI toggles) into one atomic write.
+
+    The parsed tomlkit document is kept in memory; update() applies changes to it immediately and
+    (re)starts a debounce timer. When the timer fires, or on flush(), the document is written once via
+    temp file + rename. If the file was changed by someone else since it was loaded, it is re-read and
+    the pending updates are re-applied before writing, so external edits are not clobbered.
+
+    Usage:
+        with ConfigWriter("vibedir", debounce=0.5) as writer:
+            writer.update({"auto_diff": True})
+            writer.update({"auto_diff": False, "llm.model": "grok-4"})
+        # exactly one write on exit
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        target: Optional[str] = None,
+        debounce: float = 0.5,
+        max_delay: float = 5.0,
+        quiet: bool = True,
+    ):
+        """
+        Args:
+            namespace: Usually "vibedir"
+            target: Optional explicit path; if None → local config
+            debounce: Seconds without updates before pending changes are written
+            max_delay: Upper bound on how long continuous updates can postpone a write
+            quiet: Suppress console output
+        """
+        check_namespace_value(namespace)
+        self.namespace = namespace
+        self.path = _save_target_path(namespace, target)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.quiet = quiet
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._pending: dict[str, Any] = {}
+        self._first_pending_at: Optional[float] = None
+        self._doc = _load_save_target(namespace, self.path, quiet=True)
+        self._signature = _file_signature([self.path])
+        self.writes = 0
+
+    @property
+    def document(self) -> tomlkit.TOMLDocument:
+        """The in-memory document, including updates not yet written."""
+        return self._doc
+
+    @property
+    def pending(self) -> bool:
+        """True if there are updates that have not been written yet."""
+        return bool(self._pending)
+
+    def update(self, updates: dict) -> None:
+        """Apply updates (dotted keys supported) in memory and schedule a coalesced write."""
+        with self._lock:
+            _apply_config_updates(self._doc, updates)
+            self._pending.update(updates)
+            now = time.monotonic()
+            if self._first_pending_at is None:
+                self._first_pending_at = now
+            delay = min(self.debounce, max(0.0, self._first_pending_at + self.max_delay - now))
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> Optional[Path]:
+        """
+        Write pending updates now.
+
+        Returns:
+            Path written, or None if there was nothing to write
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return None
+
+            if _file_signature([self.path]) != self._signature:
+                logger.debug(f"{self.path} changed on disk – reloading before applying pending updates")
+                self._doc = _load_save_target(self.namespace, self.path, quiet=True)
+                _apply_config_updates(self._doc, self._pending)
+
+            _write_toml_atomic(self.path, self._doc)
+            self._signature = _file_signature([self.path])
+            self._pending.clear()
+            self._first_pending_at = None
+            self.writes += 1
+
+        logger.info(f"Config saved to {self.path}")
+        if not self.quiet:
+            print(f"Config saved → {self.path}")
+        return self.path
+
+    def close(self) -> None:
+        """Flush pending updates and stop the debounce timer."""
+        self.flush()
+
+    def __enter__(self) -> "ConfigWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
 
 def init_config(
@@ -229,6 +454,7 @@ def init_config(
     content = get_bundled_config(namespace)
     default_path.parent.mkdir(parents=True, exist_ok=True)
     default_path.write_text(content, encoding="utf-8")
+    clear_config_cache()
 
     logger.info(f"Initialized config at {default_path}")
     if not quiet:
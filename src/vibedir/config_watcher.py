@@ -0,0 +1,339 @@
+# vibedir/config_watcher.py
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from importlib import resources
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+import tomlkit
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from .config import check_namespace_value, get_bundled_config, home_and_local_config_path
+
+if TYPE_CHECKING:
+    from .file_watcher import FileWatcherService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ConfigChange:
+    """A change to the merged config, published to ConfigWatcher subscribers."""
+
+    layer: str  # bundled | home | local | custom
+    changed_keys: frozenset  # Dotted key paths whose merged value changed (e.g. "status_icons.success")
+    config: dict  # Merged config after the change
+
+    def affects(self, key: str) -> bool:
+        """True if key, one of its children or one of its parents changed."""
+        return any(
+            changed == key or changed.startswith(f"{key}.") or key.startswith(f"{changed}.")
+            for changed in self.changed_keys
+        )
+
+
+@dataclass
+class _ConfigLayer:
+    name: str
+    path: Optional[Path]
+    data: dict
+    signature: Optional[tuple] = None
+
+
+def merge_config_layers(layers: Iterable[dict]) -> dict:
+    """
+    Merge config dicts, later layers taking precedence, with the same rules as load_config's Dynaconf merge:
+    tables are merged recursively, other values are replaced, and arrays (e.g. [[command]]) are
+    appended unless the later array is equal to the earlier one (then it is kept once). An array
+    containing "dynaconf_merge_unique" only gets the earlier items it does not already have.
+    """
+    merged: dict = {}
+    for layer in layers:
+        _merge_into(merged, layer)
+    return merged
+
+
+def _merge_into(target: dict, source: dict) -> None:
+    for key, value in source.items():
+        current = target.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            _merge_into(current, value)
+        elif isinstance(current, list) and isinstance(value, list):
+            target[key] = _merge_lists(current, value)
+        else:
+            target[key] = _copy_value(value)
+
+
+def _merge_lists(current: list, value: list) -> list:
+    """Dynaconf's list merge (dynaconf.utils.object_merge with list_merge="merge")."""
+    value = _copy_value(value)
+    if current == value:
+        return value
+    if "dynaconf_merge_unique" in value:
+        value.remove("dynaconf_merge_unique")
+        return [item for item in current if item not in value] + value
+    return current + value
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _copy_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_value(v) for v in value]
+    return value
+
+
+def diff_config_keys(old: dict, new: dict, prefix: str = "") -> set:
+    """Return the dotted key paths whose values differ between two config dicts."""
+    changed = set()
+    for key in old.keys() | new.keys():
+        path = f"{prefix}{key}"
+        before, after = old.get(key), new.get(key)
+        if isinstance(before, dict) and isinstance(after, dict):
+            changed |= diff_config_keys(before, after, f"{path}.")
+        elif key not in old or key not in new or before != after:
+            changed.add(path)
+    return changed
+
+
+def _signature(path: Optional[Path]) -> Optional[tuple]:
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ConfigWatcher:
+    """
+    Watch the config files that load_config merges and publish changed keys to subscribers.
+
+    Each layer (bundled, home, local, custom) is parsed separately and kept in memory, so a change
+    to one file only re-parses that file before re-merging. Home and local layers are watched even
+    if the file does not exist yet, so creating .vibedir/config.toml is picked up too.
+
+    Subscribers are called from the watchdog observer thread when started with start(), or from the
+    caller's thread when refresh()/reload_layer() are used directly (Textual apps should hop back
+    with App.call_from_thread).
+    """
+
+    def __init__(self, namespace: str = "vibedir", config_path: Optional[str] = None):
+        check_namespace_value(namespace)
+        self.namespace = namespace
+        self._lock = threading.RLock()
+        self._subscribers: list[tuple[Callable[[ConfigChange], None], Optional[tuple]]] = []
+        self._observer: Optional[Observer] = None
+        self._unwatch: list[Callable[[], None]] = []
+        self._watched: set[Path] = set()
+        self.layers: list[_ConfigLayer] = self._resolve_layers(config_path)
+        for layer in self.layers:
+            if layer.name != "bundled" or layer.path is not None:
+                layer.signature = _signature(layer.path)
+                layer.data = self._parse_layer(layer)
+        self._config = merge_config_layers(layer.data for layer in self.layers)
+
+    def _resolve_layers(self, config_path: Optional[str]) -> list[_ConfigLayer]:
+        """Resolve the same sources load_config uses, lowest precedence first."""
+        layers: list[_ConfigLayer] = []
+        if os.environ.get("VIBEDIR_SKIP_BUNDLED_CONFIG_LOAD", "false").lower() != "true":
+            bundled = resources.files(self.namespace) / "config.toml"
+            path = bundled if isinstance(bundled, Path) else None
+            data = tomlkit.loads(get_bundled_config(self.namespace)).unwrap() if path is None else {}
+            layers.append(_ConfigLayer("bundled", path, data))
+        if os.environ.get("VIBEDIR_SKIP_CONFIG_FILE_LOAD", "false").lower() != "true":
+            home_path, local_path = home_and_local_config_path(self.namespace)
+            layers.append(_ConfigLayer("home", home_path, {}))
+            layers.append(_ConfigLayer("local", local_path, {}))
+        if config_path:
+            cfg_path = Path(config_path).resolve()
+            if not cfg_path.is_file():
+                raise ValueError(f"Custom config path does not exist: {cfg_path}")
+            layers.append(_ConfigLayer("custom", cfg_path, {}))
+        return layers
+
+    @staticmethod
+    def _parse_layer(layer: _ConfigLayer) -> dict:
+        if layer.path is None or not layer.path.is_file():
+            return {}
+        try:
+            return tomlkit.loads(layer.path.read_text(encoding="utf-8")).unwrap()
+        except Exception as exc:
+            # Keep the last good data; a half-saved file should not wipe the config
+            logger.warning(f"Could not parse {layer.name} config {layer.path}: {exc}")
+            return layer.data
+
+    @property
+    def config(self) -> dict:
+        """The current merged config (do not mutate)."""
+        return self._config
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Look up a dotted key (e.g. "llm.model") in the merged config."""
+        value: Any = self._config
+        for part in key.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return default
+            value = value[part]
+        return value
+
+    def subscribe(
+        self, callback: Callable[[ConfigChange], None], keys: Optional[Iterable[str]] = None
+    ) -> Callable[[], None]:
+        """
+        Register a callback for config changes.
+
+        Args:
+            callback: Called with a ConfigChange after each change to the merged config.
+            keys: Optional dotted keys (e.g. ["status_icons", "command"]); only changes affecting them are published.
+
+        Returns:
+            A function that unsubscribes the callback.
+        """
+        entry = (callback, tuple(keys) if keys is not None else None)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def reload_layer(self, path: Path) -> Optional[ConfigChange]:
+        """
+        Re-parse the layer at path (if it changed on disk), re-merge and notify subscribers.
+
+        Returns:
+            The published ConfigChange, or None if nothing changed.
+        """
+        path = Path(path)
+        with self._lock:
+            layer = next((layer for layer in self.layers if layer.path == path), None)
+            if layer is None:
+                return None
+            signature = _signature(layer.path)
+            if signature == layer.signature:
+                return None
+            layer.signature = signature
+            layer.data = self._parse_layer(layer)
+
+            merged = merge_config_layers(layer.data for layer in self.layers)
+            changed = diff_config_keys(self._config, merged)
+            self._config = merged
+            if not changed:
+                return None
+            change = ConfigChange(layer=layer.name, changed_keys=frozenset(changed), config=merged)
+            subscribers = list(self._subscribers)
+
+        logger.info(f"Config {layer.name} layer changed ({path}): {sorted(changed)}")
+        for callback, keys in subscribers:
+            if keys is None or any(change.affects(key) for key in keys):
+                try:
+                    callback(change)
+                except Exception as exc:
+                    logger.error(f"Config change subscriber {callback!r} failed: {exc}")
+        return change
+
+    def refresh(self) -> list[ConfigChange]:
+        """Poll every layer and reload those whose mtime/size changed."""
+        changes = []
+        for layer in list(self.layers):
+            if layer.path is not None:
+                change = self.reload_layer(layer.path)
+                if change:
+                    changes.append(change)
+        return changes
+
+    def start(self, service: Optional["FileWatcherService"] = None) -> None:
+        """
+        Start watching the config files.
+
+        Args:
+            service: Shared FileWatcherService to watch through (debounced, one reload per save);
+                by default the config directories get their own watchdog observer.
+        """
+        if self._observer is not None or self._unwatch:
+            return
+        if service is not None:
+            for layer in self.layers:
+                if layer.path is not None:
+                    path = layer.path
+                    self._unwatch.append(service.watch(path, lambda change, path=path: self.reload_layer(path)))
+            return
+        observer = Observer()
+        observer.daemon = True
+        self._observer = observer
+        self._watch_directories()
+        observer.start()
+        logger.debug(f"Watching config directories: {sorted(str(d) for d in self._watched)}")
+
+    def _watch_directories(self) -> None:
+        """
+        Schedule the observer on each layer's directory. A directory that does not exist yet (e.g.
+        .vibedir in a fresh project) is watched through its nearest existing ancestor until it is created.
+        """
+        with self._lock:
+            observer = self._observer
+            if observer is None:
+                return
+            for layer in self.layers:
+                if layer.path is None:
+                    continue
+                directory = _nearest_existing(layer.path.parent)
+                if directory is None or directory in self._watched:
+                    continue
+                observer.schedule(_ConfigEventHandler(self), str(directory), recursive=False)
+                self._watched.add(directory)
+
+    def _directory_created(self, path: Path) -> None:
+        """A directory appeared; if it leads to a config layer, watch it and load any config already there."""
+        if not any(path == parent or path in parent.parents for parent in self._layer_directories()):
+            return
+        self._watch_directories()
+        self.refresh()  # The config file may have been written before the new watch was in place
+
+    def _layer_directories(self) -> set[Path]:
+        return {layer.path.parent for layer in self.layers if layer.path is not None}
+
+    def stop(self) -> None:
+        """Stop watching."""
+        for unwatch in self._unwatch:
+            unwatch()
+        self._unwatch.clear()
+        with self._lock:
+            observer, self._observer = self._observer, None
+            self._watched.clear()
+        if observer is None:
+            return
+        observer.stop()
+        observer.join()
+
+
+def _nearest_existing(directory: Path) -> Optional[Path]:
+    for candidate in (directory, *directory.parents):
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+class _ConfigEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: ConfigWatcher):
+        self.watcher = watcher
+        self.paths = {str(layer.path) for layer in watcher.layers if layer.path is not None}
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
+            if event.event_type in ("created", "moved"):
+                path = getattr(event, "dest_path", "") or event.src_path
+                self.watcher._directory_created(Path(os.fsdecode(path)))
+            return
+        # Editors often save via write-to-temp + rename, so also check the move destination
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and os.fsdecode(path) in self.paths:
+                self.watcher.reload_layer(Path(os.fsdecode(path)))
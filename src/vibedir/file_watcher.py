@@ -0,0 +1,260 @@
+# vibedir/file_watcher.py
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Literal, Optional, Set, Tuple, Union
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FileChange:
+    """One logical change to a watched file, however many filesystem events it took."""
+
+    path: Path
+    kind: Literal["created", "modified", "deleted"]
+    digest: Optional[str] = None  # SHA256 of the new content (None when deleted)
+
+
+@dataclass
+class _WatchedFile:
+    callbacks: List[Callable[[FileChange], None]] = field(default_factory=list)
+    signature: Optional[Tuple[int, int, int]] = None  # (inode, size, mtime_ns); None if missing
+    digest: Optional[str] = None
+
+
+def _stat_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _hash(path: Path) -> Optional[str]:
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class FileWatcherService:
+    """
+    Watch several files (prompt.md, applydir.json, config files, ...) and publish one FileChange per logical change.
+
+    Editors save with a burst of events (truncate, several writes, or write-to-temp plus rename),
+    and a raw watchdog handler would reload once per event. Here events only mark a file dirty;
+    a file is checked once no event has arrived for debounce seconds (or max_delay after the
+    first event, so a file written continuously is still picked up). The check compares
+    (inode, size, mtime) and then the content hash with what was last published, so a save that
+    changes nothing, or a touch, publishes nothing. One observer watches each parent directory
+    non-recursively, which also catches atomic-rename saves and files that do not exist yet; a
+    parent directory that does not exist yet is watched through its nearest existing ancestor
+    until it is created.
+
+    Callbacks run on the service's worker thread (Textual apps should use post_message or
+    App.call_from_thread).
+    """
+
+    def __init__(self, debounce: float = 0.2, max_delay: float = 2.0):
+        """
+        Args:
+            debounce: Quiet period in seconds that ends a burst of events
+            max_delay: Longest time in seconds a change waits while events keep arriving
+        """
+        self.debounce = debounce
+        self.max_delay = max(max_delay, debounce)
+        self._files: Dict[Path, _WatchedFile] = {}
+        self._pending: Dict[Path, Tuple[float, float]] = {}  # path -> (first event, last event) monotonic times
+        self._cond = threading.Condition()
+        self._observer: Optional[Observer] = None
+        self._directories: Set[Path] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @staticmethod
+    def _key(path: Union[str, Path]) -> Path:
+        return Path(os.path.abspath(os.fsdecode(path)))
+
+    def watch(self, path: Union[str, Path], callback: Callable[[FileChange], None]) -> Callable[[], None]:
+        """
+        Call callback with each FileChange of path (which need not exist yet).
+
+        Returns:
+            A function that removes the callback.
+        """
+        key = self._key(path)
+        with self._cond:
+            watched = self._files.get(key)
+            if watched is None:
+                watched = self._files[key] = _WatchedFile(signature=_stat_signature(key))
+                if watched.signature is not None:
+                    watched.digest = _hash(key)
+            watched.callbacks.append(callback)
+            if self._observer is not None:
+                self._schedule(key.parent)
+
+        def unwatch() -> None:
+            with self._cond:
+                current = self._files.get(key)
+                if current is not None and callback in current.callbacks:
+                    current.callbacks.remove(callback)
+                    if not current.callbacks:
+                        del self._files[key]
+                        self._pending.pop(key, None)
+
+        return unwatch
+
+    def notify(self, path: Union[str, Path]) -> None:
+        """Record a filesystem event for path; the check happens after the debounce window."""
+        key = self._key(path)
+        now = time.monotonic()
+        with self._cond:
+            if key not in self._files:
+                return
+            first, _ = self._pending.get(key, (now, now))
+            self._pending[key] = (first, now)
+            self._cond.notify()
+
+    def check(self, path: Union[str, Path]) -> Optional[FileChange]:
+        """
+        Compare path with its last published state now and publish a FileChange if it really changed.
+
+        Returns:
+            The published FileChange, or None.
+        """
+        key = self._key(path)
+        with self._cond:
+            watched = self._files.get(key)
+            if watched is None:
+                return None
+        signature = _stat_signature(key)
+        if signature == watched.signature:
+            return None
+        digest = _hash(key) if signature is not None else None  # Outside the lock: events keep queueing
+        with self._cond:
+            existed = watched.signature is not None
+            watched.signature = signature
+            if digest == watched.digest and (digest is not None or not existed):
+                return None  # Rewritten with the same content, or only touched
+            watched.digest = digest
+            if signature is None:
+                kind = "deleted"
+            else:
+                kind = "modified" if existed else "created"
+            change = FileChange(key, kind, digest)
+            callbacks = list(watched.callbacks)
+
+        logger.debug(f"Watched file {kind}: {key}")
+        for callback in callbacks:
+            try:
+                callback(change)
+            except Exception as exc:
+                logger.error(f"File change callback {callback!r} failed for {key}: {exc}")
+        return change
+
+    def _schedule(self, directory: Path) -> None:
+        directory = next((d for d in (directory, *directory.parents) if d.is_dir()), None)
+        if directory is None or directory in self._directories:
+            return
+        self._observer.schedule(_WatcherEventHandler(self), str(directory), recursive=False)
+        self._directories.add(directory)
+
+    def directory_created(self, path: Union[str, Path]) -> None:
+        """A directory appeared: watch it if watched files live in or below it, and check those files."""
+        created = self._key(path)
+        with self._cond:
+            if self._observer is None:
+                return
+            affected = [key for key in self._files if created == key.parent or created in key.parent.parents]
+            for key in affected:
+                self._schedule(key.parent)
+        for key in affected:
+            self.notify(key)  # A file may have been written before the new watch was in place
+
+    def start(self) -> None:
+        """Start the observer and the worker thread."""
+        with self._cond:
+            if self._observer is not None:
+                return
+            self._stopping = False
+            self._observer = Observer()
+            self._observer.daemon = True
+            for key in self._files:
+                self._schedule(key.parent)
+            self._observer.start()
+            self._thread = threading.Thread(target=self._run, name="vibedir-file-watcher", daemon=True)
+            self._thread.start()
+        logger.debug(f"Watching directories: {sorted(str(d) for d in self._directories)}")
+
+    def stop(self) -> None:
+        """Stop watching (pending changes are dropped)."""
+        with self._cond:
+            observer, thread = self._observer, self._thread
+            if observer is None:
+                return
+            self._stopping = True
+            self._observer = self._thread = None
+            self._directories.clear()
+            self._pending.clear()
+            self._cond.notify()
+        observer.stop()
+        observer.join()
+        thread.join()
+
+    def _due(self, now: float) -> Tuple[List[Path], Optional[float]]:
+        """Paths whose burst is over, and how long until the next one is."""
+        due, wait = [], None
+        for path, (first, last) in self._pending.items():
+            deadline = min(last + self.debounce, first + self.max_delay)
+            if deadline <= now:
+                due.append(path)
+            else:
+                wait = deadline - now if wait is None else min(wait, deadline - now)
+        return due, wait
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    due, wait = self._due(time.monotonic())
+                    if due:
+                        break
+                    self._cond.wait(wait)
+                if self._stopping:
+                    return
+                for path in due:
+                    del self._pending[path]
+            for path in due:
+                try:
+                    self.check(path)
+                except Exception as exc:
+                    logger.error(f"Checking watched file {path} failed: {exc}")
+
+
+class _WatcherEventHandler(FileSystemEventHandler):
+    def __init__(self, service: FileWatcherService):
+        self.service = service
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
+            if event.event_type in ("created", "moved"):
+                self.service.directory_created(getattr(event, "dest_path", "") or event.src_path)
+            return
+        # Atomic saves write a temp file and rename it over the target: the target is the move destination
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.service.notify(path)
@@ -0,0 +1,281 @@
+# vibedir/gitignore.py
+import logging
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Rule(NamedTuple):
+    regex: "re.Pattern[str]"
+    negated: bool
+    directory_only: bool
+
+
+def _translate_segment(segment: str) -> str:
+    """Regex for one path segment of a gitignore pattern ("*" and "?" do not match "/")."""
+    regex = ""
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        end = segment.find("]", i + 2) if char == "[" else -1
+        if char == "\\" and i + 1 < len(segment):
+            i += 1
+            regex += re.escape(segment[i])
+        elif char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif end != -1:
+            body = segment[i + 1 : end]
+            regex += "[" + ("^" + body[1:] if body.startswith("!") else body).replace("\\", "\\\\") + "]"
+            i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+def parse_pattern(line: str) -> Optional[_Rule]:
+    """Compile one line of a .gitignore file, or None for blank lines and comments."""
+    line = line.rstrip("\r\n")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "  # An escaped trailing space is kept
+    if not stripped or stripped.startswith("#"):
+        return None
+    negated = stripped.startswith("!")
+    if negated:
+        stripped = stripped[1:]
+    directory_only = stripped.endswith("/")
+    stripped = stripped.rstrip("/")
+    if not stripped:
+        return None
+    # A slash at the start or in the middle anchors the pattern to the .gitignore's directory
+    anchored = "/" in stripped
+    segments = stripped.lstrip("/").split("/")
+    regex = ""
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            regex += ".*" if last else "(?:.*/)?"
+        else:
+            regex += _translate_segment(segment) + ("" if last else "/")
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return _Rule(re.compile(regex + r"\Z", re.DOTALL), negated, directory_only)
+
+
+def _read_rules(path: Path) -> List[_Rule]:
+    try:
+        text = path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return []
+    return [rule for rule in map(parse_pattern, text.splitlines()) if rule is not None]
+
+
+def _config_value(paths: Iterable[Path], section: str, key: str) -> Optional[str]:
+    """Last value of section.key in git config files (plain "key = value" lines; includes are not followed)."""
+    value = None
+    for path in paths:
+        try:
+            lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            continue
+        current = ""
+        for line in lines:
+            header = re.match(r"\s*\[([^\]\s\"]+)", line)
+            if header:
+                current = header.group(1).lower()
+                continue
+            match = re.match(rf"\s*{key}\s*=\s*(.*?)\s*$", line, re.IGNORECASE)
+            if match and current == section:
+                value = match.group(1).strip('"')
+    return value
+
+
+def _varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Decode git's offset varint (index v4 path prefix lengths)."""
+    byte = data[pos]
+    value = byte & 0x7F
+    pos += 1
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def read_index_paths(path: Path, hash_size: int = 20) -> Set[str]:
+    """
+    Paths tracked in a git index file (versions 2 to 4).
+
+    Raises:
+        OSError: If the index cannot be read.
+        ValueError: If it is not a git index.
+    """
+    data = path.read_bytes()
+    if data[:4] != b"DIRC":
+        raise ValueError(f"{path} is not a git index")
+    version, count = struct.unpack(">II", data[4:12])
+    if version not in (2, 3, 4):
+        raise ValueError(f"Unsupported git index version {version} in {path}")
+    paths: Set[str] = set()
+    pos = 12
+    previous = b""
+    try:
+        for _ in range(count):
+            # ctime, mtime, dev, ino, mode, uid, gid, size (40 bytes), object id, then 16 bits of flags
+            (flags,) = struct.unpack(">H", data[pos + 40 + hash_size : pos + 42 + hash_size])
+            start = pos + 42 + hash_size + (2 if version >= 3 and flags & 0x4000 else 0)
+            if version == 4:
+                strip, start = _varint(data, start)
+                end = data.index(b"\0", start)
+                name = previous[: len(previous) - strip] + data[start:end]
+                pos = end + 1
+            else:
+                end = data.index(b"\0", start)
+                name = data[start:end]
+                pos += ((end - pos) // 8 + 1) * 8  # Entries are NUL-padded to a multiple of 8 bytes
+            previous = name
+            paths.add(os.fsdecode(name).rstrip("/"))
+    except (struct.error, IndexError) as exc:
+        raise ValueError(f"Truncated git index {path}") from exc
+    return paths
+
+
+class IgnoreRules:
+    """
+    Git's ignore rules for a directory in a work tree, matched in process (git is never run).
+
+    Rules come from core.excludesFile, .git/info/exclude and the .gitignore files from the work tree
+    root down, with git's precedence: the last matching pattern wins and deeper .gitignore files
+    override shallower ones. Nothing under an ignored directory can be re-included, and tracked
+    files (read from the index) are never ignored.
+
+    .gitignore files at or below the directory are read with load_directory(), which must be called
+    for a directory before paths under it are checked (ChangeTracker does it as it scans the tree).
+    """
+
+    def __init__(self, directory: Path, work_tree: Path, git_dir: Path):
+        """
+        Args:
+            directory: Directory whose paths are checked (paths passed in are relative to it)
+            work_tree: Root of the git work tree holding directory
+            git_dir: The work tree's git directory (.git, or what a .git file points to)
+        """
+        self.directory = Path(directory)
+        self.work_tree = Path(work_tree)
+        self.git_dir = Path(git_dir)
+        rel = self.directory.relative_to(self.work_tree).as_posix()
+        self._prefix = "" if rel == "." else f"{rel}/"
+
+        common = self.git_dir
+        if (self.git_dir / "commondir").is_file():
+            common = self.git_dir / (self.git_dir / "commondir").read_text(encoding="utf-8").strip()
+        xdg = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config") / "git"
+        configs = [xdg / "config", Path.home() / ".gitconfig", common / "config"]
+        excludes_file = _config_value(configs, "core", "excludesfile")
+        self._excludes = _read_rules(Path(excludes_file).expanduser() if excludes_file else xdg / "ignore")
+        self._excludes += _read_rules(common / "info" / "exclude")
+        object_format = _config_value([common / "config"], "extensions", "objectformat")
+        self._hash_size = 32 if (object_format or "").lower() == "sha256" else 20
+
+        self._rules: Dict[str, List[_Rule]] = {}  # By directory relative to the work tree ("" for the root)
+        parts = self._prefix.rstrip("/").split("/") if self._prefix else []
+        for i in range(len(parts)):
+            self._load("/".join(parts[:i]))
+        self._directories: Dict[str, bool] = {}  # Whether a directory (and so everything under it) is ignored
+        self._tracked: Set[str] = set()
+        self._tracked_directories: Set[str] = set()
+        self._index_signature: Optional[Tuple[int, int, int]] = None
+        self.refresh_tracked()
+
+    @classmethod
+    def find(cls, directory: Path) -> Optional["IgnoreRules"]:
+        """Rules for directory, or None if it is not in a git work tree."""
+        directory = Path(directory).resolve()
+        for work_tree in (directory, *directory.parents):
+            dot_git = work_tree / ".git"
+            if dot_git.is_dir():
+                return cls(directory, work_tree, dot_git)
+            if dot_git.is_file():
+                # Linked work trees and submodules: "gitdir: <path>"
+                text = dot_git.read_text(encoding="utf-8", errors="replace").strip()
+                if text.startswith("gitdir:"):
+                    return cls(directory, work_tree, (work_tree / text[len("gitdir:") :].strip()).resolve())
+        return None
+
+    def _load(self, directory: str) -> None:
+        rules = _read_rules(self.work_tree / directory / ".gitignore")
+        if rules:
+            self._rules[directory] = rules
+        else:
+            self._rules.pop(directory, None)
+
+    def load_directory(self, rel: str) -> None:
+        """(Re)read the .gitignore file of a directory (relative to directory, "" for itself)."""
+        self._load(f"{self._prefix}{rel}".rstrip("/"))
+
+    def refresh_tracked(self) -> Set[str]:
+        """Re-read the index if it changed. Returns the paths (relative to directory) tracked or untracked since."""
+        index = self.git_dir / "index"
+        try:
+            st = os.stat(index)
+            signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            signature = None
+        if signature == self._index_signature:
+            return set()
+        self._index_signature = signature
+        tracked: Set[str] = set()
+        if signature is not None:
+            try:
+                tracked = read_index_paths(index, self._hash_size)
+            except (OSError, ValueError) as exc:
+                logger.warning(f"Cannot read git index {index}; treating every file as untracked: {exc}")
+        changed = tracked ^ self._tracked
+        self._tracked = tracked
+        self._tracked_directories = {path.rsplit("/", i)[0] for path in tracked for i in range(1, path.count("/") + 1)}
+        self._directories.clear()
+        return {path[len(self._prefix) :] for path in changed if path.startswith(self._prefix)}
+
+    def _match(self, path: str, is_dir: bool) -> bool:
+        """Whether the rules ignore path itself (relative to the work tree), leaving its parents aside."""
+        ignored = False
+        for rule in self._excludes:
+            if (is_dir or not rule.directory_only) and rule.regex.match(path):
+                ignored = not rule.negated
+        parts = path.split("/")
+        for i in range(len(parts)):
+            rules = self._rules.get("/".join(parts[:i]))
+            if rules:
+                rel = "/".join(parts[i:])
+                for rule in rules:
+                    if (is_dir or not rule.directory_only) and rule.regex.match(rel):
+                        ignored = not rule.negated
+        return ignored
+
+    def _directory_ignored(self, path: str) -> bool:
+        ignored = self._directories.get(path)
+        if ignored is None:
+            parent = path.rpartition("/")[0]
+            ignored = (bool(parent) and self._directory_ignored(parent)) or self._match(path, True)
+            self._directories[path] = ignored
+        return ignored
+
+    def ignored(self, rel: str, is_dir: bool = False) -> bool:
+        """
+        Whether git ignores a path (relative to directory) as untracked.
+
+        A directory holding tracked files is not ignored (so it is still scanned), though untracked
+        files in it may be.
+        """
+        path = f"{self._prefix}{rel}"
+        if path in self._tracked or (is_dir and path in self._tracked_directories):
+            return False
+        parent = path.rpartition("/")[0]
+        return (bool(parent) and self._directory_ignored(parent)) or self._match(path, is_dir)
@@ -0,0 +1,237 @@
+# vibedir/history_gc.py
+import json
+import logging
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .models.history import HistoryManifest
+from .models.settings import HistoryConfig
+from .object_store import ObjectStore
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = ".gc_index.json"
+
+
+@dataclass
+class _EntryInfo:
+    own_bytes: int  # Files not backed by the object store (e.g. command output copies, the manifest)
+    blobs: List[str]
+
+
+@dataclass
+class HistoryGCResult:
+    """What one garbage collection pass did."""
+
+    entries_removed: int = 0
+    blobs_removed: int = 0
+    bytes_freed: int = 0
+    entries_kept: int = 0
+    total_bytes: int = 0  # Size of history plus referenced blobs after the pass
+    completed: bool = True  # False if stopped early
+
+
+class HistoryGC:
+    """
+    Enforce [history] retention_messages and max_total_size_mb over .vibedir/history/ and .vibedir/objects/.
+
+    Entries are evicted oldest first (their names start with an ISO timestamp). A blob is deleted
+    only when no remaining entry's manifest references it, and blobs referenced by no entry at all
+    are removed too. History entries never change once written, so each entry is scanned once and
+    its size and blob list are kept in an index file; later passes only scan new entries. A limit
+    of 0 disables that limit.
+    """
+
+    def __init__(
+        self,
+        history_dir: Path,
+        store: ObjectStore,
+        retention_messages: int = 50,
+        max_total_size_mb: float = 500,
+    ):
+        self.history_dir = Path(history_dir)
+        self.store = store
+        self.retention_messages = retention_messages
+        self.max_total_bytes = int(max_total_size_mb * 1024 * 1024)
+        self.index_path = self.history_dir / INDEX_NAME
+        self._entries: Dict[str, _EntryInfo] = {}
+        self._blob_sizes: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_result: Optional[HistoryGCResult] = None
+        self._load_index()
+
+    @classmethod
+    def from_config(cls, vibedir_dir: Path, config: HistoryConfig) -> "HistoryGC":
+        vibedir_dir = Path(vibedir_dir)
+        return cls(
+            vibedir_dir / "history",
+            ObjectStore(vibedir_dir / "objects"),
+            config.retention_messages,
+            config.max_total_size_mb,
+        )
+
+    def _load_index(self) -> None:
+        if not self.index_path.is_file():
+            return
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            self._entries = {name: _EntryInfo(info["own_bytes"], info["blobs"]) for name, info in data["entries"].items()}
+            self._blob_sizes = dict(data["blob_sizes"])
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning(f"Ignoring unreadable history GC index {self.index_path}: {exc}")
+            self._entries, self._blob_sizes = {}, {}
+
+    def _save_index(self) -> None:
+        if not self.history_dir.is_dir():
+            return
+        data = {
+            "entries": {name: {"own_bytes": info.own_bytes, "blobs": info.blobs} for name, info in self._entries.items()},
+            "blob_sizes": self._blob_sizes,
+        }
+        tmp = self.index_path.with_name(f"{INDEX_NAME}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def _entry_names(self) -> List[str]:
+        """History entry directory names, oldest first (no stat calls)."""
+        if not self.history_dir.is_dir():
+            return []
+        with os.scandir(self.history_dir) as it:
+            return sorted(e.name for e in it if not e.name.startswith(".") and e.is_dir(follow_symlinks=False))
+
+    def _scan_entry(self, name: str) -> _EntryInfo:
+        entry_dir = self.history_dir / name
+        try:
+            manifest = HistoryManifest.load(entry_dir, lazy=True)  # Only hashes and names are needed
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Unreadable manifest in history entry {entry_dir}: {exc}")
+            manifest = HistoryManifest()
+        linked = {a.path.name for a in manifest.attachments if a.hash}
+        own_bytes = 0
+        for root, _, files in os.walk(entry_dir):
+            for file in files:
+                if root == str(entry_dir) and file in linked:
+                    continue  # Counted once, as its blob
+                try:
+                    own_bytes += os.lstat(os.path.join(root, file)).st_size
+                except OSError:
+                    pass
+        return _EntryInfo(own_bytes, sorted(manifest.hashes))
+
+    def _blob_size(self, digest: str) -> int:
+        size = self._blob_sizes.get(digest)
+        if size is None:
+            try:
+                size = self.store.size(digest)
+            except OSError:
+                size = 0
+            self._blob_sizes[digest] = size
+        return size
+
+    def collect(self) -> HistoryGCResult:
+        """Run one pass synchronously (the background thread calls this). Can be interrupted with stop()."""
+        result = HistoryGCResult()
+        names = self._entry_names()
+        for name in set(self._entries) - set(names):
+            del self._entries[name]  # Removed outside the GC
+        for i, name in enumerate(names):
+            if self._stop.is_set():
+                self._save_index()
+                result.completed = False
+                return result
+            if name not in self._entries:
+                self._entries[name] = self._scan_entry(name)
+                if i % 100 == 99:
+                    self._save_index()  # Keep progress if vibedir exits mid-scan
+
+        refcounts: Dict[str, int] = {}
+        for name in names:
+            for digest in self._entries[name].blobs:
+                refcounts[digest] = refcounts.get(digest, 0) + 1
+        total = sum(self._entries[name].own_bytes for name in names)
+        total += sum(self._blob_size(digest) for digest in refcounts)
+
+        kept = list(names)
+        while kept and (
+            (self.retention_messages and len(kept) > self.retention_messages)
+            or (self.max_total_bytes and total > self.max_total_bytes)
+        ):
+            if self._stop.is_set():
+                result.completed = False
+                break
+            name = kept.pop(0)
+            info = self._entries.pop(name)
+            shutil.rmtree(self.history_dir / name, ignore_errors=True)
+            freed = info.own_bytes
+            result.entries_removed += 1
+            for digest in info.blobs:
+                refcounts[digest] -= 1
+                if refcounts[digest] == 0:
+                    del refcounts[digest]
+                    freed += self._blob_size(digest)
+            total -= freed
+            result.bytes_freed += freed
+
+        result.blobs_removed += self._delete_unreferenced(set(refcounts))
+        self._save_index()
+        result.entries_kept = len(kept)
+        result.total_bytes = total
+        self.last_result = result
+        if result.entries_removed or result.blobs_removed:
+            logger.info(
+                f"History GC removed {result.entries_removed} entries and {result.blobs_removed} blobs "
+                f"({result.bytes_freed / 1024 / 1024:.1f} MB); {result.entries_kept} entries remain"
+            )
+        return result
+
+    def _delete_unreferenced(self, referenced: set) -> int:
+        removed = 0
+        with self.store.lock:
+            # Entries written since the scan started may reference blobs too
+            for name in self._entry_names():
+                if name not in self._entries:
+                    try:
+                        referenced |= HistoryManifest.load(self.history_dir / name).hashes
+                    except (OSError, ValueError):
+                        return removed  # Cannot tell what it references; keep every blob this pass
+            for digest in list(self.store.digests()):
+                if digest not in referenced:
+                    self.store.delete(digest)
+                    self._blob_sizes.pop(digest, None)
+                    removed += 1
+        return removed
+
+    def start(self) -> threading.Thread:
+        """Run collect() in a background daemon thread and return it (startup is never blocked)."""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vibedir-history-gc", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _run(self) -> None:
+        try:
+            self.collect()
+        except Exception as exc:
+            logger.error(f"History GC failed: {exc}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask a running pass to stop at the next entry and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def start_history_gc(vibedir_dir: Path, config: HistoryConfig) -> Optional[HistoryGC]:
+    """Start a background history GC pass if [history] auto_cleanup_on_startup is set."""
+    if not config.auto_cleanup_on_startup:
+        return None
+    gc = HistoryGC.from_config(vibedir_dir, config)
+    gc.start()
+    return gc
@@ -0,0 +1,196 @@
+# vibedir/impact.py
+import json
+import logging
+import shlex
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Changes to these can affect any test, so they always trigger a full run
+FULL_RUN_FILES = frozenset(
+    {"conftest.py", "pyproject.toml", "setup.cfg", "setup.py", "pytest.ini", "tox.ini", "requirements.txt"}
+)
+
+
+@dataclass(frozen=True)
+class RunPlan:
+    """Which tests a Tests command should run for a change set."""
+
+    full: bool
+    tests: Tuple[str, ...] = ()  # pytest node ids or test files (empty and not full: nothing affected)
+    reason: str = ""
+
+    @property
+    def empty(self) -> bool:
+        return not self.full and not self.tests
+
+
+def read_coverage_contexts(coverage_file: Path, base_directory: Path) -> Dict[str, Set[str]]:
+    """
+    Read a coverage data file recorded with per-test contexts (pytest --cov-context=test).
+
+    Returns:
+        Test node ids by measured file (posix path relative to base_directory)
+
+    Raises:
+        ImportError: If coverage is not installed.
+    """
+    try:
+        from coverage import CoverageData
+    except ImportError as exc:
+        raise ImportError("Test impact selection needs coverage data: pip install coverage pytest-cov") from exc
+
+    data = CoverageData(basename=str(coverage_file))
+    data.read()
+    base = base_directory.resolve()
+    tests_by_file: Dict[str, Set[str]] = {}
+    for measured in data.measured_files():
+        try:
+            relative = Path(measured).resolve().relative_to(base).as_posix()
+        except ValueError:
+            continue  # Outside the code base (e.g. site-packages)
+        tests = tests_by_file.setdefault(relative, set())
+        for contexts in (data.contexts_by_lineno(measured) or {}).values():
+            for context in contexts:
+                test = context.split("|", 1)[0]  # Drop the |setup / |run / |teardown phase
+                if test:
+                    tests.add(test)
+    return tests_by_file
+
+
+class ImpactSelector:
+    """
+    Pick the tests affected by a change set from a file-to-test map built from coverage contexts.
+
+    The map is rebuilt from a full run and patched after selective runs (only the tests that ran
+    are replaced). Selection falls back to a full run when there is no map yet, when a file that can
+    affect any test changed (conftest.py, pyproject.toml, ...), when a changed file is not in the map
+    (data and fixture files, config files, new modules, helpers under the tests directory with
+    unknown users), and every full_run_every selective runs so the map does not drift.
+    """
+
+    def __init__(
+        self,
+        base_directory: Path,
+        tests_directory: Path,
+        map_path: Path,
+        coverage_file: Path = Path(".coverage"),
+        full_run_every: int = 20,
+    ):
+        """
+        Args:
+            base_directory: Code base root (pytest node ids and map keys are relative to it)
+            tests_directory: Directory holding the tests
+            map_path: JSON file the file-to-test map is kept in (e.g. .vibedir/test_impact.json)
+            coverage_file: Coverage data file written by the Tests command, relative to base_directory
+            full_run_every: Force a full run after this many selective runs (0: never)
+        """
+        self.base_directory = Path(base_directory)
+        self.tests_directory = Path(tests_directory)
+        self.map_path = Path(map_path)
+        self.coverage_file = self.base_directory / coverage_file
+        self.full_run_every = full_run_every
+        self.tests_by_file: Optional[Dict[str, Set[str]]] = None
+        self.runs_since_full = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.map_path.is_file():
+            return
+        try:
+            data = json.loads(self.map_path.read_text(encoding="utf-8"))
+            self.tests_by_file = {file: set(tests) for file, tests in data["tests_by_file"].items()}
+            self.runs_since_full = int(data.get("runs_since_full", 0))
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning(f"Ignoring unreadable test impact map {self.map_path}: {exc}")
+
+    def save(self) -> None:
+        if self.tests_by_file is None:
+            return
+        self.map_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "runs_since_full": self.runs_since_full,
+            "tests_by_file": {file: sorted(tests) for file, tests in sorted(self.tests_by_file.items())},
+        }
+        self.map_path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+
+    def _relative(self, path: Path) -> str:
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.base_directory / path
+        try:
+            return path.resolve().relative_to(self.base_directory.resolve()).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def _is_test_file(self, relative: str) -> bool:
+        name = relative.rsplit("/", 1)[-1]
+        tests_dir = self._relative(self.tests_directory)
+        if not relative.startswith(f"{tests_dir}/") or not name.endswith(".py"):
+            return False  # Fixtures and data files (tests/test_data.json) are not test modules
+        return name.startswith("test_") or name.endswith("_test.py")
+
+    def plan(self, changed_files: Optional[Iterable[Path]] = None, force_full: bool = False) -> RunPlan:
+        """
+        Decide which tests to run.
+
+        Args:
+            changed_files: Files changed since the last run (None: unknown, run everything)
+            force_full: Request a full run (e.g. a manual run from the menu)
+        """
+        if force_full or changed_files is None:
+            return RunPlan(full=True, reason="full run requested")
+        if self.tests_by_file is None:
+            return RunPlan(full=True, reason="no test impact map yet")
+        if self.full_run_every and self.runs_since_full >= self.full_run_every:
+            return RunPlan(full=True, reason=f"{self.runs_since_full} selective runs since the last full run")
+
+        tests_dir = self._relative(self.tests_directory)
+        selected: Set[str] = set()
+        whole_files: Set[str] = set()
+        for path in changed_files:
+            relative = self._relative(path)
+            name = relative.rsplit("/", 1)[-1]
+            if name in FULL_RUN_FILES:
+                return RunPlan(full=True, reason=f"{relative} can affect any test")
+            if self._is_test_file(relative):
+                whole_files.add(relative)
+            elif relative.endswith(".py") and relative in self.tests_by_file:
+                selected |= self.tests_by_file[relative]
+            elif relative.startswith(f"{tests_dir}/") and relative.endswith(".py"):
+                return RunPlan(full=True, reason=f"test helper {relative} has unknown users")
+            else:
+                # Coverage only maps executed Python; data files, config and new modules can affect any test
+                return RunPlan(full=True, reason=f"{relative} is not in the test impact map")
+
+        # Changed test files run whole, so renamed or new tests in them are picked up
+        selected = {test for test in selected if test.split("::", 1)[0] not in whole_files} | whole_files
+        existing = tuple(sorted(t for t in selected if (self.base_directory / t.split("::", 1)[0]).is_file()))
+        return RunPlan(full=False, tests=existing, reason=f"{len(existing)} test(s) affected")
+
+    def variables(self, plan: RunPlan) -> Dict[str, str]:
+        """Template variables for a plan: {{ selected_tests }} is the test ids, or the tests directory for a full run."""
+        if plan.full:
+            return {"selected_tests": str(self.tests_directory)}
+        return {"selected_tests": " ".join(shlex.quote(test) for test in plan.tests)}
+
+    def record_run(self, plan: RunPlan) -> None:
+        """Update the map from the coverage file written by a run of plan (no-op if there is none)."""
+        if not self.coverage_file.is_file():
+            logger.warning(f"No coverage data at {self.coverage_file}; test impact map not updated")
+            return
+        fresh = read_coverage_contexts(self.coverage_file, self.base_directory)
+        if plan.full or self.tests_by_file is None:
+            self.tests_by_file = fresh
+            self.runs_since_full = 0 if plan.full else self.runs_since_full + 1
+        else:
+            ran = set().union(*fresh.values()) if fresh else set()
+            for tests in self.tests_by_file.values():
+                tests -= ran
+            for file, tests in fresh.items():
+                self.tests_by_file.setdefault(file, set()).update(tests)
+            self.runs_since_full += 1
+        self.save()
+        logger.info(f"Test impact map updated from {'full' if plan.full else 'selective'} run ({plan.reason})")
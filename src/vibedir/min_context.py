@@ -4,27 +4,84 @@ min_context.py
 A library to calculate the minimum number of consecutive lines needed for all sets of lines to be unique in a file.
 """
 
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import time
+from array import array
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence, Union
 
-def calculate_min_context(file_content: list[str], starting_k: int = 1) -> int:
+logger = logging.getLogger(__name__)
+
+# Modulus and base for the polynomial rolling hash (Mersenne prime keeps the arithmetic cheap in Python ints).
+_HASH_MOD = (1 << 61) - 1
+_HASH_BASE = 1_000_003
+
+
+def _intern_lines(file_content: Sequence[str]) -> list[int]:
     """
-    Calculate the minimum k such that all consecutive k-line windows in the file_content are unique.
+    Map each line to a small integer ID so equal lines share the same ID.
 
-    :param file_content: List of strings representing the lines of the file.
-    :return: The minimum k where no duplicate consecutive k-lines exist.
-    :raises ValueError: If the file is empty or uniqueness cannot be achieved (though unlikely).
+    :param file_content: Lines of the file.
+    :return: List of line IDs, one per input line.
     """
-    n = len(file_content)
-    if n == 0:
-        raise ValueError("File content is empty.")
-    elif n < starting_k:
-        raise ValueError(f"File content has fewer than {starting_k=} lines.")
+    ids: dict[str, int] = {}
+    return [ids.setdefault(line, len(ids)) for line in file_content]
+
+
+def _has_duplicate_window(line_ids: Sequence[int], k: int) -> bool:
+    """
+    Check whether any k-line window occurs more than once, using a rolling hash with collision verification.
+
+    :param line_ids: Interned line IDs.
+    :param k: Window size.
+    :return: True if two distinct positions start identical k-line windows.
+    """
+    n = len(line_ids)
+    if k > n:
+        return False
+
+    high = pow(_HASH_BASE, k - 1, _HASH_MOD)
+    h = 0
+    for i in range(k):
+        h = (h * _HASH_BASE + line_ids[i] + 1) % _HASH_MOD
+
+    seen: dict[int, int] = {}
+    collisions: dict[int, list[int]] = {}
+    for i in range(n - k + 1):
+        if i:
+            h = ((h - (line_ids[i - 1] + 1) * high) * _HASH_BASE + line_ids[i + k - 1] + 1) % _HASH_MOD
+        first = seen.setdefault(h, i)
+        if first == i:
+            continue
+        window = line_ids[i : i + k]
+        if line_ids[first : first + k] == window:
+            return True
+        # Hash collision between different windows (rare): keep every distinct start for this hash
+        others = collisions.setdefault(h, [])
+        for j in others:
+            if line_ids[j : j + k] == window:
+                return True
+        others.append(i)
+    return False
 
+
+def _min_context_naive(line_ids: Sequence[int], starting_k: int) -> int:
+    """Try every k from starting_k upward, building a set of k-line tuples for each."""
+    n = len(line_ids)
     k = starting_k
     while k <= n:
         windows = set()
         duplicate_found = False
         for i in range(n - k + 1):
-            window = tuple(file_content[i : i + k])
+            window = tuple(line_ids[i : i + k])
             if window in windows:
                 duplicate_found = True
                 break
@@ -37,6 +94,516 @@ def calculate_min_context(file_content: list[str], starting_k: int = 1) -> int:
     raise ValueError("Unable to find a unique context size.")
 
 
+def _min_context_rolling_hash(line_ids: Sequence[int], starting_k: int) -> int:
+    """
+    Exponential then binary search over k using rolling hashes of interned lines.
+
+    Uniqueness is monotonic in k (if all k-windows are unique, so are all (k+1)-windows),
+    so O(log k) O(n) passes find the same k as the naive search.
+    """
+    n = len(line_ids)
+    lo = max(starting_k, 1)
+    if not _has_duplicate_window(line_ids, lo):
+        return lo
+    # Gallop upward to bracket the answer; a single window of n lines is always unique
+    hi = min(lo * 2, n)
+    while _has_duplicate_window(line_ids, hi):
+        lo, hi = hi, min(hi * 2, n)
+    # Invariant: lo has a duplicate, hi does not
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if _has_duplicate_window(line_ids, mid):
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def _suffix_array(seq: Sequence[int]) -> list[int]:
+    """
+    Build the suffix array of an integer sequence by prefix doubling.
+
+    :param seq: Sequence of non-negative integers (e.g. interned line IDs).
+    :return: Start positions of all suffixes in lexicographic order.
+    """
+    n = len(seq)
+    sa = list(range(n))
+    rank = list(seq)
+    tmp = [0] * n
+    k = 1
+    while True:
+        keys = [(rank[i], rank[i + k] if i + k < n else -1) for i in range(n)]
+        sa.sort(key=keys.__getitem__)
+        tmp[sa[0]] = 0
+        for j in range(1, n):
+            tmp[sa[j]] = tmp[sa[j - 1]] + (keys[sa[j - 1]] != keys[sa[j]])
+        rank, tmp = tmp, rank
+        if rank[sa[-1]] == n - 1 or k >= n:
+            return sa
+        k <<= 1
+
+
+def _lcp_array(seq: Sequence[int], sa: Sequence[int]) -> list[int]:
+    """
+    Build the LCP array with Kasai's algorithm.
+
+    :param seq: The sequence the suffix array was built from.
+    :param sa: Suffix array of seq.
+    :return: lcp[i] is the longest common prefix of suffixes sa[i - 1] and sa[i] (lcp[0] is 0).
+    """
+    n = len(seq)
+    rank = [0] * n
+    for i, start in enumerate(sa):
+        rank[start] = i
+    lcp = [0] * n
+    h = 0
+    for i in range(n):
+        if rank[i] == 0:
+            h = 0
+            continue
+        j = sa[rank[i] - 1]
+        while i + h < n and j + h < n and seq[i + h] == seq[j + h]:
+            h += 1
+        lcp[rank[i]] = h
+        if h:
+            h -= 1
+    return lcp
+
+
+def _min_context_suffix_array(line_ids: Sequence[int], starting_k: int) -> int:
+    """
+    Read k directly off the LCP array: one plus the longest run of lines that occurs more than once.
+
+    No iteration over k is needed; cost is that of building the suffix array (O(n log^2 n)).
+    """
+    longest_repeat = max(_lcp_array(line_ids, _suffix_array(line_ids)))
+    return max(starting_k, 1, longest_repeat + 1)
+
+
+# Engines take interned line IDs, so they also work on line sources that never build strings
+_ENGINES: dict[str, Callable[[Sequence[int], int], int]] = {
+    "naive": _min_context_naive,
+    "rolling_hash": _min_context_rolling_hash,
+    "suffix_array": _min_context_suffix_array,
+}
+
+
+def _check_engine(engine: str) -> None:
+    if engine not in _ENGINES:
+        raise ValueError(f"Unknown min context engine '{engine}'. Must be one of {sorted(_ENGINES)}")
+
+
+def calculate_min_context(file_content: list[str], starting_k: int = 1, engine: str = "naive") -> int:
+    """
+    Calculate the minimum k such that all consecutive k-line windows in the file_content are unique.
+
+    :param file_content: List of strings representing the lines of the file.
+    :param starting_k: Smallest window size to consider.
+    :param engine: Algorithm to use: "naive" (set of k-line tuples per k),
+        "rolling_hash" (interned lines, rolling hashes and binary search over k; O(n log n)) or
+        "suffix_array" (longest repeated run read off a suffix/LCP array; no iteration over k).
+        All engines return the same k.
+    :return: The minimum k where no duplicate consecutive k-lines exist.
+    :raises ValueError: If the file is empty, the engine is unknown or uniqueness cannot be achieved (though unlikely).
+    """
+    _check_engine(engine)
+
+    n = len(file_content)
+    if n == 0:
+        raise ValueError("File content is empty.")
+    elif n < starting_k:
+        raise ValueError(f"File content has fewer than {starting_k=} lines.")
+
+    return _ENGINES[engine](_intern_lines(file_content), starting_k)
+
+
+def _intern_buffer(buffer: Union[bytes, bytearray, mmap.mmap]) -> array:
+    """
+    Intern the lines of a bytes-like buffer without building a Python string per line.
+
+    Lines are split on b"\\n" (a trailing b"\\r" is dropped, and a final newline does not start an
+    empty line). Each line span is hashed in place through a memoryview, so the intern table holds
+    one fixed-size digest per distinct line and the per-line cost is one 4-byte ID.
+
+    :param buffer: File contents (bytes, bytearray or an mmap).
+    :return: Array of line IDs, one per line.
+    """
+    ids = array("I")
+    table: dict[bytes, int] = {}
+    size = len(buffer)
+    find = buffer.find
+    pos = 0
+    with memoryview(buffer) as view:
+        while pos < size:
+            end = find(b"\n", pos)
+            nxt = end + 1
+            if end == -1:
+                end = nxt = size
+            stop = end - 1 if end > pos and buffer[end - 1] == 0x0D else end
+            digest = hashlib.blake2b(view[pos:stop], digest_size=16).digest()
+            ids.append(table.setdefault(digest, len(table)))
+            pos = nxt
+    return ids
+
+
+def calculate_min_context_from_buffer(
+    source: Union[str, Path, bytes, bytearray, mmap.mmap],
+    starting_k: int = 1,
+    engine: str = "rolling_hash",
+) -> int:
+    """
+    Calculate the min context of a file given by path or bytes buffer, without a list[str] of its lines.
+
+    Paths are memory-mapped and line spans are hashed in place (see _intern_buffer), so line text is
+    never materialised: memory for the line contents is bounded by the number of distinct lines, plus
+    a 4-byte ID per line and the engine's working set.
+
+    :param source: Path to a file, or its contents as bytes/bytearray/mmap.
+    :param starting_k: Smallest window size to consider.
+    :param engine: Engine as in calculate_min_context.
+    :return: The minimum k where no duplicate consecutive k-lines exist.
+    :raises ValueError: If the file is empty, too short or the engine is unknown.
+    """
+    _check_engine(engine)
+
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("File content is empty.")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                line_ids = _intern_buffer(mapped)
+    else:
+        line_ids = _intern_buffer(source)
+
+    n = len(line_ids)
+    if n == 0:
+        raise ValueError("File content is empty.")
+    elif n < starting_k:
+        raise ValueError(f"File content has fewer than {starting_k=} lines.")
+
+    return _ENGINES[engine](line_ids, starting_k)
+
+
+def calculate_min_context_per_line(file_content: list[str]) -> list[Optional[int]]:
+    """
+    Calculate, for each line, the minimum context needed to anchor an edit there.
+
+    Entry i is the smallest k such that the k-line window starting at line i occurs exactly once
+    in the file, or None if every window starting at line i is repeated elsewhere (the tail of the
+    file from line i also appears earlier). Unlike calculate_min_context, this lets a change anchor
+    use the smallest unique context for its own position instead of one file-wide k.
+
+    :param file_content: List of strings representing the lines of the file.
+    :return: List with one entry per line.
+    :raises ValueError: If the file is empty.
+    """
+    n = len(file_content)
+    if n == 0:
+        raise ValueError("File content is empty.")
+
+    line_ids = _intern_lines(file_content)
+    sa = _suffix_array(line_ids)
+    lcp = _lcp_array(line_ids, sa)
+
+    result: list[Optional[int]] = [None] * n
+    for r, start in enumerate(sa):
+        # The longest prefix shared with any other suffix is shared with a neighbour in suffix order
+        shared = max(lcp[r], lcp[r + 1] if r + 1 < n else 0)
+        if shared < n - start:
+            result[start] = shared + 1
+    return result
+
+
+class MinContextIndex:
+    """
+    Persistent min-context index for one file that is kept up to date as lines are edited.
+
+    The index tracks counts of all k-line windows for the current answer k and for k - 1.
+    An edit only touches the windows overlapping the edited range, so insert/delete/replace
+    cost O((k + edit size) * k) while k stays the same. The answer only has to be recomputed
+    from scratch when an edit creates a duplicate k-window (k grows) or removes the last
+    duplicate (k - 1)-window (k shrinks).
+    """
+
+    def __init__(self, file_content: list[str], starting_k: int = 1):
+        """
+        :param file_content: List of strings representing the lines of the file.
+        :param starting_k: Smallest window size to consider (as in calculate_min_context).
+        """
+        self.starting_k = starting_k
+        self._line_ids: dict[str, int] = {}
+        self._ids: list[int] = [self._intern(line) for line in file_content]
+        self._lines: list[str] = list(file_content)
+        self._k: Optional[int] = None
+        self._windows: dict[int, Counter] = {}
+        self._duplicates: dict[int, int] = {}
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    @property
+    def lines(self) -> list[str]:
+        """Current lines of the file (a copy)."""
+        return list(self._lines)
+
+    @property
+    def k(self) -> int:
+        """
+        The minimum k such that all consecutive k-line windows are unique.
+
+        :raises ValueError: If the file is empty or has fewer than starting_k lines.
+        """
+        if self._k is None:
+            if not self._lines:
+                raise ValueError("File content is empty.")
+            raise ValueError(f"File content has fewer than starting_k={self.starting_k} lines.")
+        return self._k
+
+    def insert(self, index: int, lines: list[str]) -> Optional[int]:
+        """Insert lines before line index. Returns the new k (None if undefined)."""
+        return self.replace(index, index, lines)
+
+    def delete(self, start: int, end: int) -> Optional[int]:
+        """Delete lines [start, end). Returns the new k (None if undefined)."""
+        return self.replace(start, end, [])
+
+    def replace(self, start: int, end: int, lines: list[str]) -> Optional[int]:
+        """
+        Replace lines [start, end) with the given lines.
+
+        :param start: First line to replace (0-based).
+        :param end: One past the last line to replace; start == end inserts.
+        :param lines: Replacement lines.
+        :return: The new k, or None if the file is now empty or shorter than starting_k.
+        :raises IndexError: If the range is outside the file.
+        """
+        n = len(self._ids)
+        if not 0 <= start <= end <= n:
+            raise IndexError(f"Invalid line range [{start}, {end}) for file with {n} lines")
+
+        new_ids = [self._intern(line) for line in lines]
+        for size in self._windows:
+            # Windows starting in [start - size + 1, end - 1] overlap (or straddle) the edited range
+            self._update_windows(size, max(0, start - size + 1), min(end - 1, n - size), -1)
+
+        self._ids[start:end] = new_ids
+        self._lines[start:end] = lines
+
+        n = len(self._ids)
+        for size in self._windows:
+            self._update_windows(size, max(0, start - size + 1), min(start + len(new_ids) - 1, n - size), 1)
+
+        if self._needs_rebuild():
+            self._rebuild()
+        return self._k
+
+    def _intern(self, line: str) -> int:
+        return self._line_ids.setdefault(line, len(self._line_ids))
+
+    def _update_windows(self, size: int, first: int, last: int, delta: int) -> None:
+        """Add (delta=1) or remove (delta=-1) the size-line windows starting at first..last."""
+        counts = self._windows[size]
+        ids = self._ids
+        for i in range(first, last + 1):
+            key = tuple(ids[i : i + size])
+            before = counts[key]
+            after = before + delta
+            if after:
+                counts[key] = after
+            else:
+                del counts[key]
+            if before < 2 <= after:
+                self._duplicates[size] += 1
+            elif after < 2 <= before:
+                self._duplicates[size] -= 1
+
+    def _needs_rebuild(self) -> bool:
+        n = len(self._ids)
+        if self._k is None:
+            return n >= max(self.starting_k, 1)
+        if n < self._k:
+            return True
+        if self._duplicates[self._k]:
+            return True  # k must grow
+        lower = self._k - 1
+        return lower in self._duplicates and not self._duplicates[lower]  # k can shrink
+
+    def _rebuild(self) -> None:
+        """Recompute k from scratch and rebuild the window counts for k and k - 1."""
+        self._windows.clear()
+        self._duplicates.clear()
+        n = len(self._ids)
+        if n == 0 or n < self.starting_k:
+            self._k = None
+            return
+
+        longest_repeat = max(_lcp_array(self._ids, _suffix_array(self._ids)))
+        self._k = max(self.starting_k, 1, longest_repeat + 1)
+
+        sizes = [self._k]
+        if self._k - 1 >= max(self.starting_k, 1):
+            sizes.append(self._k - 1)
+        for size in sizes:
+            self._windows[size] = Counter()
+            self._duplicates[size] = 0
+            self._update_windows(size, 0, n - size, 1)
+
+
+class MinContextCache:
+    """
+    Persistent cache of min-context results keyed by file content hash.
+
+    Results depend only on the content and starting_k (all engines agree), so unchanged
+    files are answered without recomputation on the next run.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        :param path: Optional JSON file to load from and save to; None keeps the cache in memory only.
+        """
+        self.path = Path(path) if path else None
+        self._entries: dict[str, int] = {}
+        if self.path and self.path.is_file():
+            try:
+                entries = json.loads(self.path.read_text(encoding="utf-8"))
+                if not isinstance(entries, dict) or not all(
+                    isinstance(k, int) and not isinstance(k, bool) for k in entries.values()
+                ):
+                    raise ValueError("expected an object of window sizes")
+                self._entries = entries
+            except (OSError, ValueError) as exc:
+                logger.warning(f"Ignoring unreadable min context cache {self.path}: {exc}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(digest: str, starting_k: int) -> str:
+        return f"{digest}:{starting_k}"
+
+    def get(self, digest: str, starting_k: int) -> Optional[int]:
+        return self._entries.get(self.key(digest, starting_k))
+
+    def set(self, digest: str, starting_k: int, k: int) -> None:
+        self._entries[self.key(digest, starting_k)] = k
+
+    def save(self) -> None:
+        """Write the cache to its JSON file (no-op for in-memory caches); a crash mid-write leaves the old file."""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+@dataclass
+class MinContextBatchResult:
+    """Results and timing stats from calculate_min_context_many."""
+
+    results: dict[Path, int] = field(default_factory=dict)
+    errors: dict[Path, str] = field(default_factory=dict)
+    cache_hits: int = 0
+    computed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def files(self) -> int:
+        return len(self.results) + len(self.errors)
+
+
+def calculate_min_context_many(
+    paths: Iterable[Union[str, Path]],
+    starting_k: int = 1,
+    engine: str = "suffix_array",
+    cache: Optional[MinContextCache] = None,
+    max_workers: Optional[int] = None,
+) -> MinContextBatchResult:
+    """
+    Calculate the min context of many files, computing cache misses on a process pool.
+
+    Files are read and hashed one at a time as paths are consumed; only files whose content
+    hash is not in the cache are sent to the pool, with a bounded number in flight.
+
+    :param paths: Files to process (any iterable, consumed lazily).
+    :param starting_k: Smallest window size to consider.
+    :param engine: Engine passed to calculate_min_context_from_buffer (lines are split as described there).
+    :param cache: Optional MinContextCache; updated (and saved) with new results.
+    :param max_workers: Pool size (default os.cpu_count()); 1 computes in-process without a pool.
+    :return: MinContextBatchResult mapping each path to k; unreadable/empty files are reported in errors.
+    """
+    _check_engine(engine)
+
+    started = time.perf_counter()
+    batch = MinContextBatchResult()
+    workers = max_workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    pending: dict[Future, tuple[Path, str]] = {}
+
+    def record(path: Path, digest: str, k: int) -> None:
+        batch.results[path] = k
+        batch.computed += 1
+        if cache is not None:
+            cache.set(digest, starting_k, k)
+
+    def collect(future: Future, path: Path, digest: str) -> None:
+        try:
+            record(path, digest, future.result())
+        except ValueError as exc:
+            batch.errors[path] = str(exc)
+
+    def drain(limit: int) -> None:
+        while len(pending) > limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                collect(future, *pending.pop(future))
+
+    try:
+        for raw_path in paths:
+            path = Path(raw_path)
+            try:
+                data = path.read_bytes()
+            except OSError as exc:
+                batch.errors[path] = str(exc)
+                continue
+            digest = hashlib.sha256(data).hexdigest()
+            cached = cache.get(digest, starting_k) if cache is not None else None
+            if cached is not None:
+                batch.results[path] = cached
+                batch.cache_hits += 1
+                continue
+
+            if executor is None:
+                try:
+                    record(path, digest, calculate_min_context_from_buffer(data, starting_k, engine))
+                except ValueError as exc:
+                    batch.errors[path] = str(exc)
+            else:
+                pending[executor.submit(calculate_min_context_from_buffer, data, starting_k, engine)] = (path, digest)
+                drain(workers * 4)
+        drain(0)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if cache is not None:
+        cache.save()
+    batch.elapsed = time.perf_counter() - started
+    logger.debug(
+        f"Min context for {batch.files} files in {batch.elapsed:.3f}s "
+        f"({batch.cache_hits} cached, {batch.computed} computed, {len(batch.errors)} errors)"
+    )
+    return batch
+
+
 # Example usage (for testing)
 if __name__ == "__main__":
     # Test case 1: Duplicates at small k
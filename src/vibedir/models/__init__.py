@@ -1,11 +1,18 @@
 from .attachment import Attachment, FileAttachment
 from .command_attachment import CommandAttachment
 from .command_status import CommandStatus, command_status
+from .history import HistoryManifest
+from .path_cache import PathStatCache
+from .settings import CommandConfig, VibedirSettings
 
 __all__ = [
     "Attachment",
     "command_status",
     "CommandAttachment",
+    "CommandConfig",
     "CommandStatus",
     "FileAttachment",
+    "HistoryManifest",
+    "PathStatCache",
+    "VibedirSettings",
 ]
\ No newline at end of file
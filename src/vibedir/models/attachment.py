@@ -1,26 +1,55 @@
 import logging
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 from typing import Literal, Optional
-from pydantic import BaseModel, field_validator, Field, ConfigDict
+from pydantic import BaseModel, field_validator, model_validator, Field, ConfigDict, PrivateAttr, ValidationInfo
+from .path_cache import PathStatCache
 
 logger = logging.getLogger(__name__)
 
+def _check_path(path: Path, cache: Optional[PathStatCache] = None) -> Path:
+    exists = cache.exists(path) if cache is not None else path.exists()
+    if not exists:
+        logger.warning(f"Path does not exist: {path} – proceeding without validation.")
+        # Or raise if strict
+    return cache.resolve(path) if cache is not None else path.resolve()
+
 class Attachment(BaseModel):  
     """Base model for attachments in Vibedir history."""
     model_config = ConfigDict(frozen=True)  # Immutable
     type: Literal["file", "command"]
     path: Path
     timestamp: datetime = Field(default_factory=datetime.now)
+    _lazy: bool = PrivateAttr(default=False)
+    _path_cache: Optional[PathStatCache] = PrivateAttr(default=None)
 
     @field_validator("path")
     @classmethod
-    def validate_path(cls, v: Path) -> Path:
-        """Validate and normalize path, checking existence."""
-        if not v.exists():
-            logger.warning(f"Path does not exist: {v} – proceeding without validation.")
-            # Or raise if strict
-        return v.resolve()
+    def validate_path(cls, v: Path, info: ValidationInfo) -> Path:
+        """
+        Validate and normalize path, checking existence.
+
+        The validation context can change how: {"path_cache": PathStatCache} reuses cached checks,
+        {"path_validation": "lazy"} defers them to the first use of resolved_path.
+        """
+        context = info.context or {}
+        if context.get("path_validation") == "lazy":
+            return v
+        return _check_path(v, context.get("path_cache"))
+
+    @model_validator(mode="after")
+    def remember_lazy(self, info: ValidationInfo) -> "Attachment":
+        context = info.context or {}
+        if context.get("path_validation") == "lazy":
+            self._lazy = True
+            self._path_cache = context.get("path_cache")
+        return self
+
+    @cached_property
+    def resolved_path(self) -> Path:
+        """The validated, resolved path (checked on first access when loaded lazily)."""
+        return _check_path(self.path, self._path_cache) if self._lazy else self.path
 
 class FileAttachment(Attachment):
     """Attachment for files, with original path and hash for dedup."""
@@ -42,6 +42,21 @@ class CommandAttachment(Attachment):
             return self.path.with_name(f"{self.path.stem}_output.{self.output_format}")
         raise ValueError("Invalid base path for output")
 
+    def read_output(self, max_bytes: Optional[int] = None) -> str:
+        """
+        Read the command output from output_path (falling back to the inline output field).
+
+        Args:
+            max_bytes: If set, only read the last max_bytes of the file.
+        """
+        if self.output_path is None or not self.output_path.is_file():
+            return self.output or ""
+        with self.output_path.open("rb") as f:
+            if max_bytes is not None:
+                f.seek(0, 2)
+                f.seek(max(0, f.tell() - max_bytes))
+            return f.read().decode("utf-8", errors="replace")
+
     def get_status_icon(self) -> str:
         """Convenience: Get icon via global status instance."""
         
@@ -1,8 +1,10 @@
 
 import json
 import logging
-from typing import Dict, Set
-from dynaconf import Dynaconf  # Assuming we import from config.py's setup
+from typing import TYPE_CHECKING, Dict, Optional, Set
+
+if TYPE_CHECKING:
+    from dynaconf import Dynaconf  # Assuming we import from config.py's setup
 
 logger = logging.getLogger(__name__)
 
@@ -25,16 +27,34 @@ class CommandStatus:
         FAILED: "❌",
     }
 
-    def __init__(self):
-        self.icons: Dict[str, str] = self.DEFAULT_ICONS.copy()
-        logger.debug("Command status icon defaults are " + json.dumps(self.icons))
+    def __init__(self, lazy: bool = False):
+        """
+        Args:
+            lazy: If True, defer loading icon overrides from config until the icons are first used.
+        """
+        self._icons: Optional[Dict[str, str]] = None
+        if not lazy:
+            self._load_icons()
+
+    @property
+    def icons(self) -> Dict[str, str]:
+        """Icons by status (defaults plus config overrides), loaded on first use if lazy."""
+        if self._icons is None:
+            self._load_icons()
+        return self._icons
+
+    def _load_icons(self) -> None:
+        self._icons = self.DEFAULT_ICONS.copy()
+        logger.debug("Command status icon defaults are " + json.dumps(self._icons))
         self._load_from_config()
 
     def _load_from_config(self) -> None:
         """Load icon overrides from config.toml [status_icons] using Dynaconf."""
         from ..config import load_config  # Import here to avoid circular deps
-        settings: Dynaconf = load_config(namespace="vibedir", quiet=True)
-        status_icons = settings.get("status_icons", {})
+        settings: "Dynaconf" = load_config(namespace="vibedir", quiet=True)
+        self._apply_overrides(settings.get("status_icons", {}))
+
+    def _apply_overrides(self, status_icons: Dict[str, str]) -> None:
         for status, icon in status_icons.items():
             if status in self.DEFAULT_ICONS:
                 self.icons[status] = icon
@@ -45,6 +65,14 @@ class CommandStatus:
         
         logger.debug("Command status icon loaded are " + json.dumps(self.icons))
 
+    def update_icons(self, status_icons: Dict[str, str]) -> None:
+        """
+        Replace the icon overrides, e.g. from a ConfigWatcher change:
+        watcher.subscribe(lambda c: command_status.update_icons(c.config.get("status_icons", {})), keys=["status_icons"])
+        """
+        self._icons = self.DEFAULT_ICONS.copy()
+        self._apply_overrides(status_icons)
+
     def get_icon(self, status: str) -> str:
         """Get icon for a status, falling back to default if not overridden."""
         if status not in self.icons:
@@ -63,6 +91,6 @@ class CommandStatus:
             cls.FAILED,
         }
     
-# Usage: Module-level instance for easy access
-command_status = CommandStatus()
-logger.debug("Initialized global CommandStatus instance with icons: " + json.dumps(command_status.icons))
\ No newline at end of file
+# Usage: Module-level instance for easy access (config is only read when an icon is first needed)
+command_status = CommandStatus(lazy=True)
+logger.debug("Initialized global CommandStatus instance (icons load on first use)")
\ No newline at end of file
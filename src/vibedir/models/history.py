@@ -0,0 +1,60 @@
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, ValidationInfo, model_validator
+
+from .attachment import FileAttachment
+from .path_cache import PathStatCache
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+class HistoryManifest(BaseModel):
+    """manifest.json of a .vibedir/history/<timestamp>_<role>/ entry: the blobs its attachments refer to."""
+
+    model_config = ConfigDict(frozen=True)
+    attachments: Tuple[FileAttachment, ...] = ()
+
+    @model_validator(mode="before")
+    @classmethod
+    def prefetch_paths(cls, data, info: ValidationInfo):
+        """With a PathStatCache in the context, check all attachment paths in one batch up front."""
+        cache = (info.context or {}).get("path_cache")
+        if cache is not None and isinstance(data, dict):
+            cache.prefetch(
+                Path(a["path"]) for a in data.get("attachments", ()) if isinstance(a, dict) and "path" in a
+            )
+        return data
+
+    @property
+    def hashes(self) -> frozenset:
+        """Object store digests referenced by this entry."""
+        return frozenset(a.hash for a in self.attachments if a.hash)
+
+    @classmethod
+    def load(
+        cls, entry_dir: Path, path_cache: Optional[PathStatCache] = None, lazy: bool = False
+    ) -> "HistoryManifest":
+        """
+        Load the manifest of a history entry (empty if it has none).
+
+        Args:
+            entry_dir: The history entry directory
+            path_cache: Session cache for attachment path checks (see PathStatCache)
+            lazy: Defer attachment path checks until each attachment's resolved_path is used
+        """
+        path = Path(entry_dir) / MANIFEST_NAME
+        if not path.is_file():
+            return cls()
+        context = {"path_cache": path_cache}
+        if lazy:
+            context["path_validation"] = "lazy"
+        return cls.model_validate_json(path.read_text(encoding="utf-8"), context=context)
+
+    def save(self, entry_dir: Path) -> Path:
+        path = Path(entry_dir) / MANIFEST_NAME
+        path.write_text(self.model_dump_json(indent=2), encoding="utf-8")
+        return path
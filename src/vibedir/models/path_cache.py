@@ -0,0 +1,82 @@
+import logging
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PathStatCache:
+    """
+    Per-session cache of path existence and resolution, used by Attachment validation.
+
+    Pass it in the validation context to avoid a stat and a resolve per model when loading many
+    attachments, e.g. FileAttachment.model_validate(data, context={"path_cache": cache}).
+    Existence checks are reused for ttl seconds; resolved paths are remembered for the session, and
+    a path that is already a resolution result is known canonical and is never resolved again.
+    """
+
+    def __init__(self, ttl: float = 5.0):
+        self.ttl = ttl
+        self._exists: Dict[Path, Tuple[float, bool]] = {}
+        self._resolved: Dict[Path, Path] = {}
+        self.stat_calls = 0  # Filesystem calls made (exists checks, directory listings and resolves)
+
+    def _fresh(self, path: Path, now: float) -> Optional[bool]:
+        hit = self._exists.get(path)
+        if hit is not None and now - hit[0] < self.ttl:
+            return hit[1]
+        return None
+
+    def exists(self, path: Path) -> bool:
+        path = Path(path)
+        now = time.monotonic()
+        cached = self._fresh(path, now)
+        if cached is not None:
+            return cached
+        self.stat_calls += 1
+        result = path.exists()
+        self._exists[path] = (now, result)
+        return result
+
+    def prefetch(self, paths: Iterable[Path]) -> None:
+        """Check many paths at once, listing each parent directory once instead of stat-ing every file."""
+        now = time.monotonic()
+        by_parent: Dict[Path, set] = defaultdict(set)
+        for path in paths:
+            path = Path(path)
+            if self._fresh(path, now) is None:
+                by_parent[path.parent].add(path.name)
+        for parent, names in by_parent.items():
+            if len(names) == 1:
+                self.exists(parent / next(iter(names)))
+                continue
+            self.stat_calls += 1
+            try:
+                with os.scandir(parent) as it:
+                    present = {entry.name for entry in it}
+            except OSError:
+                present = set()
+            for name in names:
+                self._exists[parent / name] = (now, name in present)
+
+    def resolve(self, path: Path) -> Path:
+        path = Path(path)
+        resolved = self._resolved.get(path)
+        if resolved is None:
+            self.stat_calls += 1
+            resolved = path.resolve()
+            self._resolved[path] = resolved
+            self._resolved[resolved] = resolved  # Known canonical from now on
+        return resolved
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Forget one path (e.g. after a file watcher event), or everything."""
+        if path is None:
+            self._exists.clear()
+            self._resolved.clear()
+        else:
+            self._exists.pop(Path(path), None)
+            self._resolved.pop(Path(path), None)
@@ -0,0 +1,230 @@
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, FrozenSet, Literal, Optional, Tuple
+
+from pydantic import (
+    AliasChoices,
+    BaseModel,
+    ConfigDict,
+    Field,
+    NonNegativeFloat,
+    NonNegativeInt,
+    PositiveInt,
+    field_validator,
+    model_validator,
+)
+
+from .command_status import CommandStatus
+
+if TYPE_CHECKING:
+    from dynaconf import Dynaconf
+
+# Events a [[command]] may list in run_on (see the bundled config.toml)
+RUN_ON_EVENTS = frozenset(
+    {
+        "changes_received",
+        "changes_success",
+        "changes_failed",
+        "revert",
+        "startup",
+        "no_manual",
+        "prompt_send",
+        "prompt_receive",
+    }
+)
+
+
+class _FrozenSection(BaseModel):
+    """Base for compiled config sections: immutable, unknown keys ignored."""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+
+class CommandConfig(_FrozenSection):
+    """A [[command]] entry."""
+
+    name: str
+    command: str = ""
+    run_on: FrozenSet[str] = frozenset()
+    show_in_header: bool = False
+    include_results: bool = False
+    success: str = "exit_code"
+    hotkey: Optional[str] = Field(default=None, validation_alias=AliasChoices("hotkey", "hot_key"))
+    depends_on: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()  # Globs (relative to base_directory) of the files the command reads
+    warm: bool = False  # Run in a fork of a pre-started worker (see vibedir.warm_runner)
+    preload: Tuple[str, ...] = ()  # Extra modules the warm worker imports up front
+
+    @field_validator("run_on")
+    @classmethod
+    def validate_run_on(cls, v: FrozenSet[str]) -> FrozenSet[str]:
+        unknown = v - RUN_ON_EVENTS
+        if unknown:
+            raise ValueError(f"Invalid run_on event(s) {sorted(unknown)}. Must be in {sorted(RUN_ON_EVENTS)}")
+        return v
+
+    @property
+    def configured(self) -> bool:
+        """False if no command is set (shown with the not_configured icon)."""
+        return bool(self.command.strip())
+
+    @property
+    def manual(self) -> bool:
+        """True if the command gets a manual run option in the menu."""
+        return "no_manual" not in self.run_on
+
+
+def validate_command_graph(commands: Tuple[CommandConfig, ...]) -> None:
+    """
+    Check that depends_on only names known commands and contains no cycles.
+
+    Raises:
+        ValueError: On an unknown dependency or a dependency cycle.
+    """
+    by_name = {cmd.name: cmd for cmd in commands}
+    for cmd in commands:
+        unknown = [dep for dep in cmd.depends_on if dep not in by_name]
+        if unknown:
+            raise ValueError(f"Command '{cmd.name}' depends_on unknown command(s) {unknown}")
+
+    visiting: set = set()
+    done: set = set()
+
+    def visit(name: str, path: Tuple[str, ...]) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Command dependency cycle: {' -> '.join(path + (name,))}")
+        visiting.add(name)
+        for dep in by_name[name].depends_on:
+            visit(dep, path + (name,))
+        visiting.discard(name)
+        done.add(name)
+
+    for cmd in commands:
+        visit(cmd.name, ())
+
+
+class StatusIconsConfig(_FrozenSection):
+    """[status_icons] – defaults match CommandStatus.DEFAULT_ICONS."""
+
+    not_configured: str = CommandStatus.DEFAULT_ICONS[CommandStatus.NOT_CONFIGURED]
+    not_run: str = CommandStatus.DEFAULT_ICONS[CommandStatus.NOT_RUN]
+    waiting: str = CommandStatus.DEFAULT_ICONS[CommandStatus.WAITING]
+    running: str = CommandStatus.DEFAULT_ICONS[CommandStatus.RUNNING]
+    success: str = CommandStatus.DEFAULT_ICONS[CommandStatus.SUCCESS]
+    failed: str = CommandStatus.DEFAULT_ICONS[CommandStatus.FAILED]
+
+    @cached_property
+    def by_status(self) -> Dict[str, str]:
+        return self.model_dump()
+
+
+class HistoryConfig(_FrozenSection):
+    """[history] retention settings."""
+
+    retention_messages: NonNegativeInt = 50
+    max_total_size_mb: NonNegativeFloat = 500
+    auto_cleanup_on_startup: bool = True
+
+
+class LLMConfig(_FrozenSection):
+    """[llm] settings; extra provider keys (e.g. endpoint) are kept."""
+
+    model_config = ConfigDict(frozen=True, extra="allow")
+    model: Optional[str] = None
+    context_window: Optional[PositiveInt] = None
+    refresh_threshold: float = Field(default=0.7, gt=0, le=1)
+
+
+class LoggingConfig(_FrozenSection):
+    """[logging] settings."""
+
+    level: Literal["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"] = "INFO"
+
+    @field_validator("level", mode="before")
+    @classmethod
+    def normalize_level(cls, v: str) -> str:
+        return v.upper() if isinstance(v, str) else v
+
+
+class ImpactConfig(_FrozenSection):
+    """[test_impact] settings for running only the tests affected by a change set."""
+
+    enabled: bool = False
+    coverage_file: str = ".coverage"
+    map_file: str = ".vibedir/test_impact.json"
+    full_run_every: NonNegativeInt = 20
+
+
+class PromptIconsConfig(_FrozenSection):
+    """[prompt_icons] used in prompt.md headers and TUI avatars."""
+
+    user: str = "👤"
+    assistant: str = "🤖"
+
+
+class VibedirSettings(_FrozenSection):
+    """
+    The merged vibedir config compiled into frozen, validated sections.
+
+    Built once per loaded config by vibedir.config.load_settings, so lookups are plain attribute
+    access instead of Dynaconf's dynamic attribute machinery.
+    """
+
+    mode: Literal["clipboard", "api"] = "clipboard"
+    clipboard_max_chars_per_file: PositiveInt = 40000
+    clipboard_max_file_count: PositiveInt = 5
+
+    ask_llm_for_commit_message: bool = True
+    show_working_commit_message: bool = True
+    show_previous_commit_message: bool = True
+    auto_commit: Literal["previous", "latest", "off"] = "previous"
+    commit_command: str = ""
+    revert_changes_command: str = ""
+    last_commit_message_command: str = ""
+    changes_exist_command: str = ""
+    changes_exist_result: str = "exit_code"
+    auto_diff: bool = False
+    diff_command: str = ""
+
+    prompt_history_message_count: NonNegativeInt = 10
+    tests_directory: str = "{{ base_directory }}/tests"
+    max_parallel: Optional[PositiveInt] = None
+
+    llm: LLMConfig = LLMConfig()
+    status_icons: StatusIconsConfig = StatusIconsConfig()
+    commands: Tuple[CommandConfig, ...] = Field(default=(), validation_alias=AliasChoices("command", "commands"))
+    logging: LoggingConfig = LoggingConfig()
+    prompt_icons: PromptIconsConfig = PromptIconsConfig()
+    history: HistoryConfig = HistoryConfig()
+    test_impact: ImpactConfig = ImpactConfig()
+
+    @field_validator("mode", "auto_commit", mode="before")
+    @classmethod
+    def normalize_choice(cls, v: str) -> str:
+        return v.lower() if isinstance(v, str) else v
+
+    @model_validator(mode="after")
+    def validate_consistency(self) -> "VibedirSettings":
+        if self.mode == "api" and not self.llm.model:
+            raise ValueError("mode = 'api' requires [llm] model to be set")
+        validate_command_graph(self.commands)
+        return self
+
+    @cached_property
+    def commands_by_name(self) -> Dict[str, CommandConfig]:
+        """Commands keyed by name (a later entry with the same name wins)."""
+        return {cmd.name: cmd for cmd in self.commands}
+
+    @cached_property
+    def header_commands(self) -> Tuple[CommandConfig, ...]:
+        return tuple(cmd for cmd in self.commands if cmd.show_in_header)
+
+    def commands_for_event(self, event: str) -> Tuple[CommandConfig, ...]:
+        """Commands whose run_on includes the event, in config order."""
+        return tuple(cmd for cmd in self.commands if event in cmd.run_on)
+
+    @classmethod
+    def from_dynaconf(cls, settings: "Dynaconf") -> "VibedirSettings":
+        """Compile a Dynaconf settings object (top-level keys are upper-cased by Dynaconf)."""
+        return cls.model_validate({key.lower(): value for key, value in settings.to_dict().items()})
@@ -0,0 +1,212 @@
+# vibedir/object_store.py
+import hashlib
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional
+
+from .models.attachment import FileAttachment
+from .models.history import HistoryManifest
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1024 * 1024
+_FICLONE = 0x40049409  # Linux ioctl: share the source's extents (btrfs, xfs, ...)
+_locks: Dict[Path, threading.RLock] = {}
+_locks_guard = threading.Lock()
+
+
+def hash_file(path: Path) -> str:
+    """Streaming SHA256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _reflink(source: Path, dest: Path) -> bool:
+    """Copy-on-write clone of source to dest where the filesystem supports it (Linux only)."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as src, open(dest, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        dest.unlink(missing_ok=True)
+        return False
+
+
+def _copy_hashing(source: Path, dest: Path) -> str:
+    digest = hashlib.sha256()
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        for block in iter(lambda: src.read(_CHUNK_SIZE), b""):
+            digest.update(block)
+            dst.write(block)
+    return digest.hexdigest()
+
+
+class ObjectStore:
+    """
+    Content-addressed blob store (.vibedir/objects/ab/cdef...), so each distinct attachment is stored once.
+
+    Blobs are read-only and never modified, which makes it safe to hardlink them into history
+    entries. Files come into the store by reflink or copy, never by hardlink, since a working
+    tree file may later be edited in place.
+    """
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: Store directory (e.g. .vibedir/objects)
+        """
+        self.root = Path(root)
+        # Held while history entries are written, so garbage collection never removes a blob
+        # that a new entry is about to reference (shared by all ObjectStores on the same root)
+        with _locks_guard:
+            self.lock = _locks.setdefault(self.root.resolve(), threading.RLock())
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def __contains__(self, digest: str) -> bool:
+        return self.object_path(digest).is_file()
+
+    def digests(self) -> Iterator[str]:
+        """All stored digests."""
+        if not self.root.is_dir():
+            return
+        for fanout in self.root.iterdir():
+            if len(fanout.name) == 2 and fanout.is_dir():
+                for blob in fanout.iterdir():
+                    yield fanout.name + blob.name
+
+    def size(self, digest: str) -> int:
+        return self.object_path(digest).stat().st_size
+
+    def open(self, digest: str) -> BinaryIO:
+        return open(self.object_path(digest), "rb")
+
+    def put(self, source: Path, digest: Optional[str] = None) -> str:
+        """
+        Add a file to the store (a no-op if its content is already there).
+
+        Args:
+            source: File to add
+            digest: Its SHA256, if already known (saves a read when the blob exists)
+
+        Returns:
+            The blob's SHA256 hex digest
+        """
+        source = Path(source)
+        digest = digest or hash_file(source)
+        if digest in self:
+            return digest
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        os.close(fd)
+        tmp = Path(tmp_name)
+        try:
+            if _reflink(source, tmp):
+                actual = hash_file(tmp)
+            else:
+                actual = _copy_hashing(source, tmp)
+            # The source may have changed since it was hashed; the blob is filed under what was stored
+            if actual != digest:
+                logger.warning(f"{source} changed while being stored")
+                digest = actual
+            if digest in self:
+                return digest
+            os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            target = self.object_path(digest)
+            target.parent.mkdir(exist_ok=True)
+            os.replace(tmp, target)
+            return digest
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def link(self, digest: str, dest: Path) -> str:
+        """
+        Materialise a blob at dest: hardlink, else reflink, else copy.
+
+        Returns:
+            How the blob was materialised ("hardlink", "reflink" or "copy")
+        """
+        source = self.object_path(digest)
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, dest)
+            return "hardlink"
+        except OSError:
+            pass
+        if _reflink(source, dest):
+            return "reflink"
+        shutil.copyfile(source, dest)
+        return "copy"
+
+    def delete(self, digest: str) -> int:
+        """Remove a blob. Returns the number of bytes freed (0 if it was not stored)."""
+        path = self.object_path(digest)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return 0
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass  # Fanout directory still holds other blobs
+        return size
+
+
+def history_entry_name(role: str, when: Optional[datetime] = None) -> str:
+    """Directory name of a history entry, e.g. 2025-11-23T14:22:31.222_User."""
+    when = when or datetime.now()
+    return f"{when.strftime('%Y-%m-%dT%H:%M:%S')}.{when.microsecond // 1000:03d}_{role}"
+
+
+def store_history_entry(
+    store: ObjectStore,
+    history_dir: Path,
+    role: str,
+    files: Iterable[Path],
+    when: Optional[datetime] = None,
+) -> Path:
+    """
+    Create .vibedir/history/<timestamp>_<role>/ holding the given files, backed by the object store.
+
+    Each file is stored once in the store (by content) and linked into the entry directory, and the
+    entry's manifest.json records the blob hash of every attachment.
+
+    Returns:
+        The entry directory
+    """
+    entry_dir = Path(history_dir) / history_entry_name(role, when)
+    with store.lock:
+        entry_dir.mkdir(parents=True, exist_ok=False)
+        attachments = []
+        used_names: set = set()
+        for source in files:
+            source = Path(source)
+            digest = store.put(source)
+            name = source.name
+            counter = 2
+            while name in used_names:
+                name = f"{source.stem}-{counter}{source.suffix}"
+                counter += 1
+            used_names.add(name)
+            dest = entry_dir / name
+            store.link(digest, dest)
+            attachments.append(FileAttachment(path=dest, original_path=source.resolve(), hash=digest))
+        HistoryManifest(attachments=tuple(attachments)).save(entry_dir)
+    return entry_dir
@@ -0,0 +1,217 @@
+# vibedir/prompt_assembler.py
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .codebase_snapshot import CodebaseSnapshot
+
+logger = logging.getLogger(__name__)
+
+SECTION_ORDER = ("DEV_GUIDELINES", "CODEBASE", "CODE_CHANGE_INSTRUCTIONS", "COMMANDS_AND_RESULTS", "TASK")
+PART_NAME = "vibedir_part{part}of{total}.txt"
+_PART_FILE = re.compile(r"^vibedir_part\d+of\d+\.txt$")
+_READ_SIZE = 64 * 1024
+
+# Text, a file streamed from disk, a codebase snapshot, or a function returning a fresh iterable of text chunks
+SectionContent = Union[str, Path, CodebaseSnapshot, Callable[[], Iterable[str]]]
+
+
+@dataclass(frozen=True)
+class PromptSection:
+    """One [TAG]...[/TAG] block of vibedir.txt."""
+
+    tag: str
+    content: SectionContent
+
+
+def _chunks(content: SectionContent) -> Iterator[str]:
+    if isinstance(content, str):
+        yield content
+    elif isinstance(content, Path):
+        with open(content, encoding="utf-8", errors="replace", newline="") as f:
+            for block in iter(lambda: f.read(_READ_SIZE), ""):
+                yield block
+    elif isinstance(content, CodebaseSnapshot):
+        for chunk in content.chunks():
+            yield chunk.decode("utf-8")
+    else:
+        yield from content()
+
+
+def iter_lines(content: SectionContent) -> Iterator[str]:
+    """Lines of a section's content (with line endings), across chunk boundaries."""
+    partial = ""
+    for chunk in _chunks(content):
+        lines = (partial + chunk).splitlines(keepends=True)
+        partial = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        yield from lines
+    if partial:
+        yield partial
+
+
+def iter_section(section: PromptSection) -> Iterator[str]:
+    """Stream one [TAG]...[/TAG] block line by line; nothing if the section has no content."""
+    opened = False
+    last = ""
+    for line in iter_lines(section.content):
+        if not opened:
+            if not line.strip():
+                continue
+            yield f"[{section.tag}]\n"
+            opened = True
+        yield line
+        last = line
+    if opened:
+        if not last.endswith("\n"):
+            yield "\n"
+        yield f"[/{section.tag}]\n"
+
+
+def iter_prompt(sections: Iterable[PromptSection]) -> Iterator[str]:
+    """
+    Stream vibedir.txt line by line. Sections without content are left out entirely, as are leading
+    blank lines inside a section.
+    """
+    first = True
+    for section in sections:
+        lines = iter_section(section)
+        opening = next(lines, None)
+        if opening is None:
+            continue
+        if not first:
+            yield "\n"
+        first = False
+        yield opening
+        yield from lines
+
+
+def _is_fence(line: str) -> bool:
+    return line.lstrip().startswith(("```", "~~~"))
+
+
+@dataclass(frozen=True)
+class PartPlan:
+    """Where vibedir.txt is split: each break is (line number, offset in that line) starting a new part."""
+
+    breaks: Tuple[Tuple[int, int], ...]
+    total_chars: int
+
+    @property
+    def part_count(self) -> int:
+        return len(self.breaks) + 1 if self.total_chars else 0
+
+
+def plan_parts(lines: Iterable[str], max_chars: int) -> PartPlan:
+    """
+    Decide part breaks in one pass over the lines, keeping only the current part's line boundaries in memory.
+
+    A part never exceeds max_chars. It ends at the last line boundary outside a code fence if that
+    keeps it at least half full, else at the last line boundary; a single line longer than
+    max_chars is cut at max_chars.
+    """
+    breaks: List[Tuple[int, int]] = []
+    bounds: List[Tuple[int, int, bool]] = []  # (line number, chars in part before it, outside a fence)
+    size = total = 0
+    in_fence = False
+    for line_no, line in enumerate(lines):
+        total += len(line)
+        if size:
+            bounds.append((line_no, size, not in_fence))
+        length, offset = len(line), 0
+        while size + length - offset > max_chars:
+            if bounds:
+                safe = [b for b in bounds if b[2] and b[1] >= max_chars // 2]
+                break_line, before, _ = (safe or bounds)[-1]
+                breaks.append((break_line, 0))
+                size -= before
+                bounds = [(n, s - before, ok) for n, s, ok in bounds if n > break_line]
+            else:
+                # Nothing but (the rest of) this line in the part: cut it
+                offset += max_chars - size
+                breaks.append((line_no, offset))
+                size = 0
+        size += length - offset
+        if _is_fence(line):
+            in_fence = not in_fence
+    return PartPlan(tuple(breaks), total)
+
+
+class PromptAssembler:
+    """
+    Assemble vibedir.txt from its sections and stream it to disk, as one file or as clipboard parts.
+
+    Sections are read from their sources (strings, files, the codebase snapshot) as they are
+    written, so the whole prompt is never held in memory. For clipboard mode a first, cheap pass
+    over the text plans where parts break, so the number of parts is known before anything is
+    written; a second pass writes vibedir_part<N>of<M>.txt files directly.
+    """
+
+    def __init__(self, sections: Iterable[PromptSection], max_chars_per_file: int = 40000, max_file_count: int = 5):
+        self.sections = list(sections)
+        self.max_chars_per_file = max_chars_per_file
+        self.max_file_count = max_file_count
+
+    @classmethod
+    def from_settings(cls, sections: Iterable[PromptSection], settings) -> "PromptAssembler":
+        return cls(sections, settings.clipboard_max_chars_per_file, settings.clipboard_max_file_count)
+
+    def lines(self) -> Iterator[str]:
+        return iter_prompt(self.sections)
+
+    def plan(self) -> PartPlan:
+        return plan_parts(self.lines(), self.max_chars_per_file)
+
+    def write(self, path: Path) -> int:
+        """Stream the whole prompt to one file (API mode). Returns the number of characters written."""
+        written = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for line in self.lines():
+                written += f.write(line)
+        return written
+
+    def write_parts(self, directory: Path, plan: Optional[PartPlan] = None) -> List[Path]:
+        """
+        Write the prompt as vibedir_part<N>of<M>.txt files in directory, replacing parts from earlier runs.
+
+        Raises:
+            ValueError: If the prompt needs more than max_file_count parts (nothing is written then)
+        """
+        plan = plan or self.plan()
+        if plan.part_count > self.max_file_count:
+            raise ValueError(
+                f"Prompt needs {plan.part_count} parts of {self.max_chars_per_file} characters "
+                f"({plan.total_chars} characters) but clipboard_max_file_count is {self.max_file_count}"
+            )
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for stale in directory.iterdir():
+            if _PART_FILE.match(stale.name):
+                stale.unlink()
+        if not plan.part_count:
+            return []
+
+        total = plan.part_count
+        paths = [directory / PART_NAME.format(part=n, total=total) for n in range(1, total + 1)]
+        breaks = iter(plan.breaks)
+        next_break = next(breaks, None)
+        part = 0
+        f = open(paths[0], "w", encoding="utf-8", newline="")
+        try:
+            for line_no, line in enumerate(self.lines()):
+                offset = 0
+                while next_break is not None and next_break[0] == line_no:
+                    f.write(line[offset : next_break[1]])
+                    offset = next_break[1]
+                    f.close()
+                    part += 1
+                    f = open(paths[part], "w", encoding="utf-8", newline="")
+                    next_break = next(breaks, None)
+                f.write(line[offset:])
+        finally:
+            f.close()
+        if next_break is not None or part + 1 != total:
+            logger.warning("Prompt sources changed while the parts were written; part sizes may be off")
+        logger.info(f"Wrote {total} prompt part(s) ({plan.total_chars} characters) to {directory}")
+        return paths
@@ -0,0 +1,270 @@
+# vibedir/prompt_parser.py
+import hashlib
+import logging
+import mmap
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Literal, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SESSION_HEADER = "# vibedir session - "
+PENDING_HEADER = "## 👤Pending → (edit below)"
+ATTACHMENTS_HEADER = "### Attachments"
+
+# Message headers (see prompt_design.md). Other "## " lines are ordinary content of the section they are in.
+_HEADER = re.compile(
+    (
+        r"^## (?:(?P<user>👤User)|🤖Assistant \((?P<model>[^)\r\n]*)\))"
+        r" - (?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d+)?)[ \t\r]*$"
+        r"|^## (?P<pending>👤Pending)(?: →[^\r\n]*)?$"
+    ).encode(),
+    re.MULTILINE,
+)
+_ATTACHMENTS = re.compile(rf"^{ATTACHMENTS_HEADER}[ \t\r]*$", re.MULTILINE)
+
+Role = Literal["user", "assistant", "pending"]
+
+
+@dataclass(frozen=True)
+class PromptMessage:
+    """One ## section of prompt.md."""
+
+    role: Role
+    content: str
+    timestamp: Optional[datetime] = None  # None for the Pending section
+    model: Optional[str] = None  # Assistant messages only
+    attachments: Tuple[str, ...] = ()  # Lines of the ### Attachments block
+    offset: int = 0  # Byte offset of the header in the file
+
+
+def _digest(data) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def _parse_timestamp(text: str) -> Optional[datetime]:
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    return None
+
+
+def _split_attachments(body: str) -> Tuple[str, Tuple[str, ...]]:
+    """Split a section body into its text and the lines of its (last) ### Attachments block."""
+    matches = list(_ATTACHMENTS.finditer(body))
+    match = matches[-1] if matches else None
+    if match is None:
+        return body.strip(), ()
+    lines = body[match.end() :].lstrip("\r\n").splitlines()
+    attachments = []
+    for i, line in enumerate(lines):
+        if not line.strip():
+            rest = "\n".join(lines[i:]).strip()
+            break
+        attachments.append(line.strip())
+    else:
+        rest = ""
+    content = body[: match.start()].strip()
+    if rest:
+        content = f"{content}\n\n{rest}" if content else rest  # Text after the block is not an attachment
+    return content, tuple(attachments)
+
+
+def render_pending(content: str = "", attachments: Sequence[str] = ()) -> str:
+    """Text of a Pending section."""
+    text = f"{PENDING_HEADER}\n\n"
+    if content:
+        text += f"{content.rstrip()}\n"
+    if attachments:
+        text += f"\n{ATTACHMENTS_HEADER}\n" + "".join(f"{a}\n" for a in attachments)
+    return text
+
+
+class VibedirPromptParser:
+    """
+    Parser for .vibedir/prompt.md that only re-parses what changed.
+
+    History in prompt.md is append-only and normally only the last (Pending) section is edited. The
+    parser keeps the byte offset and a hash of every message section plus one hash of everything
+    before the last section. On refresh(), if that prefix hash still matches, only the last section
+    onward is parsed again; otherwise the section hashes locate the first modified section and
+    parsing resumes there. Hashing runs in C over a memory map of the file, so a refresh costs a
+    fraction of a full parse, and write_pending() (the TUI's keystroke sync) rewrites the Pending
+    section in place without reading the file at all.
+    """
+
+    def __init__(self, file_path: Path):
+        self.file_path = Path(file_path)
+        self.session_timestamp: Optional[str] = None
+        self.messages: List[PromptMessage] = []
+        self._section_digests: List[bytes] = []  # Per message: hash of [offset, next offset)
+        self._preamble_digest: Optional[bytes] = None  # Hash of the bytes before the first message
+        self._prefix_digest: Optional[bytes] = None  # Hash of the bytes before the last message
+        self._signature: Optional[tuple] = None
+
+    @property
+    def pending(self) -> Optional[PromptMessage]:
+        """The Pending section, if the file ends with one."""
+        if self.messages and self.messages[-1].role == "pending":
+            return self.messages[-1]
+        return None
+
+    @property
+    def history(self) -> List[PromptMessage]:
+        """Sent User and Assistant messages."""
+        return [m for m in self.messages if m.role != "pending"]
+
+    def _reset(self) -> None:
+        self.session_timestamp = None
+        self.messages = []
+        self._section_digests = []
+        self._preamble_digest = self._prefix_digest = None
+        self._signature = None
+
+    def parse(self) -> List[PromptMessage]:
+        """Parse the whole file again, ignoring anything remembered."""
+        self._reset()
+        self.refresh()
+        return self.messages
+
+    def refresh(self) -> Optional[int]:
+        """
+        Bring messages up to date with the file.
+
+        Returns:
+            Index of the first message that was re-parsed (messages before it are unchanged),
+            or None if the file has not changed since the last refresh.
+        """
+        try:
+            f = open(self.file_path, "rb")
+        except FileNotFoundError:
+            had_messages = bool(self.messages) or self._signature is not None
+            self._reset()
+            return 0 if had_messages else None
+        with f:
+            st = os.fstat(f.fileno())
+            signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+            if signature == self._signature:
+                return None
+            if st.st_size == 0:
+                self._reset()
+                self._signature = signature
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                with memoryview(data) as view:
+                    first, prefix = self._first_changed(data, view)
+                    self._parse_from(data, view, first, prefix)
+        self._signature = signature
+        return first
+
+    def _first_changed(self, data, view: memoryview) -> Tuple[int, Optional[object]]:
+        """
+        Index of the first message whose bytes (or extent) changed; 0 when the preamble changed.
+
+        Also returns the running hash of the bytes before that message when the prefix check
+        produced it, so the new prefix hash does not have to start over.
+        """
+        if not self.messages:
+            return 0, None
+        offsets = [m.offset for m in self.messages]
+        first = len(offsets) - 1
+        prefix = hashlib.sha256(view[: offsets[-1]])
+        if prefix.digest() != self._prefix_digest:
+            prefix = None
+            if _digest(view[: offsets[0]]) != self._preamble_digest:
+                return 0, None
+            for i in range(len(offsets) - 1):
+                start, end = offsets[i], offsets[i + 1]
+                if end > len(view) or _digest(view[start:end]) != self._section_digests[i]:
+                    first = i
+                    break
+        # If the header that ended the previous section is gone, that section extends further now
+        if first > 0 and not _HEADER.match(data, offsets[first]):
+            return first - 1, None
+        return first, prefix
+
+    def _parse_from(self, data, view: memoryview, first: int, prefix=None) -> None:
+        if first == 0:
+            self.messages, self._section_digests = [], []
+            match = _HEADER.search(data)
+            end = match.start() if match else len(data)
+            preamble = bytes(view[:end]).decode("utf-8", errors="replace")
+            line = preamble.lstrip().split("\n", 1)[0].rstrip()
+            self.session_timestamp = line[len(SESSION_HEADER) :].strip() if line.startswith(SESSION_HEADER) else None
+            self._preamble_digest = _digest(view[:end])
+            start = end
+        else:
+            start = self.messages[first].offset
+            del self.messages[first:]
+            del self._section_digests[first:]
+
+        matches = list(_HEADER.finditer(data, start))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(data)
+            self.messages.append(self._message(match, bytes(view[match.end() : end]).decode("utf-8", errors="replace")))
+            self._section_digests.append(_digest(view[match.start() : end]))
+
+        if not self.messages:
+            self._prefix_digest = None
+        elif prefix is not None:
+            prefix.update(view[start : self.messages[-1].offset])
+            self._prefix_digest = prefix.digest()
+        else:
+            self._prefix_digest = _digest(view[: self.messages[-1].offset])
+        logger.debug(f"Parsed {len(self.messages) - first} of {len(self.messages)} messages in {self.file_path}")
+
+    @staticmethod
+    def _message(match: re.Match, body: str) -> PromptMessage:
+        content, attachments = _split_attachments(body)
+        if match.group("pending"):
+            return PromptMessage("pending", content, attachments=attachments, offset=match.start())
+        timestamp = _parse_timestamp(match.group("timestamp").decode())
+        if match.group("user"):
+            return PromptMessage("user", content, timestamp, attachments=attachments, offset=match.start())
+        model = match.group("model").decode("utf-8", errors="replace")
+        return PromptMessage("assistant", content, timestamp, model, attachments, match.start())
+
+    def write_pending(self, content: str, attachments: Optional[Sequence[str]] = None) -> None:
+        """
+        Replace the Pending section (appending one if the file has none), leaving history untouched.
+
+        Only the bytes from the Pending header on are written, and the parser's state is updated
+        from what was written, so the file watcher's next refresh() is a no-op.
+
+        Args:
+            content: New Pending text
+            attachments: Attachment lines (None keeps the current ones)
+        """
+        self.refresh()  # External edits win over state remembered from earlier
+        pending = self.pending
+        if attachments is None:
+            attachments = pending.attachments if pending else ()
+        section = render_pending(content, attachments).encode()
+
+        if pending is None:
+            with open(self.file_path, "a+b") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size == 0:
+                    f.write(f"{SESSION_HEADER}{datetime.now().isoformat(timespec='milliseconds')}\n\n".encode())
+                else:
+                    f.seek(size - 1)
+                    f.write(b"\n" if f.read(1) == b"\n" else b"\n\n")
+                f.write(section)
+            self._signature = None
+            self.refresh()  # Re-parses from the old last section only
+            return
+
+        with open(self.file_path, "r+b") as f:
+            f.seek(pending.offset)
+            f.write(section)
+            f.truncate()
+            f.flush()
+            st = os.fstat(f.fileno())
+        self.messages[-1] = PromptMessage("pending", content.strip(), attachments=tuple(attachments), offset=pending.offset)
+        self._section_digests[-1] = _digest(section)
+        self._signature = (st.st_ino, st.st_size, st.st_mtime_ns)
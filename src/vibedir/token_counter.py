@@ -0,0 +1,217 @@
+# vibedir/token_counter.py
+import hashlib
+import itertools
+import logging
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .codebase_snapshot import CodebaseSnapshot
+from .prompt_assembler import PromptSection, SectionContent, iter_lines, iter_section
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "o200k_base"
+REFRESH_THRESHOLD = 0.7
+HISTORY = "HISTORY"  # Report key for the conversation so far
+
+_MIN_CHUNK = 4096  # Characters before a content-defined cut is taken
+_MAX_CHUNK = 64 * 1024  # Characters after which any safe line boundary is cut
+_CUT_MASK = 0x1F  # A line ends a chunk (once past _MIN_CHUNK) when its CRC32 & mask is 0
+
+
+def _safe_boundary(previous: str, line: str) -> bool:
+    """
+    Whether no token can span the boundary between previous and line.
+
+    tiktoken's pre-tokenizer never lets a piece run past a line break into non-whitespace, except
+    punctuation followed by line breaks and slashes (o200k); BPE merges stay within pieces. So the
+    counts of text split there add up to the count of the whole.
+    """
+    return previous.endswith(("\n", "\r")) and bool(line) and not line[0].isspace() and line[0] != "/"
+
+
+def _chunk_pieces(pieces: Iterable[Tuple[str, bool]]) -> Iterator[str]:
+    """
+    Group text pieces into chunks cut only at token-safe boundaries.
+
+    Pieces are lines, or whole files of a codebase snapshot (marked natural: a cut is taken after
+    each of them). Cuts between lines are content-defined (chosen by a hash of the line), so an edit
+    only moves the chunk it is in and unchanged text keeps the same chunks and cache keys.
+    """
+    buffer: List[str] = []
+    size = 0
+    cut = False
+    for piece, natural in pieces:
+        if buffer and (cut or size >= _MAX_CHUNK) and _safe_boundary(buffer[-1], piece):
+            yield "".join(buffer)
+            buffer, size = [], 0
+        buffer.append(piece)
+        size += len(piece)
+        if natural:
+            cut = True
+        else:
+            cut = size >= _MIN_CHUNK and not zlib.crc32(piece.encode("utf-8", "surrogatepass")) & _CUT_MASK
+    if buffer:
+        yield "".join(buffer)
+
+
+def _snapshot_pieces(section: PromptSection) -> Optional[List[Tuple[str, bool]]]:
+    """The tagged block of a codebase section with one piece per file, or None to go line by line."""
+    snapshot: CodebaseSnapshot = section.content
+    header = snapshot.header.decode("utf-8")
+    if not header.strip() or not header[0].strip():
+        return None  # iter_section drops leading blank lines; keep to its exact text
+    pieces = [(f"[{section.tag}]\n", False), (header, True)]
+    for i, encoded in enumerate(snapshot.sections):
+        pieces.append((encoded.decode("utf-8") + ("\n" if i < len(snapshot.sections) - 1 else ""), True))
+    if not pieces[-1][0].endswith("\n"):
+        pieces.append(("\n", False))
+    pieces.append((f"[/{section.tag}]\n", False))
+    return pieces
+
+
+@dataclass(frozen=True)
+class TokenReport:
+    """Token counts of one prompt, per section, in prompt order."""
+
+    sections: Dict[str, int] = field(default_factory=dict)
+    chunks: int = 0  # Chunks looked up
+    recounted: int = 0  # Chunks that were not cached and had to be tokenised
+
+    @property
+    def total(self) -> int:
+        return sum(self.sections.values())
+
+    def usage(self, context_window: int) -> float:
+        """Fraction of the context window the prompt takes."""
+        return self.total / context_window
+
+    def needs_refresh(self, context_window: int, threshold: float = REFRESH_THRESHOLD) -> bool:
+        """Whether the conversation has reached threshold of the context window and should be refreshed."""
+        return self.total >= context_window * threshold
+
+    def largest(self) -> List[Tuple[str, int]]:
+        """Sections by token count, largest first."""
+        return sorted(self.sections.items(), key=lambda item: item[1], reverse=True)
+
+    def summary(self, context_window: Optional[int] = None) -> str:
+        """One line for the status bar, e.g. "61,204 tokens (48% of 128,000): CODEBASE 52,100, HISTORY 7,900"."""
+        text = f"{self.total:,} tokens"
+        if context_window:
+            text += f" ({self.usage(context_window):.0%} of {context_window:,})"
+        parts = [f"{name} {count:,}" for name, count in self.largest() if count]
+        return f"{text}: {', '.join(parts)}" if parts else text
+
+
+class TokenCounter:
+    """
+    Count prompt tokens with tiktoken, re-tokenising only text that changed.
+
+    Text is cut into chunks at boundaries no token can span (see _safe_boundary), so chunk counts
+    add up exactly to the count of the whole prompt. Each chunk's count is cached under the
+    SHA256 of its text. Codebase snapshots are chunked per file, so a send after editing one file
+    tokenises that file's section only; other text is cut at content-defined line boundaries.
+    Sections are counted separately (each tagged block with its separator), which gives the
+    per-section breakdown for the context-refresh check at no extra cost.
+    """
+
+    def __init__(self, encoder=None, encoding_name: str = DEFAULT_ENCODING, max_cache_entries: int = 100_000):
+        """
+        Args:
+            encoder: Object with encode_ordinary(text) -> list of tokens (default: tiktoken's encoding_name)
+            encoding_name: tiktoken encoding loaded when no encoder is given
+            max_cache_entries: Chunk counts kept (least recently used are dropped)
+        """
+        self._encoder = encoder
+        self.encoding_name = encoding_name
+        self.max_cache_entries = max_cache_entries
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            import tiktoken  # Imported on first use; loading an encoding reads its BPE file
+
+            self._encoder = tiktoken.get_encoding(self.encoding_name)
+        return self._encoder
+
+    def _count_chunk(self, chunk: str) -> Tuple[int, bool]:
+        """Token count of one chunk, and whether it had to be tokenised."""
+        key = hashlib.sha256(chunk.encode("utf-8", "surrogatepass")).digest()
+        count = self._cache.get(key)
+        if count is not None:
+            self._cache.move_to_end(key)
+            return count, False
+        count = len(self.encoder.encode_ordinary(chunk))
+        self._cache[key] = count
+        if len(self._cache) > self.max_cache_entries:
+            self._cache.popitem(last=False)
+        return count, True
+
+    def _count_pieces(self, pieces: Iterable[Tuple[str, bool]]) -> Tuple[int, int, int]:
+        """(tokens, chunks, chunks recounted) of a stream of pieces."""
+        tokens = chunks = recounted = 0
+        for chunk in _chunk_pieces(pieces):
+            count, missed = self._count_chunk(chunk)
+            tokens += count
+            chunks += 1
+            recounted += missed
+        return tokens, chunks, recounted
+
+    def count(self, content: SectionContent) -> int:
+        """Tokens in content (text, a file, a snapshot or a chunk source), as the model sees it."""
+        return self._count_pieces((line, False) for line in iter_lines(content))[0]
+
+    def _section_pieces(self, section: PromptSection) -> Iterator[Tuple[str, bool]]:
+        if isinstance(section.content, CodebaseSnapshot):
+            pieces = _snapshot_pieces(section)
+            if pieces is not None:
+                return iter(pieces)
+        return ((line, False) for line in iter_section(section))
+
+    def _blocks(self, sections: Iterable[PromptSection]) -> Iterator[Tuple[str, Iterator[Tuple[str, bool]]]]:
+        """(tag, pieces) of each non-empty section as it appears in vibedir.txt."""
+        pending = None
+        for section in sections:
+            pieces = self._section_pieces(section)
+            first = next(pieces, None)
+            if first is None:
+                continue
+            if pending is not None:
+                # The blank line between sections ends the previous block: "[/TAG]\n\n" + "[NEXT]" is a safe cut
+                yield pending[0], itertools.chain(pending[1], [("\n", False)])
+            pending = (section.tag, itertools.chain([first], pieces))
+        if pending is not None:
+            yield pending
+
+    def report(self, sections: Iterable[PromptSection], history: Iterable[str] = ()) -> TokenReport:
+        """
+        Count a prompt (the sections of vibedir.txt) and the conversation it is sent into.
+
+        Args:
+            sections: The prompt's sections, as given to PromptAssembler
+            history: Earlier messages still in the model's context (e.g. message contents of prompt.md)
+
+        Returns:
+            A TokenReport keyed by section tag (sections without content are left out), plus HISTORY.
+        """
+        counts: Dict[str, int] = {}
+        chunks = recounted = 0
+        for tag, pieces in self._blocks(sections):
+            tokens, n, missed = self._count_pieces(pieces)
+            counts[tag] = counts.get(tag, 0) + tokens
+            chunks, recounted = chunks + n, recounted + missed
+
+        history_tokens = 0
+        for message in history:
+            tokens, n, missed = self._count_pieces((line, False) for line in iter_lines(message))
+            history_tokens += tokens
+            chunks, recounted = chunks + n, recounted + missed
+        if history_tokens:
+            counts[HISTORY] = history_tokens
+
+        report = TokenReport(counts, chunks, recounted)
+        logger.debug(f"Token count: {report.summary()} ({recounted} of {chunks} chunks recounted)")
+        return report
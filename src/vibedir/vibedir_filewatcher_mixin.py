@@ -1,42 +1,68 @@
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from textual.app import on
+# vibedir/vibedir_filewatcher_mixin.py
+import os
+from pathlib import Path
+from typing import Callable, Iterable, List, Union
+
 from textual.message import Message
 
+from .file_watcher import FileChange, FileWatcherService
+from .prompt_parser import VibedirPromptParser
+
+
+class VibedirFileChanged(Message):
+    """Posted to the app once per logical change of a watched file."""
+
+    def __init__(self, change: FileChange) -> None:
+        super().__init__()
+        self.change = change
+
+    @property
+    def path(self) -> Path:
+        return self.change.path
+
 
 class VibedirFileWatcherMixin:
-    """Mixin for watching prompt.md changes."""
+    """
+    Mixin for Textual apps: watch prompt.md (and any other files) and reload on real changes.
+
+    Watching is done by a FileWatcherService, so a burst of editor events results in one
+    VibedirFileChanged message. Changes to prompt.md refresh the parser incrementally and reload
+    the chat widget only if a message changed; apps handle other paths in on_vibedir_file_changed.
+    """
 
-    def __init__(self, parser: VibedirPromptParser, chat_widget_id: str, *args, **kwargs):
+    def __init__(
+        self,
+        parser: VibedirPromptParser,
+        chat_widget_id: str,
+        *args,
+        watch_paths: Iterable[Union[str, Path]] = (),
+        debounce: float = 0.2,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
         self.parser = parser
         self.chat_widget_id = chat_widget_id
-        self.observer = Observer()
-        self.event_handler = self._create_handler()
-
-    def _create_handler(self):
-        class Handler(FileSystemEventHandler):
-            def on_modified(inner_self, event):
-                if event.src_path == str(self.parser.file_path):
-                    self.app.post_message(VibedirFileChanged())
-
-        return Handler()
+        self.watch_paths = [Path(path) for path in watch_paths]
+        self.file_watcher = FileWatcherService(debounce=debounce)
+        self._unwatch: List[Callable[[], None]] = []
 
     def on_mount(self) -> None:
-        self.observer.schedule(self.event_handler, str(self.parser.file_path.parent), recursive=False)
-        self.observer.start()
-
-    def on_unmount(self) -> None:
-        self.observer.stop()
-        self.observer.join()
+        for path in [self.parser.file_path, *self.watch_paths]:
+            self._unwatch.append(self.file_watcher.watch(path, self._post_file_change))
+        self.file_watcher.start()
 
+    def _post_file_change(self, change: FileChange) -> None:
+        # Called on the service's worker thread; post_message is thread-safe
+        self.post_message(VibedirFileChanged(change))
 
-class VibedirFileChanged(Message):
-    pass
-
+    def on_unmount(self) -> None:
+        self.file_watcher.stop()
+        for unwatch in self._unwatch:
+            unwatch()
+        self._unwatch.clear()
 
-# In your App:
-@on(VibedirFileChanged)
-def handle_file_change(self):
-    chat = self.query_one(f"#{self.chat_widget_id}", VibedirChatWidget)
-    chat.load_from_file()
+    def on_vibedir_file_changed(self, message: VibedirFileChanged) -> None:
+        if message.path != Path(os.path.abspath(self.parser.file_path)):
+            return
+        if self.parser.refresh() is not None:
+            self.query_one(f"#{self.chat_widget_id}").load_from_file()
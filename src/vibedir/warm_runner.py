@@ -0,0 +1,458 @@
+# vibedir/warm_runner.py
+"""
+Warm runner for Python-based [[command]] entries (warm = true).
+
+A long-lived worker process imports the heavy modules a command needs (e.g. pytest) once. Each
+run forks it: the fork gets its own session, working directory, argv and output pipe and exits
+when the command finishes, so nothing a run does leaks into the worker or into later runs. Only
+the import cost is shared.
+
+Protocol (one Unix socket connection per run): the client sends a JSON request line plus the
+write end of its output pipe (SCM_RIGHTS). A handler forked from the worker replies with
+{"pid": ...} once the command process is running, then with {"returncode": ...} after it exits,
+or with {"stale": true} if a preloaded module from the code base changed on disk.
+"""
+import asyncio
+import contextlib
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import runpy
+import selectors
+import shlex
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SHELL_SYNTAX = re.compile(r"[|&;<>()$`*?~\n]")  # Commands needing a shell always run cold
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class WarmCommand:
+    """A command resolved to a Python entry point that a warm worker can run in-process."""
+
+    mode: str  # "module" (python -m) or "entry_point" (console script)
+    target: str  # Module name, or "module:attr" for entry points
+    argv: Tuple[str, ...]
+
+    @property
+    def module(self) -> str:
+        return self.target.partition(":")[0]
+
+    @property
+    def preload(self) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """(modules to import, modules to import only if they are packages) to run this command warm."""
+        if self.mode == "entry_point":
+            return (self.module,), ()
+        # `python -m pkg` runs pkg/__main__.py, so importing pkg is safe; importing a plain module would run it
+        return (), (self.module,)
+
+
+@lru_cache(maxsize=None)
+def _console_scripts() -> Dict[str, str]:
+    from importlib.metadata import entry_points
+
+    eps = entry_points()
+    group = eps.select(group="console_scripts") if hasattr(eps, "select") else eps.get("console_scripts", [])
+    return {ep.name: ep.value.split("[", 1)[0].strip() for ep in group}
+
+
+def _same_file(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def resolve_warm_command(command: str) -> Optional[WarmCommand]:
+    """
+    Resolve a rendered command to a WarmCommand, or None if it must run in a cold subprocess.
+
+    Only plain `python -m module ...` (with vibedir's interpreter) and console scripts installed
+    alongside vibedir's interpreter qualify; anything needing a shell (pipes, redirects, globs,
+    variables, env assignments) does not.
+    """
+    if _SHELL_SYNTAX.search(command):
+        return None
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        return None
+    if not tokens or "=" in tokens[0]:
+        return None
+
+    executable = shutil.which(tokens[0])
+    if executable is None:
+        return None
+    if _same_file(executable, sys.executable):
+        if len(tokens) >= 3 and tokens[1] == "-m":
+            return WarmCommand("module", tokens[2], tuple(tokens[2:]))
+        return None
+
+    name = os.path.basename(tokens[0])
+    target = _console_scripts().get(name)
+    if target and _same_file(os.path.dirname(executable), os.path.dirname(sys.executable)):
+        return WarmCommand("entry_point", target, tuple(tokens))
+    return None
+
+
+def _read_line(fd: int, timeout: float) -> bytes:
+    """Read one line from a pipe, giving up (returning what was read) at EOF or after timeout seconds."""
+    deadline = time.monotonic() + timeout
+    data = b""
+    with selectors.DefaultSelector() as selector:
+        selector.register(fd, selectors.EVENT_READ)
+        while not data.endswith(b"\n"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not selector.select(remaining):
+                break
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            data += chunk
+    return data
+
+
+def _log_worker_stderr(stream, preload: Tuple[str, ...]) -> None:
+    """Relay a worker's stderr (output of its imports, handler tracebacks) to the log until it exits."""
+    with stream:
+        for line in iter(stream.readline, b""):
+            logger.warning(f"Warm runner {list(preload)}: {line.decode(errors='replace').rstrip()}")
+
+
+class WarmRunner:
+    """Client side of one warm worker process (see module docstring)."""
+
+    def __init__(
+        self, preload: Sequence[str], cwd: Path, if_package: Sequence[str] = (), start_timeout: float = 30.0
+    ):
+        """
+        Args:
+            preload: Modules the worker imports up front (third-party modules; code base modules
+                that change make the worker stale and force a restart)
+            cwd: Working directory for the worker and its runs (the code base)
+            if_package: Modules the worker imports only if they are packages
+            start_timeout: Seconds to wait for the worker's preloads before giving up (runs are then cold)
+        """
+        self.preload = tuple(preload)
+        self.if_package = tuple(if_package)
+        self.cwd = Path(cwd)
+        self.start_timeout = start_timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._socket_dir: Optional[str] = None
+        self._lock = threading.Lock()
+        self.failed_imports: Tuple[str, ...] = ()
+
+    @staticmethod
+    def supported() -> bool:
+        return hasattr(os, "fork") and hasattr(socket, "send_fds")
+
+    @property
+    def socket_path(self) -> Optional[str]:
+        return os.path.join(self._socket_dir, "warm.sock") if self._socket_dir else None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> bool:
+        """Start the worker (if not running) and wait until its imports are loaded. Returns False on failure."""
+        with self._lock:
+            if self.alive:
+                return True
+            self._stop()
+            self._socket_dir = tempfile.mkdtemp(prefix="vibedir-warm-")
+            options = [arg for name in self.if_package for arg in ("--if-package", name)]
+            self._process = subprocess.Popen(
+                [sys.executable, "-m", "vibedir.warm_runner", self.socket_path, str(self.cwd), *options, *self.preload],
+                cwd=str(self.cwd),
+                stdin=subprocess.PIPE,  # The worker exits when this closes (i.e. when vibedir exits)
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            relay = threading.Thread(
+                target=_log_worker_stderr, args=(self._process.stderr, self.preload), name="vibedir-warm-stderr"
+            )
+            relay.daemon = True
+            relay.start()
+            line = _read_line(self._process.stdout.fileno(), self.start_timeout)
+            try:
+                ready = json.loads(line)
+            except ValueError:
+                if not line and self._process.poll() is None:
+                    logger.warning(f"Warm runner for {self.preload} not ready after {self.start_timeout}s")
+                    self._process.kill()  # A hung preload would not notice stdin closing
+                else:
+                    logger.warning(f"Warm runner for {self.preload} failed to start")
+                self._stop()
+                return False
+            self.failed_imports = tuple(ready.get("failed", ()))
+            if self.failed_imports:
+                logger.warning(f"Warm runner could not preload {list(self.failed_imports)}")
+            logger.info(f"Warm runner ready with {list(self.preload)} preloaded")
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+
+    def _stop(self) -> None:
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.stdin.close()
+                try:
+                    self._process.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+                    self._process.wait()
+            self._process.stdout.close()
+            self._process = None  # The stderr relay thread closes stderr when it reaches EOF
+        if self._socket_dir is not None:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+            self._socket_dir = None
+
+    async def run(self, command: WarmCommand, sink: Callable[[bytes], None]) -> Optional[int]:
+        """
+        Run command in a fresh fork of the worker, streaming its combined stdout/stderr to sink.
+
+        Returns:
+            The exit code, or None if the command did not start (the caller should run it cold)
+        """
+        if not await asyncio.to_thread(self.start):
+            return None
+        loop = asyncio.get_running_loop()
+        read_fd, write_fd = os.pipe()
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(self.socket_path)
+            request = {"mode": command.mode, "target": command.target, "argv": command.argv, "cwd": str(self.cwd)}
+            socket.send_fds(conn, [json.dumps(request).encode() + b"\n"], [write_fd])
+        except OSError as exc:
+            logger.warning(f"Warm runner unavailable ({exc}); running cold")
+            conn.close()
+            os.close(read_fd)
+            self.close()
+            return None
+        finally:
+            os.close(write_fd)
+
+        conn.setblocking(False)
+        replies, writer = await asyncio.open_unix_connection(sock=conn)  # Keep writer: dropping it closes conn
+        output = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(output), os.fdopen(read_fd, "rb", buffering=0)
+        )
+        pid = None
+        try:
+            started = json.loads(await replies.readline() or b"{}")
+            pid = started.get("pid")
+            if pid is None:
+                if started.get("stale"):
+                    logger.info("Code base modules preloaded by the warm runner changed; restarting it")
+                self.close()
+                return None
+            while True:
+                chunk = await output.read(_READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sink(chunk)
+            finished = json.loads(await replies.readline() or b"{}")
+            if "returncode" not in finished:
+                logger.error("Warm runner exited while a command was running")
+                self.close()
+                return 1
+            return finished["returncode"]
+        except asyncio.CancelledError:
+            if pid is not None:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            raise
+        finally:
+            transport.close()
+            writer.close()
+
+
+# ---------------------------------------------------------------------------
+# Worker side (python -m vibedir.warm_runner <socket path> <code base> <modules...>)
+# ---------------------------------------------------------------------------
+
+
+def _code_base_modules(code_base: Path) -> Dict[str, int]:
+    """mtime_ns of every loaded module file inside the code base."""
+    mtimes = {}
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if not path:
+            continue
+        try:
+            resolved = Path(path).resolve()
+            if resolved.is_relative_to(code_base):
+                mtimes[str(resolved)] = resolved.stat().st_mtime_ns
+        except (OSError, ValueError):
+            continue
+    return mtimes
+
+
+def _is_stale(mtimes: Dict[str, int]) -> bool:
+    for path, mtime in mtimes.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def _exit_code(code) -> int:
+    """Exit status for a SystemExit code, as the interpreter would report it."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    sys.stderr.write(f"{code}\n")
+    return 1
+
+
+def _run_command(request: dict, output_fd: int) -> int:
+    """Run a request in this (freshly forked) process. Returns its exit status."""
+    code = 1
+    try:
+        os.setsid()  # Own process group, so cancelling kills the command and its children
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(output_fd, 1)
+        os.dup2(output_fd, 2)
+        os.close(devnull)
+        os.close(output_fd)
+        os.chdir(request["cwd"])
+        importlib.invalidate_caches()
+        sys.argv = list(request["argv"])
+        if request["mode"] == "module":
+            runpy.run_module(request["target"], run_name="__main__", alter_sys=True)
+            code = 0
+        else:
+            module_name, _, attr = request["target"].partition(":")
+            entry = importlib.import_module(module_name)
+            for part in attr.split("."):
+                entry = getattr(entry, part)
+            code = _exit_code(entry())
+    except SystemExit as exc:
+        code = _exit_code(exc.code)
+    except BaseException:
+        traceback.print_exc()
+    return code
+
+
+def _handle_connection(conn: socket.socket, mtimes: Dict[str, int]) -> None:
+    """
+    Serve one request in a process forked from the worker. Never returns: the handler exits with
+    os._exit, and the command process it forks leaves through SystemExit.
+    """
+    command_process = False
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        data, fds, _, _ = socket.recv_fds(conn, 65536, 1)
+        while not data.endswith(b"\n"):
+            more = conn.recv(65536)
+            if not more:
+                break
+            data += more
+        request = json.loads(data)
+        if _is_stale(mtimes):
+            conn.sendall(b'{"stale": true}\n')
+            os._exit(0)
+        pid = os.fork()
+        if pid == 0:
+            command_process = True
+            conn.close()
+            # A normal interpreter shutdown runs atexit handlers (e.g. coverage's) and flushes output
+            raise SystemExit(_run_command(request, fds[0]))
+        os.close(fds[0])
+        conn.sendall(json.dumps({"pid": pid}).encode() + b"\n")
+        _, status = os.waitpid(pid, 0)
+        conn.sendall(json.dumps({"returncode": os.waitstatus_to_exitcode(status)}).encode() + b"\n")
+    except BaseException:
+        if command_process:
+            raise
+        traceback.print_exc()  # To the worker's stderr, which the client logs; the client sees the connection close
+    finally:
+        if not command_process:
+            os._exit(0)
+
+
+def _preload(name: str, if_package: bool) -> bool:
+    try:
+        if if_package:
+            spec = importlib.util.find_spec(name)
+            if spec is None or spec.submodule_search_locations is None:
+                return True
+        # Keep stdout clean for the ready line, whatever the imports print
+        with contextlib.redirect_stdout(sys.stderr):
+            importlib.import_module(name)
+        return True
+    except BaseException:
+        return False
+
+
+def serve(socket_path: str, code_base: str, preload: Sequence[str], if_package: Sequence[str] = ()) -> None:
+    """Worker main loop: preload modules, then fork a handler per connection until stdin closes."""
+    failed = [name for name in preload if not _preload(name, False)]
+    failed += [name for name in if_package if not _preload(name, True)]
+    mtimes = _code_base_modules(Path(code_base).resolve())
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # Handlers are reaped automatically
+    sys.stdout.write(json.dumps({"ready": True, "failed": failed}) + "\n")
+    sys.stdout.flush()
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj is listener:
+                conn, _ = listener.accept()
+                if os.fork() == 0:
+                    selector.close()
+                    listener.close()
+                    _handle_connection(conn, mtimes)
+                conn.close()
+            elif not os.read(sys.stdin.fileno(), 1024):
+                listener.close()
+                return
+
+
+def _main(argv: Sequence[str]) -> None:
+    socket_path, code_base, *rest = argv
+    preload, if_package = [], []
+    while rest:
+        name = rest.pop(0)
+        if name == "--if-package":
+            if_package.append(rest.pop(0))
+        else:
+            preload.append(name)
+    serve(socket_path, code_base, preload, if_package)
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])
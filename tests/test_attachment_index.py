@@ -0,0 +1,75 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from vibedir.attachment_index import AttachmentIndex
+from vibedir.models.attachment import FileAttachment
+from vibedir.models.command_attachment import CommandAttachment
+
+
+def digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+@pytest.fixture
+def attachments(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "Tests.json").write_text("{}")
+    start = datetime(2025, 11, 23, 14, 22, 31, 222000)
+    result = []
+    for i in range(6):
+        source = tmp_path / "src" / f"mod{i % 2}.py"
+        source.write_text(str(i % 2))
+        result.append(
+            FileAttachment(
+                path=source, original_path=source, hash=digest(str(i % 2)), timestamp=start + timedelta(minutes=i)
+            )
+        )
+    result.append(
+        CommandAttachment(
+            name="Tests",
+            status="failed",
+            path=tmp_path / "Tests.json",
+            success_value=False,
+            output_path=tmp_path / "Tests_output.txt",
+            timestamp=start + timedelta(minutes=10),
+        )
+    )
+    odd = FileAttachment(
+        path=tmp_path / "src" / "mod0.py", hash="not-a-sha", timestamp=datetime(2025, 1, 1, tzinfo=timezone.utc)
+    )
+    result.append(odd)
+    return result
+
+
+def test_rows_round_trip(attachments):
+    index = AttachmentIndex(attachments)
+    assert len(index) == len(attachments)
+    for row, attachment in enumerate(attachments):
+        assert index[row] == attachment
+    assert index[-1].timestamp.tzinfo == timezone.utc
+    assert index[6].success_value is False and index[6].output is None
+    with pytest.raises(IndexError):
+        index[len(attachments)]
+
+
+def test_select_filters(attachments, tmp_path):
+    index = AttachmentIndex(attachments)
+    mod0 = tmp_path / "src" / "mod0.py"
+    assert list(index.rows_for_path(mod0)) == [0, 2, 4, 7]
+    assert list(index.rows_for_path(tmp_path / "nope.py")) == []
+    assert list(index.select(type="command")) == [6]
+    window = {"since": datetime(2025, 11, 23, 14, 24), "until": datetime(2025, 11, 23, 14, 27)}
+    assert list(index.select(path=mod0, **window)) == [2, 4]
+    assert list(index.select(hash=digest("1"))) == [1, 3, 5]
+    assert list(index.select(path=mod0, hash=digest("1"))) == []
+    assert list(index.select(hash="not-a-sha")) == [7]
+
+
+def test_compact_storage(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("")
+    index = AttachmentIndex(FileAttachment(path=path, original_path=path, hash=digest(str(i))) for i in range(1000))
+    assert index.nbytes() < 100 * 1000  # Strings are interned once; ~60 bytes of columns per row
+    assert len(index.rows_for_path(path)) == 1000
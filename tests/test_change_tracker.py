@@ -0,0 +1,180 @@
+import json
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from vibedir.change_tracker import ChangeTracker
+
+
+def bump(path, text):
+    """Write text and move the mtime so coarse-grained filesystems still see a change."""
+    before = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(text)
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "project"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "pkg" / "a.py").write_text("a = 1\n")
+    (root / "src" / "b.py").write_text("b = 1\n")
+    (root / "README.md").write_text("readme\n")
+    (root / ".git").mkdir()
+    (root / ".git" / "HEAD").write_text("ref\n")
+    (root / "__pycache__").mkdir()
+    (root / "__pycache__" / "x.pyc").write_text("x")
+    return root
+
+
+def relpaths(paths):
+    return [p.as_posix() for p in paths]
+
+
+def test_first_sweep_seeds_the_baseline(tree):
+    tracker = ChangeTracker(tree)
+    assert tracker.changed_files() == []
+    data = json.loads((tree / ".vibedir" / "file_index.json").read_text())
+    assert sorted(data["files"]) == ["README.md", "src/b.py", "src/pkg/a.py"]
+
+
+def test_changes_since_last_send_across_restarts(tree):
+    tracker = ChangeTracker(tree)
+    tracker.sweep()
+    tracker.mark_sent()
+
+    bump(tree / "src" / "b.py", "b = 2\n")
+    (tree / "README.md").unlink()
+    (tree / "src" / "new.py").write_text("new\n")
+    bump(tree / ".git" / "HEAD", "other\n")  # Hidden directories are ignored
+
+    assert relpaths(ChangeTracker(tree).changed_files()) == ["README.md", "src/b.py", "src/new.py"]
+
+
+def test_touch_and_same_content_rewrite_are_not_changes(tree):
+    tracker = ChangeTracker(tree)
+    tracker.sweep()
+    bump(tree / "src" / "b.py", "b = 1\n")
+    tracker.mark_sent()  # Hashes b.py, so later signature changes can be verified by content
+
+    bump(tree / "src" / "b.py", "b = 1\n")
+    bump(tree / "src" / "pkg" / "a.py", "a = 2\n")
+
+    restarted = ChangeTracker(tree)
+    assert relpaths(restarted.changed_files()) == ["src/pkg/a.py"]
+
+
+def test_notify_updates_only_dirty_paths(tree):
+    tracker = ChangeTracker(tree)
+    tracker.sweep()
+    tracker.mark_sent()
+
+    bump(tree / "src" / "b.py", "b = 2\n")
+    (tree / "src" / "pkg" / "a.py").unlink()
+    assert tracker.changed_files() == []  # No event yet
+
+    tracker.notify(str(tree / "src" / "b.py"))
+    tracker.notify(str(tree / "src" / "pkg" / "a.py"))
+    assert relpaths(tracker.changed_files()) == ["src/b.py", "src/pkg/a.py"]
+
+    bump(tree / "src" / "b.py", "b = 1\n")  # Reverted
+    tracker.notify(str(tree / "src" / "b.py"))
+    assert relpaths(tracker.changed_files()) == ["src/pkg/a.py"]
+
+    tracker.mark_sent()
+    assert tracker.changed_files() == []
+
+
+def test_directory_events(tree):
+    tracker = ChangeTracker(tree)
+    tracker.sweep()
+    tracker.mark_sent()
+
+    os.rename(tree / "src" / "pkg", tree / "src" / "renamed")
+    tracker.notify(str(tree / "src" / "pkg"), directory=True)
+    tracker.notify(str(tree / "src" / "renamed"), directory=True)
+
+    assert relpaths(tracker.changed_files()) == ["src/pkg/a.py", "src/renamed/a.py"]
+
+
+def test_observer_keeps_index_current(tree):
+    tracker = ChangeTracker(tree)
+    tracker.start()
+    try:
+        tracker.mark_sent()
+        (tree / "src" / "pkg" / "c.py").write_text("c\n")
+        deadline = time.monotonic() + 5
+        while not tracker.changed_files() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert relpaths(tracker.changed_files()) == ["src/pkg/c.py"]
+        assert tracker.has_changes()
+    finally:
+        tracker.stop()
+
+
+def test_edits_during_the_startup_sweep_are_recorded(tree):
+    ChangeTracker(tree).sweep()  # Seed the index
+    tracker = ChangeTracker(tree)
+    walk = tracker._walk
+
+    def walk_then_edit(*args):
+        found = walk(*args)
+        bump(tree / "src" / "b.py", "b = 2\n")  # After the sweep has seen b.py
+        return found
+
+    tracker._walk = walk_then_edit
+    tracker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not tracker.changed_files() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert relpaths(tracker.changed_files()) == ["src/b.py"]
+    finally:
+        tracker.stop()
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_paths_git_ignores_are_not_changes(tmp_path, monkeypatch):
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    popen = subprocess.Popen
+
+    def no_subprocesses(*args, **kwargs):
+        raise AssertionError(f"ChangeTracker ran {args[0]}")
+
+    monkeypatch.setattr(subprocess, "Popen", no_subprocesses)  # Ignore rules are matched in process
+    (root / ".gitignore").write_text("build/\n*.egg-info/\ncoverage.xml\n")
+    (root / "src" / "a.py").write_text("a = 1\n")
+    (root / "build" / "lib").mkdir(parents=True)
+    (root / "build" / "lib" / "a.py").write_text("a = 1\n")
+    tracker = ChangeTracker(root)
+    tracker.sweep()
+    tracker.mark_sent()
+    assert "build/lib/a.py" not in json.loads((root / ".vibedir" / "file_index.json").read_text())["files"]
+
+    (root / "pkg.egg-info").mkdir()
+    (root / "pkg.egg-info" / "PKG-INFO").write_text("info\n")
+    (root / "coverage.xml").write_text("<coverage/>\n")
+    bump(root / "src" / "a.py", "a = 2\n")
+    for path in ("pkg.egg-info/PKG-INFO", "coverage.xml", "src/a.py"):
+        tracker.notify(str(root / path))
+    tracker.notify(str(root / "pkg.egg-info"), directory=True)
+    assert relpaths(tracker.changed_files()) == ["src/a.py"]
+    assert relpaths(ChangeTracker(root).changed_files()) == ["src/a.py"]  # Startup sweep agrees
+
+    # A new ignore rule drops changes it now covers, and paths it no longer covers show up
+    bump(root / ".gitignore", "*.egg-info/\ncoverage.xml\nsrc/\n")
+    tracker.notify(str(root / ".gitignore"))
+    assert relpaths(tracker.changed_files()) == [".gitignore", "build/lib/a.py"]
+
+    # Files added to the index are tracked, so their changes count even where a rule ignores them
+    tracker.mark_sent()
+    (root / "coverage.xml").write_text("<coverage tracked/>\n")
+    with monkeypatch.context() as m:
+        m.setattr(subprocess, "Popen", popen)
+        subprocess.run(["git", "add", "-f", "coverage.xml"], cwd=root, check=True)
+    assert relpaths(tracker.changed_files()) == ["coverage.xml"]
@@ -0,0 +1,108 @@
+import os
+import re
+
+import pytest
+from prepdir import PrepdirOutputFile, PrepdirProcessor
+
+from vibedir.codebase_snapshot import CodebaseSnapshotBuilder, _prepdir_header
+
+UUID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+def bump(path, text):
+    """Write text and move the mtime so coarse-grained filesystems still see a change."""
+    before = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(text)
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "pkg" / "a.py").write_text(f"ID = '{UUID}'\n")
+    (root / "src" / "b.py").write_text("b = 1\n")
+    (root / "README.md").write_text("readme\n")
+    return root
+
+
+def body(text):
+    """Drop the header's first line (it holds the generation timestamp)."""
+    return text.split("\n", 1)[1]
+
+
+def test_matches_prepdir_output(project):
+    snapshot = CodebaseSnapshotBuilder(project).build()
+    expected = PrepdirProcessor(str(project), output_file=None, quiet=True).generate_output()[0].content
+
+    assert body(snapshot.text()) == body(expected)
+    assert UUID not in snapshot.text()
+    assert snapshot.paths == ["README.md", os.path.join("src", "b.py"), os.path.join("src", "pkg", "a.py")]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"scrub_hyphenated_uuids": False, "scrub_hyphenless_uuids": True},
+        {"scrub_hyphenless_uuids": True, "use_unique_placeholders": True, "replacement_uuid": UUID},
+    ],
+)
+def test_header_matches_the_installed_prepdir(project, options):
+    processor = PrepdirProcessor(str(project), output_file=None, quiet=True, **options)
+    output = processor.generate_output()[0].content
+    header = _prepdir_header(processor)
+
+    untimed = re.compile(r"(?<=^File listing generated )\S+")
+    output, header = untimed.sub("<time>", output), untimed.sub("<time>", header)
+    assert output.startswith(header)
+    first_line_after = output[len(header) :].split("\n", 1)[0]
+    assert "Begin File: 'README.md'" in first_line_after  # Nothing of prepdir's header is missing
+    parsed = PrepdirOutputFile.from_content(CodebaseSnapshotBuilder(project).build().text())  # Readable by prepdir
+    assert parsed.metadata["base_directory"] == str(project)
+    assert parsed.metadata["creator"].startswith("prepdir version ")
+    assert sorted(parsed.files) == sorted(PrepdirOutputFile.from_content(output).files)
+
+
+def test_only_changed_files_are_rendered(project):
+    builder = CodebaseSnapshotBuilder(project)
+    assert builder.build().rendered == 3
+
+    unchanged = builder.build()
+    assert (unchanged.rendered, unchanged.reused) == (0, 3)
+
+    bump(project / "src" / "b.py", "b = 2\n")
+    (project / "README.md").unlink()
+    (project / "src" / "c.py").write_text("c = 1\n")
+    snapshot = builder.build()
+
+    assert (snapshot.rendered, snapshot.reused) == (2, 1)
+    assert "b = 2" in snapshot.text() and "readme" not in snapshot.text()
+    expected = PrepdirProcessor(str(project), output_file=None, quiet=True).generate_output()[0].content
+    assert body(snapshot.text()) == body(expected)
+
+
+def test_cache_persists_across_sessions(project):
+    CodebaseSnapshotBuilder(project).build()
+    assert (project / ".vibedir" / "codebase_cache.json").is_file()
+
+    snapshot = CodebaseSnapshotBuilder(project).build()
+    assert (snapshot.rendered, snapshot.reused) == (0, 3)
+
+
+def test_prepdir_output_files_are_excluded(project):
+    dump = PrepdirProcessor(str(project), output_file=None, quiet=True).generate_output()[0].content
+    (project / "old_dump.txt").write_text(dump)
+
+    builder = CodebaseSnapshotBuilder(project)
+    assert "old_dump.txt" not in builder.build().paths
+    assert builder.build().rendered == 0  # The output-file check is cached too
+
+
+def test_write_gathers_sections(project, tmp_path):
+    snapshot = CodebaseSnapshotBuilder(project, cache_path=False).build()
+    out = tmp_path / "codebase.txt"
+
+    assert snapshot.write(out) == snapshot.nbytes
+    assert out.read_text() == snapshot.text()
+    assert not (project / ".vibedir").exists()
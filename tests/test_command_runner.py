@@ -0,0 +1,321 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import pytest
+
+from vibedir.command_runner import CommandResultCache, CommandScheduler, OutputTail, render_command
+from vibedir.models.command_attachment import CommandAttachment
+from vibedir.models.settings import CommandConfig, VibedirSettings
+
+PY = f'"{sys.executable}"'
+
+
+def cmd(name, command, depends_on=(), run_on=("changes_success",), **kwargs):
+    return CommandConfig(name=name, command=command, depends_on=depends_on, run_on=run_on, **kwargs)
+
+
+def log_cmd(name, log, delay=0.0, exit_code=0, **kwargs):
+    code = (
+        f"import time,sys; open(r'{log}','a').write('start {name}\\n'); time.sleep({delay}); "
+        f"open(r'{log}','a').write('end {name}\\n'); print('{name} output'); sys.exit({exit_code})"
+    )
+    return cmd(name, f'{PY} -c "{code}"', **kwargs)
+
+
+def test_render_command_nested_variables():
+    variables = {"base_directory": "/repo", "tests_directory": "{{ base_directory }}/tests"}
+    assert render_command("pytest {{ tests_directory }} {{unknown}}", variables) == "pytest /repo/tests {{unknown}}"
+    with pytest.raises(ValueError, match="nest too deeply"):
+        render_command("{{ a }}", {"a": "{{ b }}", "b": "{{ a }}"})
+
+
+def test_dependencies_run_in_order_and_independent_commands_in_parallel(tmp_path):
+    log = tmp_path / "log.txt"
+    commands = [
+        log_cmd("Format", log, delay=0.2),
+        log_cmd("Lint", log, delay=0.5, depends_on=("Format",)),
+        log_cmd("Tests", log, delay=0.5, depends_on=("Format",)),
+    ]
+    scheduler = CommandScheduler(commands, tmp_path, max_parallel=4)
+
+    started = time.perf_counter()
+    results = asyncio.run(scheduler.run("changes_success"))
+    elapsed = time.perf_counter() - started
+
+    lines = log.read_text().splitlines()
+    assert lines[:2] == ["start Format", "end Format"]
+    assert set(lines[2:4]) == {"start Lint", "start Tests"}  # Lint and Tests overlap
+    assert elapsed < 1.2  # Critical path (~0.7s), not the sum (~1.2s plus process startups)
+    assert all(result.success for result in results.values())
+    assert results["Lint"].output.strip() == "Lint output"
+    assert scheduler.statuses == {"Format": "success", "Lint": "success", "Tests": "success"}
+
+
+def test_max_parallel_serialises(tmp_path):
+    log = tmp_path / "log.txt"
+    commands = [log_cmd("A", log, delay=0.1), log_cmd("B", log, delay=0.1)]
+    asyncio.run(CommandScheduler(commands, tmp_path, max_parallel=1).run("changes_success"))
+    lines = log.read_text().splitlines()
+    assert lines in (["start A", "end A", "start B", "end B"], ["start B", "end B", "start A", "end A"])
+
+
+def test_failure_success_command_and_not_configured(tmp_path):
+    statuses = []
+    commands = [
+        cmd("Fails", f'{PY} -c "import sys; sys.exit(3)"'),
+        cmd("Custom", "true", success=f'{PY} -c "import sys; sys.exit(1)"'),
+        cmd("Empty", ""),
+        cmd("Manual", "true", run_on=()),
+    ]
+    scheduler = CommandScheduler(commands, tmp_path, on_status=lambda name, status: statuses.append((name, status)))
+    results = asyncio.run(scheduler.run("changes_success"))
+
+    assert results["Fails"].status == "failed"
+    assert results["Fails"].returncode == 3
+    assert results["Custom"].status == "failed"
+    assert results["Empty"].status == "not_configured"
+    assert "Manual" not in results
+    assert scheduler.statuses["Manual"] == "not_run"
+    assert ("Fails", "running") in statuses
+
+    assert asyncio.run(scheduler.run(names=["Manual"]))["Manual"].success
+
+
+def test_schedule_cancels_stale_run(tmp_path):
+    log = tmp_path / "log.txt"
+    scheduler = CommandScheduler([log_cmd("Slow", log, delay=5)], tmp_path)
+
+    async def main():
+        first = scheduler.schedule("changes_success")
+        await asyncio.sleep(0.3)
+        second = scheduler.schedule(names=[])
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await second
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    assert time.perf_counter() - started < 3
+    assert "end Slow" not in log.read_text()
+    assert scheduler.statuses["Slow"] == "not_run"
+
+
+def test_reschedule_while_dependent_waits_keeps_new_statuses(tmp_path):
+    log = tmp_path / "log.txt"
+    statuses = []
+    commands = [log_cmd("Format", log, delay=0.5), log_cmd("Lint", log, depends_on=("Format",))]
+    scheduler = CommandScheduler(commands, tmp_path, on_status=lambda name, status: statuses.append((name, status)))
+
+    async def main():
+        first = scheduler.schedule("changes_success")
+        await asyncio.sleep(0.2)  # Format running, Lint waiting for it
+        second = scheduler.schedule("changes_success")
+        await asyncio.sleep(0.2)
+        during = dict(scheduler.statuses)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return during, await second
+
+    during, results = asyncio.run(main())
+    assert during == {"Format": "running", "Lint": "waiting"}
+    assert all(result.success for result in results.values())
+    assert scheduler.statuses == {"Format": "success", "Lint": "success"}
+    # The cancelled run's reset comes before anything from the new run
+    second_run = statuses[statuses.index(("Lint", "not_run")) + 1 :]
+    assert ("Format", "not_run") not in second_run and ("Lint", "not_run") not in second_run
+
+
+def test_invalid_dependency_graph(tmp_path):
+    with pytest.raises(ValueError, match="unknown command"):
+        CommandScheduler([cmd("A", "true", depends_on=("B",))], tmp_path)
+    with pytest.raises(ValueError, match="cycle"):
+        CommandScheduler([cmd("A", "true", depends_on=("B",)), cmd("B", "true", depends_on=("A",))], tmp_path)
+
+
+def test_from_settings(tmp_path):
+    settings = VibedirSettings.model_validate(
+        {"max_parallel": 2, "command": [{"name": "Tests", "command": "pytest {{ tests_directory }}"}]}
+    )
+    scheduler = CommandScheduler.from_settings(settings, tmp_path)
+    assert scheduler.max_parallel == 2
+    assert render_command(scheduler.commands["Tests"].command, scheduler.variables) == f"pytest {tmp_path}/tests"
+
+
+def test_output_tail_keeps_last_bytes():
+    tail = OutputTail(max_bytes=10)
+    for chunk in (b"abc", b"defgh", b"ijklmn"):
+        tail.append(chunk)
+    assert tail.text() == "efghijklmn"
+    assert tail.truncated and tail.total_bytes == 14
+    tail.append(b"0123456789ABC")
+    assert tail.text() == "3456789ABC"
+
+
+def test_output_streams_to_attachment_file(tmp_path):
+    code = "import sys; [sys.stdout.write(f'line {i}\\n') for i in range(20000)]"
+    chunks = []
+    scheduler = CommandScheduler(
+        [cmd("Big Output", f'{PY} -c "{code}"')],
+        tmp_path,
+        output_dir=tmp_path / "out",
+        on_output=lambda name, chunk: chunks.append(name),
+        tail_bytes=100,
+    )
+    result = asyncio.run(scheduler.run("changes_success"))["Big Output"]
+
+    attachment = result.attachment
+    assert attachment.path == tmp_path / "out" / "Big_Output.json"
+    assert attachment.output_path == attachment.compute_output_path()
+    assert attachment.output is None
+    full = attachment.read_output()
+    assert full.count("\n") == 20000 and full.endswith("line 19999\n")
+    assert attachment.read_output(max_bytes=11) == "line 19999\n"
+
+    assert len(result.output) == 100 and full.endswith(result.output)
+    assert scheduler.tails["Big Output"].total_bytes == len(full)
+    assert chunks and set(chunks) == {"Big Output"}
+
+    saved = CommandAttachment.model_validate_json(attachment.path.read_text())
+    assert saved.status == "success" and saved.success_value is True
+
+
+class TestCommandResultCache:
+    def run_tests(self, tmp_path, log, **kwargs):
+        scheduler = CommandScheduler(
+            [log_cmd("Tests", log, inputs=("src/*.py",), **kwargs)],
+            tmp_path,
+            output_dir=tmp_path / ".vibedir" / "output",
+            cache=CommandResultCache(tmp_path / ".vibedir" / "command_cache"),
+        )
+        return asyncio.run(scheduler.run("changes_success"))["Tests"]
+
+    def test_hit_reuses_result_until_inputs_change(self, tmp_path):
+        log = tmp_path / "log.txt"
+        (tmp_path / "src").mkdir()
+        module = tmp_path / "src" / "mod.py"
+        module.write_text("x = 1\n")
+
+        first = self.run_tests(tmp_path, log)
+        assert not first.cached and first.success
+        second = self.run_tests(tmp_path, log)
+        assert second.cached and second.success
+        assert second.output.strip() == "Tests output"
+        assert second.attachment.read_output().strip() == "Tests output"
+        assert log.read_text().count("start Tests") == 1
+
+        module.write_text("x = 2\n")
+        assert not self.run_tests(tmp_path, log).cached
+        module.write_text("x = 1\n")  # Revert to an already-tested state
+        assert self.run_tests(tmp_path, log).cached
+        assert log.read_text().count("start Tests") == 2
+
+    def test_failures_cached_and_command_is_part_of_key(self, tmp_path):
+        log = tmp_path / "log.txt"
+        assert self.run_tests(tmp_path, log, exit_code=1).status == "failed"
+        cached = self.run_tests(tmp_path, log, exit_code=1)
+        assert cached.cached and cached.status == "failed"
+        assert not self.run_tests(tmp_path, log, exit_code=0).cached
+
+    def test_command_rewriting_its_inputs_is_not_cached(self, tmp_path):
+        counter = tmp_path / "count.py"
+        code = f"import pathlib; p = pathlib.Path(r'{counter}'); p.write_text(p.read_text() + '#')"
+        cache = CommandResultCache(tmp_path / "cache")
+        counter.write_text("")
+        scheduler = CommandScheduler([cmd("Format", f'{PY} -c "{code}"', inputs=("*.py",))], tmp_path, cache=cache)
+        for _ in range(2):
+            assert not asyncio.run(scheduler.run("changes_success"))["Format"].cached
+        assert counter.read_text() == "##"
+
+    def test_inputs_skip_hidden_and_vendored_directories(self, tmp_path, monkeypatch):
+        cache = CommandResultCache(tmp_path / "cache")
+        skipped = (".git/d.py", ".venv/lib/e.py", "node_modules/f.py", "cache/g.py")
+        for rel in ("a.py", "src/pkg/b.py", "src/c.txt", *skipped):
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text(rel)
+        walked = []
+        real_walk = os.walk
+
+        def recording_walk(top, *args, **kwargs):
+            for entry in real_walk(top, *args, **kwargs):
+                walked.append(entry[0])
+                yield entry
+
+        monkeypatch.setattr(os, "walk", recording_walk)
+        digest = cache.inputs_digest(tmp_path, ["**/*.py", "src/*.txt"])
+        assert not [w for w in walked if any(part in w for part in (".git", ".venv", "node_modules", "cache"))]
+
+        for rel in skipped:
+            (tmp_path / rel).write_text("changed")
+        assert cache.inputs_digest(tmp_path, ["**/*.py", "src/*.txt"]) == digest
+        (tmp_path / "src" / "c.txt").write_text("changed")
+        assert cache.inputs_digest(tmp_path, ["**/*.py", "src/*.txt"]) != digest
+
+    def test_inputs_naming_hidden_directories_are_matched(self, tmp_path, caplog):
+        cache = CommandResultCache(tmp_path / "cache")
+        files = (".github/workflows/ci.yml", "src/.hidden/a.py", "src/b.py", "node_modules/pkg/index.js", ".git/c.py")
+        for rel in files:
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text(rel)
+
+        for pattern, changed in [
+            (".github/workflows/*.yml", ".github/workflows/ci.yml"),
+            ("**/.hidden/*.py", "src/.hidden/a.py"),
+            ("node_modules/**/*.js", "node_modules/pkg/index.js"),
+        ]:
+            digest = cache.inputs_digest(tmp_path, [pattern])
+            (tmp_path / changed).write_text("changed")
+            assert cache.inputs_digest(tmp_path, [pattern]) != digest, pattern
+
+        with caplog.at_level(logging.WARNING, logger="vibedir.command_runner"):
+            cache.inputs_digest(tmp_path, ["**/*.rs", "**/*.py"])
+            cache.inputs_digest(tmp_path, ["**/*.rs", "**/*.py"])
+        warning = f"Command input '**/*.rs' matches no files under {tmp_path.resolve()}"
+        assert [record.getMessage() for record in caplog.records] == [warning]  # Once per pattern
+
+    def test_commands_without_inputs_always_run(self, tmp_path):
+        log = tmp_path / "log.txt"
+        scheduler = CommandScheduler([log_cmd("Lint", log)], tmp_path, cache=CommandResultCache(tmp_path / "cache"))
+        for _ in range(2):
+            asyncio.run(scheduler.run("changes_success"))
+        assert log.read_text().count("start Lint") == 2
+
+    def test_cache_errors_run_the_command_uncached(self, tmp_path, monkeypatch):
+        log = tmp_path / "log.txt"
+        assert not self.run_tests(tmp_path, log).cached
+
+        def vanished(*args):
+            raise FileNotFoundError("src/mod.py vanished while the inputs were hashed")
+
+        monkeypatch.setattr(CommandResultCache, "inputs_digest", vanished)
+        result = self.run_tests(tmp_path, log)
+        assert result.success and not result.cached
+        assert log.read_text().count("start Tests") == 2
+
+
+def test_unexpected_errors_fail_only_their_command(tmp_path, monkeypatch):
+    log = tmp_path / "log.txt"
+    commands = [log_cmd("Lint", log), log_cmd("Format", log), log_cmd("Tests", log, delay=0.3)]
+    scheduler = CommandScheduler(commands, tmp_path)
+    start_attachment, look_up_cache = scheduler._start_attachment, scheduler._look_up_cache
+
+    def broken_attachment(command):
+        if command.name == "Lint":
+            raise PermissionError("output directory is read-only")
+        return start_attachment(command)
+
+    async def broken_lookup(command, *args):
+        if command.name == "Format":
+            raise RuntimeError("unexpected")
+        return await look_up_cache(command, *args)
+
+    monkeypatch.setattr(scheduler, "_start_attachment", broken_attachment)
+    monkeypatch.setattr(scheduler, "_look_up_cache", broken_lookup)
+
+    results = asyncio.run(scheduler.run("changes_success"))
+    assert results["Lint"].status == "failed" and "read-only" in results["Lint"].output
+    assert results["Format"].status == "failed" and results["Format"].output == "unexpected"
+    assert results["Tests"].success  # Its siblings' errors did not orphan it
+    assert scheduler.statuses == {"Lint": "failed", "Format": "failed", "Tests": "success"}
@@ -4,6 +4,7 @@ import logging
 import os
 import pytest
 import sys
+import time
 from pathlib import Path
 from unittest.mock import patch
 
@@ -11,6 +12,8 @@ import tomlkit
 from dynaconf import Dynaconf
 
 from vibedir.config import (
+    ConfigWriter,
+    clear_config_cache,
     load_config,
     init_config,
     save_config,
@@ -140,6 +143,31 @@ def test_load_config_falls_back_to_bundled(clean_cwd, bundled_dict):
     assert config.clipboard_max_chars_per_file == bundled_dict["clipboard_max_chars_per_file"]
 
 
+def test_load_config_is_cached_until_a_source_changes(clean_cwd):
+    custom_path = clean_cwd / "myconfig.toml"
+    custom_path.write_text('mode = "api"\n')
+
+    first = load_config("vibedir", config_path=str(custom_path), quiet=True)
+    assert load_config("vibedir", config_path=str(custom_path), quiet=True) is first
+
+    custom_path.write_text('mode = "clipboard"\nclipboard_max_chars_per_file = 1\n')
+    second = load_config("vibedir", config_path=str(custom_path), quiet=True)
+    assert second is not first
+    assert second.mode == "clipboard"
+
+    clear_config_cache()
+    assert load_config("vibedir", config_path=str(custom_path), quiet=True) is not second
+
+
+def test_load_config_bundled_does_not_write_temp_file(clean_cwd):
+    clear_config_cache()
+    with patch.dict(os.environ, {"VIBEDIR_SKIP_CONFIG_FILE_LOAD": "true"}), patch(
+        "tempfile.NamedTemporaryFile", side_effect=AssertionError("temp file written")
+    ):
+        config = load_config("vibedir", quiet=True)
+    assert config.mode == "clipboard"
+
+
 def test_init_config_creates_file_from_bundled(clean_cwd):
     target = clean_cwd / ".vibedir" / "config.toml"
 
@@ -224,6 +252,72 @@ def test_save_config_to_explicit_path(clean_cwd):
     assert doc["mode"] == "api"
 
 
+def test_save_config_writes_atomically(clean_cwd):
+    init_config("vibedir", force=True, quiet=True)
+    path = clean_cwd / ".vibedir" / "config.toml"
+
+    with patch("vibedir.config.tomlkit.dump", side_effect=RuntimeError("disk full")):
+        with pytest.raises(RuntimeError):
+            save_config("vibedir", {"mode": "api"}, quiet=True)
+
+    # The original file is untouched and no temp files are left behind
+    assert tomlkit.loads(path.read_text())["mode"] == "clipboard"
+    assert [p.name for p in path.parent.iterdir()] == ["config.toml"]
+
+
+def test_config_writer_coalesces_updates(clean_cwd):
+    path = clean_cwd / ".vibedir" / "config.toml"
+    writer = ConfigWriter("vibedir", debounce=60)
+
+    for value in (True, False, True):
+        writer.update({"auto_diff": value})
+    writer.update({"llm.model": "claude-3"})
+
+    assert writer.pending
+    assert not path.exists()  # Nothing written inside the debounce window
+    assert writer.flush() == path
+    assert writer.writes == 1
+    assert not writer.pending
+    assert writer.flush() is None
+
+    doc = tomlkit.loads(path.read_text())
+    assert doc["auto_diff"] is True
+    assert doc["llm"]["model"] == "claude-3"
+    assert "# The mode determines" in path.read_text()  # Comments preserved
+
+
+def test_config_writer_debounce_timer_writes(clean_cwd):
+    path = clean_cwd / ".vibedir" / "config.toml"
+    writer = ConfigWriter("vibedir", debounce=0.05)
+    writer.update({"mode": "api"})
+    writer.update({"auto_commit": "off"})
+
+    deadline = time.monotonic() + 5
+    while not writer.writes and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert writer.writes == 1
+    doc = tomlkit.loads(path.read_text())  # Written by the timer, without a flush()
+    assert doc["mode"] == "api"
+    assert doc["auto_commit"] == "off"
+    config = load_config("vibedir", quiet=True)
+    assert config.mode == "api"
+    assert config.auto_commit == "off"
+
+
+def test_config_writer_keeps_external_edits(clean_cwd):
+    path = clean_cwd / ".vibedir" / "config.toml"
+    init_config("vibedir", force=True, quiet=True)
+    with ConfigWriter("vibedir", debounce=60) as writer:
+        writer.update({"mode": "api"})
+        save_config("vibedir", {"auto_commit": "latest"}, quiet=True)  # Concurrent writer
+        os.utime(path, ns=(0, 0))  # Ensure the change is visible on coarse mtime filesystems
+
+    doc = tomlkit.loads(path.read_text())
+    assert doc["mode"] == "api"
+    assert doc["auto_commit"] == "latest"
+
+
 def test_home_and_local_config_path():
     home, local = home_and_local_config_path("vibedir")
     assert home == Path.home() / ".vibedir" / "config.toml"
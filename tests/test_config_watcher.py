@@ -0,0 +1,186 @@
+import os
+import time
+
+import pytest
+import tomlkit
+
+from vibedir.config import load_config
+from vibedir.config_watcher import ConfigWatcher, diff_config_keys, merge_config_layers
+from vibedir.file_watcher import FileWatcherService
+from vibedir.models.command_status import CommandStatus
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    home = tmp_path / "home"
+    (home / ".vibedir").mkdir(parents=True)
+    monkeypatch.setenv("HOME", str(home))
+    cwd = tmp_path / "project"
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+    return home, cwd
+
+
+def write_and_bump(path, text):
+    """Write text and make sure the mtime moves even on coarse-grained filesystems."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    before = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(text)
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+
+
+def test_merge_config_layers_matches_load_config_rules():
+    merged = merge_config_layers(
+        [
+            {"mode": "clipboard", "llm": {"model": "a"}, "command": [{"name": "A"}]},
+            {"mode": "api", "llm": {"other": 1}, "command": [{"name": "B"}]},
+        ]
+    )
+    assert merged == {"mode": "api", "llm": {"model": "a", "other": 1}, "command": [{"name": "A"}, {"name": "B"}]}
+
+
+@pytest.mark.parametrize("repeat", ["all", "first"])
+def test_merged_commands_match_load_config(project, repeat):
+    _, cwd = project
+    bundled = ConfigWatcher().get("command")
+    local = bundled if repeat == "all" else bundled[:1] + [{"name": "Extra", "command": "echo extra"}]
+    (cwd / ".vibedir").mkdir()
+    (cwd / ".vibedir" / "config.toml").write_text(tomlkit.dumps({"command": local}))
+
+    loaded = [dict(cmd) for cmd in load_config("vibedir", quiet=True).get("command")]
+    assert ConfigWatcher().get("command") == loaded
+
+
+def test_merge_unique_lists():
+    merged = merge_config_layers([{"tags": ["a", "b"]}, {"tags": ["b", "c", "dynaconf_merge_unique"]}])
+    assert merged == {"tags": ["a", "b", "c"]}
+
+
+def test_diff_config_keys():
+    old = {"mode": "api", "llm": {"model": "a"}, "command": [1]}
+    new = {"mode": "api", "llm": {"model": "b", "x": 1}, "command": [1, 2]}
+    assert diff_config_keys(old, new) == {"llm.model", "llm.x", "command"}
+
+
+def test_initial_config_includes_bundled(project):
+    watcher = ConfigWatcher()
+    assert watcher.get("mode") == "clipboard"
+    assert watcher.get("llm.model") == "grok-4"
+    assert watcher.get("llm.missing", "default") == "default"
+
+
+def test_local_edit_publishes_changed_keys(project):
+    _, cwd = project
+    watcher = ConfigWatcher()
+    received = []
+    watcher.subscribe(received.append)
+    icons = []
+    watcher.subscribe(icons.append, keys=["status_icons"])
+
+    write_and_bump(cwd / ".vibedir" / "config.toml", 'mode = "api"\n')
+    changes = watcher.refresh()
+
+    assert [c.layer for c in changes] == ["local"]
+    assert received[0].changed_keys == {"mode"}
+    assert watcher.get("mode") == "api"
+    assert icons == []  # Filtered out: status_icons did not change
+
+    assert watcher.refresh() == []  # Unchanged files are not re-parsed
+
+
+def test_status_icons_subscriber_updates_command_status(project):
+    home, _ = project
+    watcher = ConfigWatcher()
+    status = CommandStatus(lazy=True)
+    status.update_icons(watcher.get("status_icons", {}))
+    watcher.subscribe(lambda c: status.update_icons(c.config.get("status_icons", {})), keys=["status_icons"])
+
+    write_and_bump(home / ".vibedir" / "config.toml", '[status_icons]\nsuccess = "👍"\n')
+    watcher.refresh()
+    assert status.get_icon("success") == "👍"
+
+    write_and_bump(home / ".vibedir" / "config.toml", "")
+    watcher.refresh()
+    assert status.get_icon("success") == "✅"
+
+
+def test_invalid_toml_keeps_last_good_layer(project):
+    _, cwd = project
+    local = cwd / ".vibedir" / "config.toml"
+    write_and_bump(local, 'mode = "api"\n')
+    watcher = ConfigWatcher()
+    write_and_bump(local, "mode = \n")
+    assert watcher.refresh() == []
+    assert watcher.get("mode") == "api"
+
+
+def test_observer_picks_up_changes(project):
+    _, cwd = project
+    (cwd / ".vibedir").mkdir()
+    watcher = ConfigWatcher()
+    received = []
+    watcher.subscribe(received.append)
+    watcher.start()
+    try:
+        write_and_bump(cwd / ".vibedir" / "config.toml", 'mode = "api"\n')
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        watcher.stop()
+    assert received and received[-1].config["mode"] == "api"
+
+
+def test_observer_picks_up_config_in_new_directory(project):
+    _, cwd = project
+    watcher = ConfigWatcher()
+    received = []
+    watcher.subscribe(received.append)
+    watcher.start()
+    try:
+        write_and_bump(cwd / ".vibedir" / "config.toml", 'mode = "api"\n')  # Creates .vibedir too
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        watcher.stop()
+    assert received and received[-1].config["mode"] == "api"
+
+
+def test_shared_file_watcher_service(project):
+    _, cwd = project
+    (cwd / ".vibedir").mkdir()
+    watcher = ConfigWatcher()
+    received = []
+    watcher.subscribe(received.append)
+    service = FileWatcherService(debounce=0.05)
+    watcher.start(service)
+    service.start()
+    try:
+        write_and_bump(cwd / ".vibedir" / "config.toml", 'mode = "api"\n')
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        service.stop()
+        watcher.stop()
+    assert len(received) == 1 and received[0].config["mode"] == "api"
+
+
+def test_shared_service_picks_up_config_in_new_directory(project):
+    _, cwd = project
+    watcher = ConfigWatcher()
+    received = []
+    watcher.subscribe(received.append)
+    service = FileWatcherService(debounce=0.05)
+    watcher.start(service)
+    service.start()
+    try:
+        write_and_bump(cwd / ".vibedir" / "config.toml", 'mode = "api"\n')
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        service.stop()
+        watcher.stop()
+    assert len(received) == 1 and received[0].config["mode"] == "api"
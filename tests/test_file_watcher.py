@@ -0,0 +1,140 @@
+import os
+import time
+
+import pytest
+
+from vibedir.file_watcher import FileChange, FileWatcherService
+
+
+def bump(path, text, offset=1):
+    """Write text and move the mtime so coarse-grained filesystems still see a change."""
+    before = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(text)
+    os.utime(path, ns=(before + offset * 10**9, before + offset * 10**9))
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.fixture
+def service():
+    service = FileWatcherService(debounce=0.1)
+    yield service
+    service.stop()
+
+
+def test_check_publishes_real_changes_only(tmp_path, service):
+    path = tmp_path / "prompt.md"
+    path.write_text("one")
+    changes = []
+    service.watch(path, changes.append)
+
+    assert service.check(path) is None
+    bump(path, "one")  # Same content, new mtime
+    assert service.check(path) is None
+    bump(path, "two")
+    change = service.check(path)
+    assert change == FileChange(path, "modified", change.digest) and change.digest
+    path.unlink()
+    assert service.check(path).kind == "deleted"
+    path.write_text("three")
+    assert service.check(path).kind == "created"
+    assert [c.kind for c in changes] == ["modified", "deleted", "created"]
+
+
+def test_unwatch(tmp_path, service):
+    path = tmp_path / "applydir.json"
+    changes = []
+    unwatch = service.watch(path, changes.append)
+    unwatch()
+    path.write_text("{}")
+    assert service.check(path) is None
+    assert changes == []
+
+
+def test_burst_of_events_is_coalesced(tmp_path, service):
+    path = tmp_path / "prompt.md"
+    path.write_text("start")
+    changes = []
+    service.watch(path, changes.append)
+    service.start()
+
+    for _ in range(5):
+        service.notify(path)
+        time.sleep(0.02)
+    bump(path, "end")
+    service.notify(path)
+
+    assert wait_for(lambda: changes)
+    time.sleep(0.3)
+    assert [c.kind for c in changes] == ["modified"]
+
+
+def test_file_in_a_directory_created_later(tmp_path, service):
+    path = tmp_path / ".vibedir" / "nested" / "config.toml"
+    changes = []
+    service.watch(path, changes.append)
+    service.start()
+
+    path.parent.mkdir(parents=True)
+    path.write_text("mode = 'api'\n")
+
+    assert wait_for(lambda: changes)
+    assert changes[0].kind == "created"
+
+
+def test_max_delay_bounds_a_continuous_burst(tmp_path):
+    path = tmp_path / "prompt.md"
+    path.write_text("start")
+    service = FileWatcherService(debounce=0.2, max_delay=0.3)
+    changes = []
+    service.watch(path, changes.append)
+    service.start()
+    try:
+        bump(path, "changed")
+        start = time.monotonic()
+        while not changes and time.monotonic() - start < 2:
+            service.notify(path)  # Events keep arriving faster than the debounce window
+            time.sleep(0.05)
+        assert changes and time.monotonic() - start < 1.0
+    finally:
+        service.stop()
+
+
+def test_atomic_rename_save_is_one_change(tmp_path, service):
+    path = tmp_path / "prompt.md"
+    other = tmp_path / "config.toml"
+    path.write_text("old")
+    changes = []
+    service.watch(path, changes.append)
+    service.watch(other, changes.append)
+    service.start()
+
+    # Editor-style save: write a temp file, flush it in pieces, rename over the target
+    tmp = tmp_path / ".prompt.md.swp"
+    with open(tmp, "w") as f:
+        for part in ("n", "e", "w"):
+            f.write(part)
+            f.flush()
+    os.replace(tmp, path)
+
+    assert wait_for(lambda: changes)
+    time.sleep(0.3)
+    assert len(changes) == 1
+    assert changes[0].path == path and changes[0].kind == "modified"
+
+
+def test_file_created_after_start(tmp_path, service):
+    path = tmp_path / "applydir.json"
+    changes = []
+    service.watch(path, changes.append)
+    service.start()
+
+    path.write_text("{}")
+
+    assert wait_for(lambda: changes)
+    assert changes[0].kind == "created"
@@ -0,0 +1,140 @@
+import shutil
+import subprocess
+
+import pytest
+
+from vibedir.gitignore import IgnoreRules, parse_pattern, read_index_paths
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+GITIGNORE = """\
+# comment
+*.log
+!keep.log
+build/
+/dist
+docs/**/*.tmp
+**/cache
+src/**
+!src/*.py
+\\#literal
+trailing\\
+data/[abc].bin
+out?/
+"""
+
+PATHS = [
+    ("app.log", False),
+    ("keep.log", False),
+    ("sub/keep.log", False),
+    ("sub/deep/app.log", False),
+    ("build", True),
+    ("build/lib/a.py", False),
+    ("sub/build", True),
+    ("sub/build/x", False),
+    ("dist", True),
+    ("dist/x", False),
+    ("sub/dist", True),
+    ("docs/a.tmp", False),
+    ("docs/x/y/a.tmp", False),
+    ("docs/x/y/a.md", False),
+    ("cache", True),
+    ("a/b/cache", True),
+    ("a/b/cache/file", False),
+    ("src/a.py", False),
+    ("src/a.txt", False),
+    ("src/pkg", True),
+    ("src/pkg/b.py", False),
+    ("#literal", False),
+    ("trailing ", False),
+    ("trailing", False),
+    ("data/a.bin", False),
+    ("data/d.bin", False),
+    ("out1", True),
+    ("out12", True),
+    ("lib/nested/x.log", False),
+    ("lib/nested/keep.txt", False),
+    ("lib/nested/deeper/y.txt", False),
+]
+
+
+def git(root, *args, stdin=None):
+    return subprocess.run(["git", *args], cwd=root, input=stdin, capture_output=True, text=True, check=False)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))  # No user excludes file
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "home" / ".config"))
+    root = tmp_path / "repo"
+    root.mkdir()
+    git(root, "init", "-q")
+    (root / ".gitignore").write_text(GITIGNORE)
+    (root / "lib" / "nested").mkdir(parents=True)
+    (root / "lib" / "nested" / ".gitignore").write_text("!x.log\n*.txt\n!keep.txt\ndeeper/\n")
+    (root / ".git" / "info" / "exclude").write_text("*.bin\n!data/d.bin\n")
+    return root
+
+
+def git_ignored(root, paths):
+    """Paths git check-ignore reports as ignored (directories are asked about with a trailing slash)."""
+    queries = [f"{path}/" if is_dir else path for path, is_dir in paths]
+    result = git(root, "check-ignore", "--no-index", "-z", "--stdin", stdin="\0".join(queries) + "\0")
+    return {path.rstrip("/") for path in result.stdout.split("\0") if path}
+
+
+def test_rules_match_git_check_ignore(repo):
+    rules = IgnoreRules.find(repo)
+    rules.load_directory("")
+    rules.load_directory("lib/nested")
+    expected = git_ignored(repo, PATHS)
+    assert {path for path, is_dir in PATHS if rules.ignored(path, is_dir)} == expected
+    assert "build/lib/a.py" in expected and "src/a.py" not in expected  # The comparison covers both outcomes
+
+
+def test_rules_for_a_subdirectory_and_the_user_excludes_file(repo, tmp_path):
+    (repo / "sub").mkdir()
+    (tmp_path / "home" / ".config" / "git").mkdir(parents=True)
+    (tmp_path / "home" / ".config" / "git" / "ignore").write_text("*.swp\n")
+    rules = IgnoreRules.find(repo / "sub")
+    rules.load_directory("")
+    assert rules.ignored("x.swp") and rules.ignored("app.log") and rules.ignored("build", True)
+    assert not rules.ignored("keep.log") and not rules.ignored("a.py")
+    assert IgnoreRules.find(tmp_path / "home") is None
+
+
+def test_tracked_files_are_never_ignored(repo):
+    (repo / "build").mkdir()
+    (repo / "build" / "tracked.txt").write_text("t\n")
+    (repo / "build" / "other.txt").write_text("o\n")
+    (repo / "app.log").write_text("log\n")
+    rules = IgnoreRules.find(repo)
+    rules.load_directory("")
+    assert rules.ignored("build", True) and rules.refresh_tracked() == set()
+
+    git(repo, "add", "-f", "build/tracked.txt", "app.log")
+    assert rules.refresh_tracked() == {"build/tracked.txt", "app.log"}
+    assert not rules.ignored("build", True)  # Still scanned: it holds a tracked file
+    assert not rules.ignored("build/tracked.txt") and not rules.ignored("app.log")
+    assert rules.ignored("build/other.txt")
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_read_index_paths(repo, version):
+    names = ["a.py", "src/pkg/module.py", "src/pkg/module_test.py", "src/other.py", "x" * 40 + ".txt"]
+    for name in names:
+        (repo / name).parent.mkdir(parents=True, exist_ok=True)
+        (repo / name).write_text(name)
+    git(repo, "add", "-f", *names)
+    git(repo, "update-index", f"--index-version={version}")
+    if version == 3:
+        git(repo, "update-index", "--skip-worktree", "a.py")  # Sets the extended flags
+    assert read_index_paths(repo / ".git" / "index") == set(git(repo, "ls-files", "-z").stdout.split("\0")) - {""}
+
+
+def test_parse_pattern_skips_blank_lines_and_comments():
+    assert parse_pattern("") is None
+    assert parse_pattern("   ") is None
+    assert parse_pattern("# note") is None
+    assert parse_pattern("/") is None
+    assert parse_pattern("!build/") == (parse_pattern("build/").regex, True, True)
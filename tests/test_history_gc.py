@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+from vibedir.history_gc import HistoryGC, start_history_gc
+from vibedir.models.settings import HistoryConfig
+from vibedir.object_store import ObjectStore, store_history_entry
+
+
+@pytest.fixture
+def vibedir_dir(tmp_path):
+    return tmp_path / ".vibedir"
+
+
+def make_history(vibedir_dir, tmp_path, count, shared_size=1000, own_size=0):
+    """count entries, each attaching shared.bin plus its own unique.bin; returns the entry dirs."""
+    store = ObjectStore(vibedir_dir / "objects")
+    shared = tmp_path / "shared.bin"
+    shared.write_bytes(b"s" * shared_size)
+    entries = []
+    for i in range(count):
+        unique = tmp_path / "unique.bin"
+        unique.write_bytes(str(i).encode() * 100)
+        entry = store_history_entry(
+            store, vibedir_dir / "history", "User", [shared, unique], when=datetime(2025, 1, 1, 0, 0, i)
+        )
+        if own_size:
+            (entry / "Tests.txt").write_bytes(b"o" * own_size)
+        entries.append(entry)
+    return store, entries
+
+
+def test_retention_evicts_oldest_and_keeps_shared_blobs(vibedir_dir, tmp_path):
+    store, entries = make_history(vibedir_dir, tmp_path, 5)
+    assert len(list(store.digests())) == 6
+
+    result = HistoryGC(vibedir_dir / "history", store, retention_messages=2, max_total_size_mb=0).collect()
+    assert result.entries_removed == 3 and result.entries_kept == 2
+    assert result.blobs_removed == 3  # The evicted entries' unique blobs; shared.bin is still referenced
+    assert [e.exists() for e in entries] == [False, False, False, True, True]
+    assert len(list(store.digests())) == 3
+    assert (entries[-1] / "shared.bin").read_bytes() == b"s" * 1000
+
+
+def test_size_limit_counts_shared_blobs_once(vibedir_dir, tmp_path):
+    mb = 1024 * 1024
+    store, entries = make_history(vibedir_dir, tmp_path, 4, shared_size=mb, own_size=mb // 2)
+    gc = HistoryGC(vibedir_dir / "history", store, retention_messages=0, max_total_size_mb=2.5)
+    result = gc.collect()
+    # shared 1 MB once + 0.5 MB own per entry (+ tiny unique blobs): 2 entries fit in 2.5 MB
+    assert result.entries_kept == 2
+    assert result.total_bytes <= 2.5 * mb
+    assert result.bytes_freed >= mb
+
+
+def test_index_avoids_rescans_and_orphans_are_removed(vibedir_dir, tmp_path, monkeypatch):
+    store, entries = make_history(vibedir_dir, tmp_path, 3)
+    orphan = tmp_path / "orphan.bin"
+    orphan.write_bytes(b"nobody refers to me")
+    orphan_digest = store.put(orphan)
+
+    assert HistoryGC(vibedir_dir / "history", store).collect().blobs_removed == 1
+    assert orphan_digest not in store
+
+    gc = HistoryGC(vibedir_dir / "history", store)
+    scanned = []
+    original = gc._scan_entry
+    monkeypatch.setattr(gc, "_scan_entry", lambda name: scanned.append(name) or original(name))
+    make_history(vibedir_dir, tmp_path, 0)
+    store_history_entry(store, vibedir_dir / "history", "Assistant", [orphan], when=datetime(2025, 1, 2))
+    assert gc.collect().entries_removed == 0
+    assert scanned == ["2025-01-02T00:00:00.000_Assistant"]
+
+
+def test_background_start(vibedir_dir, tmp_path):
+    make_history(vibedir_dir, tmp_path, 3)
+    assert start_history_gc(vibedir_dir, HistoryConfig(auto_cleanup_on_startup=False)) is None
+
+    gc = start_history_gc(vibedir_dir, HistoryConfig(retention_messages=1))
+    gc._thread.join(10)
+    assert gc.last_result.entries_removed == 2
+    assert len(list((vibedir_dir / "history").iterdir())) == 2  # One entry plus the index
+
+
+def test_stop_interrupts_pass(vibedir_dir, tmp_path):
+    store, _ = make_history(vibedir_dir, tmp_path, 3)
+    gc = HistoryGC(vibedir_dir / "history", store, retention_messages=1)
+    gc._stop.set()
+    assert not gc.collect().completed
+    assert len(list(store.digests())) == 4
@@ -0,0 +1,134 @@
+import asyncio
+import sys
+
+import pytest
+
+from vibedir.command_runner import CommandScheduler
+from vibedir.impact import ImpactSelector, RunPlan, read_coverage_contexts
+from vibedir.models.settings import CommandConfig, VibedirSettings
+
+coverage = pytest.importorskip("coverage")
+
+
+def write_coverage(base, lines_by_context):
+    data = coverage.CoverageData(basename=str(base / ".coverage"))
+    for context, files in lines_by_context.items():
+        data.set_context(context)
+        data.add_lines({str(base / file): [1] for file in files})
+    data.write()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    for file in ("src/a.py", "src/b.py", "src/unused.py", "tests/test_a.py", "tests/test_b.py", "tests/helpers.py"):
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).write_text("")
+    write_coverage(
+        tmp_path,
+        {
+            "tests/test_a.py::test_one|run": ["src/a.py", "tests/test_a.py"],
+            "tests/test_a.py::test_one|setup": ["tests/helpers.py"],
+            "tests/test_b.py::test_two|run": ["src/a.py", "src/b.py", "tests/test_b.py"],
+            "": ["src/unused.py"],  # Import-time only
+        },
+    )
+    return tmp_path
+
+
+def selector(repo, **kwargs):
+    return ImpactSelector(repo, repo / "tests", repo / ".vibedir" / "test_impact.json", **kwargs)
+
+
+def test_read_coverage_contexts(repo):
+    tests_by_file = read_coverage_contexts(repo / ".coverage", repo)
+    assert tests_by_file["src/a.py"] == {"tests/test_a.py::test_one", "tests/test_b.py::test_two"}
+    assert tests_by_file["tests/helpers.py"] == {"tests/test_a.py::test_one"}
+    assert tests_by_file["src/unused.py"] == set()
+
+
+def test_plan_selects_affected_tests(repo):
+    impact = selector(repo)
+    assert impact.plan([repo / "src/b.py"]).full  # No map yet
+    impact.record_run(RunPlan(full=True))
+
+    reloaded = selector(repo)  # Map persisted
+    assert reloaded.plan([repo / "src/b.py"]).tests == ("tests/test_b.py::test_two",)
+    assert reloaded.plan(["src/a.py"]).tests == ("tests/test_a.py::test_one", "tests/test_b.py::test_two")
+    assert reloaded.plan([repo / "tests/test_a.py", repo / "src/a.py"]).tests == (
+        "tests/test_a.py",
+        "tests/test_b.py::test_two",
+    )
+    assert reloaded.plan([repo / "src/unused.py"]).empty  # Imported, but run by no test
+    assert reloaded.plan([repo / "src/unused.py", repo / "README.md"]).full
+    assert reloaded.plan([repo / ".vibedir/config.toml"]).full
+    assert reloaded.plan([repo / "src/new.py"]).full
+    assert reloaded.plan([repo / "tests/helpers.py"]).tests == ("tests/test_a.py::test_one",)
+    assert reloaded.plan([repo / "tests/conftest.py"]).full
+    assert reloaded.plan([repo / "tests/new_helper.py"]).full
+    (repo / "tests" / "test_data.json").write_text("{}")
+    assert reloaded.plan([repo / "tests/test_data.json"]).full  # Data files are not test modules, but tests read them
+    assert reloaded.plan(None).full
+    assert reloaded.variables(reloaded.plan([repo / "src/b.py"])) == {"selected_tests": "tests/test_b.py::test_two"}
+    assert reloaded.variables(RunPlan(full=True)) == {"selected_tests": str(repo / "tests")}
+
+
+def test_selective_runs_patch_map_and_force_periodic_full_run(repo):
+    impact = selector(repo, full_run_every=2)
+    impact.record_run(RunPlan(full=True))
+
+    # test_two no longer touches src/a.py
+    write_coverage(repo, {"tests/test_b.py::test_two|run": ["src/b.py"]})
+    impact.record_run(impact.plan([repo / "src/b.py"]))
+    assert impact.tests_by_file["src/a.py"] == {"tests/test_a.py::test_one"}
+    assert impact.tests_by_file["src/b.py"] == {"tests/test_b.py::test_two"}
+
+    impact.record_run(impact.plan([repo / "src/b.py"]))
+    assert impact.plan([repo / "src/b.py"]).full
+    impact.record_run(RunPlan(full=True))
+    assert impact.runs_since_full == 0
+
+
+def test_scheduler_runs_selected_tests(repo):
+    impact = selector(repo)
+    impact.record_run(RunPlan(full=True))
+    command = f'"{sys.executable}" -c "import sys; print(sys.argv[1:])" {{{{ selected_tests }}}}'
+    scheduler = CommandScheduler([CommandConfig(name="Tests", command=command)], repo, test_impact=impact)
+
+    result = asyncio.run(scheduler.run(names=["Tests"], changed_files=[repo / "src/b.py"]))["Tests"]
+    assert result.output.strip() == "['tests/test_b.py::test_two']"
+
+    result = asyncio.run(scheduler.run(names=["Tests"], changed_files=[repo / "src/unused.py"]))["Tests"]
+    assert result.success and result.returncode is None  # Nothing affected, not run
+
+    result = asyncio.run(scheduler.run(names=["Tests"], changed_files=[repo / "README.md"]))["Tests"]
+    assert result.output.strip() == f"['{repo / 'tests'}']"  # Not in the map: full run
+
+    result = asyncio.run(scheduler.run(names=["Tests"]))["Tests"]
+    assert result.output.strip() == f"['{repo / 'tests'}']"
+
+
+def test_unaffected_tests_keep_a_failed_status(repo):
+    impact = selector(repo)
+    impact.record_run(RunPlan(full=True))
+    command = f'"{sys.executable}" -c "import sys; print(sys.argv[1:]); sys.exit(1)" {{{{ selected_tests }}}}'
+    scheduler = CommandScheduler([CommandConfig(name="Tests", command=command)], repo, test_impact=impact)
+
+    result = asyncio.run(scheduler.run(names=["Tests"], changed_files=[repo / "src/b.py"]))["Tests"]
+    assert not result.success
+
+    # Nothing affected, but the last run failed: everything runs again rather than being reported passed
+    result = asyncio.run(scheduler.run(names=["Tests"], changed_files=[repo / "src/unused.py"]))["Tests"]
+    assert result.output.strip() == f"['{repo / 'tests'}']"
+    assert scheduler.statuses["Tests"] == "failed"
+
+
+def test_selected_tests_defaults_to_tests_directory(tmp_path):
+    settings = VibedirSettings.model_validate({"command": [{"name": "Tests", "command": "pytest {{ selected_tests }}"}]})
+    scheduler = CommandScheduler.from_settings(settings, tmp_path)
+    assert scheduler.test_impact is None
+    assert scheduler.variables["selected_tests"] == "{{ tests_directory }}"
+
+    settings = VibedirSettings.model_validate({"test_impact": {"enabled": True, "full_run_every": 3}})
+    scheduler = CommandScheduler.from_settings(settings, tmp_path)
+    assert scheduler.test_impact.tests_directory == tmp_path / "tests"
+    assert scheduler.test_impact.full_run_every == 3
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = ("dynaconf", "tomlkit", "pydantic", "textual")
+
+# Generous budget for the cumulative `import vibedir` time; catches heavy imports creeping back in
+IMPORT_TIME_BUDGET_US = 50_000
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, check=True)
+
+
+def test_import_vibedir_does_not_load_heavy_dependencies():
+    code = f"import sys, vibedir; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    assert run_python(code).stdout.strip() == ""
+
+
+def test_import_vibedir_does_not_load_config():
+    code = "import sys, vibedir.models; print(vibedir.models.command_status._icons is None, 'dynaconf' in sys.modules)"
+    assert run_python(code).stdout.split() == ["True", "False"]
+
+
+def test_import_vibedir_time_budget():
+    result = run_python("import vibedir", "-X", "importtime")
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    cumulative = {
+        parts[2].strip(): int(parts[1])
+        for parts in (line.split("|") for line in result.stderr.splitlines())
+        if len(parts) == 3 and parts[1].strip().isdigit()
+    }
+    assert cumulative["vibedir"] < IMPORT_TIME_BUDGET_US
+
+
+def test_lazy_attributes_resolve():
+    code = "import vibedir; print(vibedir.load_config.__name__, vibedir.CommandStatus.__name__, vibedir.__version__)"
+    assert run_python(code).stdout.split()[:2] == ["load_config", "CommandStatus"]
+
+
+def test_every_public_name_resolves():
+    code = "import vibedir; [getattr(vibedir, name) for name in vibedir.__all__]; from vibedir import *"
+    run_python(code)
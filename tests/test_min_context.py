@@ -0,0 +1,229 @@
+import json
+import random
+
+import pytest
+
+from vibedir.min_context import (
+    MinContextCache,
+    MinContextIndex,
+    calculate_min_context,
+    calculate_min_context_from_buffer,
+    calculate_min_context_many,
+    calculate_min_context_per_line,
+)
+
+ENGINES = ["naive", "rolling_hash", "suffix_array"]
+
+
+def random_content(rng: random.Random, n: int, alphabet: int) -> list[str]:
+    return [f"line{rng.randrange(alphabet)}" for _ in range(n)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (["a", "b", "a", "b", "c"], 3),
+        (["line1", "line2", "line3"], 1),
+        (["", "a", "", "a", ""], 4),
+        (["x"], 1),
+        (["x", "x", "x", "x"], 4),
+    ],
+)
+def test_known_values(engine, content, expected):
+    assert calculate_min_context(content, engine=engine) == expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_starting_k_above_answer(engine):
+    assert calculate_min_context(["a", "b", "c", "d"], starting_k=3, engine=engine) == 3
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_errors(engine):
+    with pytest.raises(ValueError, match="empty"):
+        calculate_min_context([], engine=engine)
+    with pytest.raises(ValueError, match="fewer than"):
+        calculate_min_context(["a"], starting_k=2, engine=engine)
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown min context engine"):
+        calculate_min_context(["a"], engine="bogus")
+
+
+@pytest.mark.parametrize("engine", ENGINES[1:])
+def test_engines_match_naive(engine):
+    rng = random.Random(1234)
+    for _ in range(200):
+        content = random_content(rng, rng.randint(1, 40), rng.randint(1, 4))
+        starting_k = rng.randint(1, len(content))
+        expected = calculate_min_context(content, starting_k=starting_k)
+        assert calculate_min_context(content, starting_k=starting_k, engine=engine) == expected
+
+
+def brute_force_per_line(content: list[str]) -> list:
+    n = len(content)
+    result = []
+    for i in range(n):
+        found = None
+        for k in range(1, n - i + 1):
+            window = content[i : i + k]
+            if sum(content[j : j + k] == window for j in range(n - k + 1)) == 1:
+                found = k
+                break
+        result.append(found)
+    return result
+
+
+def test_per_line_known_values():
+    assert calculate_min_context_per_line(["a", "b", "a", "b", "c"]) == [3, 2, 3, 2, 1]
+    assert calculate_min_context_per_line(["a", "b", "a"]) == [2, 1, None]
+
+
+def test_per_line_matches_brute_force():
+    rng = random.Random(99)
+    for _ in range(100):
+        content = random_content(rng, rng.randint(1, 25), rng.randint(1, 3))
+        assert calculate_min_context_per_line(content) == brute_force_per_line(content)
+
+
+def test_per_line_empty():
+    with pytest.raises(ValueError, match="empty"):
+        calculate_min_context_per_line([])
+
+
+class TestMinContextIndex:
+    def test_initial_k(self):
+        index = MinContextIndex(["a", "b", "a", "b", "c"])
+        assert index.k == 3
+        assert len(index) == 5
+
+    def test_insert_delete_replace(self):
+        index = MinContextIndex(["a", "b", "c"])
+        assert index.k == 1
+        assert index.insert(3, ["a", "b"]) == 3
+        assert index.lines == ["a", "b", "c", "a", "b"]
+        assert index.replace(3, 5, ["x"]) == 1
+        assert index.delete(0, 1) == 1
+        assert index.lines == ["b", "c", "x"]
+
+    def test_empty_and_short(self):
+        index = MinContextIndex(["a", "b"], starting_k=2)
+        assert index.delete(0, 1) is None
+        with pytest.raises(ValueError, match="fewer than"):
+            _ = index.k
+        assert index.delete(0, 1) is None
+        with pytest.raises(ValueError, match="empty"):
+            _ = index.k
+        assert index.insert(0, ["a", "a"]) == 2
+
+    def test_invalid_range(self):
+        index = MinContextIndex(["a"])
+        with pytest.raises(IndexError):
+            index.delete(0, 2)
+
+    def test_random_edits_match_full_recompute(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            starting_k = rng.randint(1, 3)
+            index = MinContextIndex(random_content(rng, rng.randint(0, 30), 3), starting_k=starting_k)
+            for _ in range(40):
+                n = len(index)
+                start = rng.randint(0, n)
+                end = rng.randint(start, min(n, start + 4))
+                index.replace(start, end, random_content(rng, rng.randint(0, 4), 3))
+                lines = index.lines
+                if len(lines) >= max(starting_k, 1):
+                    assert index.k == calculate_min_context(lines, starting_k=starting_k, engine="suffix_array")
+
+
+class TestCalculateMinContextMany:
+    @pytest.fixture
+    def files(self, tmp_path):
+        contents = {
+            "a.py": "a\nb\na\nb\nc\n",
+            "b.py": "line1\nline2\n",
+            "c.py": "a\nb\na\nb\nc\n",  # same content as a.py
+            "empty.py": "",
+        }
+        for name, text in contents.items():
+            (tmp_path / name).write_text(text)
+        return tmp_path
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_results_and_errors(self, files, max_workers):
+        paths = [files / name for name in ("a.py", "b.py", "empty.py", "missing.py")]
+        batch = calculate_min_context_many(paths, max_workers=max_workers)
+        assert batch.results == {files / "a.py": 3, files / "b.py": 1}
+        assert set(batch.errors) == {files / "empty.py", files / "missing.py"}
+        assert batch.files == 4
+        assert batch.computed == 2
+        assert batch.elapsed > 0
+
+    def test_cache_hits_persist(self, files, tmp_path):
+        cache_path = tmp_path / "cache" / "min_context.json"
+        paths = [files / "a.py", files / "b.py", files / "c.py"]
+
+        first = calculate_min_context_many(paths, cache=MinContextCache(cache_path), max_workers=1)
+        assert first.computed == 2
+        assert first.cache_hits == 1  # c.py has the same content hash as a.py
+
+        second = calculate_min_context_many(paths, cache=MinContextCache(cache_path), max_workers=1)
+        assert second.computed == 0
+        assert second.cache_hits == 3
+        assert second.results == first.results
+
+
+    @pytest.mark.parametrize("text", ['{"abc:1": 3', "[1, 2]", '{"abc:1": "3"}', "null"])
+    def test_invalid_cache_file_is_treated_as_empty(self, tmp_path, caplog, text):
+        cache_path = tmp_path / "min_context.json"
+        cache_path.write_text(text)
+        cache = MinContextCache(cache_path)
+        assert len(cache) == 0 and cache.get("abc", 1) is None
+        assert "Ignoring unreadable min context cache" in caplog.text
+
+    def test_save_replaces_the_file_atomically(self, tmp_path, monkeypatch):
+        cache_path = tmp_path / "min_context.json"
+        cache = MinContextCache(cache_path)
+        cache.set("abc", 1, 3)
+        cache.save()
+
+        def crash(*args, **kwargs):
+            raise KeyboardInterrupt  # Killed halfway through writing
+
+        cache.set("def", 1, 4)
+        monkeypatch.setattr(json, "dump", crash)
+        with pytest.raises(KeyboardInterrupt):
+            cache.save()
+        assert MinContextCache(cache_path).get("abc", 1) == 3  # The last complete save is intact
+        assert [p.name for p in tmp_path.iterdir()] == ["min_context.json"]  # No temp file left behind
+
+class TestCalculateMinContextFromBuffer:
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_matches_list_version(self, tmp_path, engine):
+        rng = random.Random(5)
+        for i in range(30):
+            content = random_content(rng, rng.randint(1, 40), rng.randint(1, 4))
+            expected = calculate_min_context(content)
+            data = "\n".join(content).encode()
+            assert calculate_min_context_from_buffer(data, engine=engine) == expected
+
+            path = tmp_path / f"file{i}.txt"
+            path.write_bytes(data + b"\n")
+            assert calculate_min_context_from_buffer(path, engine=engine) == expected
+            assert calculate_min_context_from_buffer(str(path), engine=engine) == expected
+
+    def test_crlf_and_blank_lines(self):
+        assert calculate_min_context_from_buffer(b"\r\na\r\n\r\na\r\n\r\n") == 4
+        assert calculate_min_context_from_buffer(bytearray(b"a\nb\na\nb\nc")) == 3
+
+    def test_errors(self, tmp_path):
+        empty = tmp_path / "empty.txt"
+        empty.write_bytes(b"")
+        with pytest.raises(ValueError, match="empty"):
+            calculate_min_context_from_buffer(empty)
+        with pytest.raises(ValueError, match="empty"):
+            calculate_min_context_from_buffer(b"")
+        with pytest.raises(ValueError, match="fewer than"):
+            calculate_min_context_from_buffer(b"a\n", starting_k=2)
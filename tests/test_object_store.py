@@ -0,0 +1,79 @@
+import hashlib
+import os
+from datetime import datetime
+
+import pytest
+
+from vibedir.models.history import HistoryManifest
+from vibedir.object_store import ObjectStore, hash_file, history_entry_name, store_history_entry
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ObjectStore(tmp_path / ".vibedir" / "objects")
+
+
+def test_hash_file_streams(tmp_path):
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    path = tmp_path / "big.bin"
+    path.write_bytes(data)
+    assert hash_file(path) == hashlib.sha256(data).hexdigest()
+
+
+def test_put_is_content_addressed_and_read_only(store, tmp_path):
+    a = tmp_path / "a.py"
+    b = tmp_path / "b.py"
+    a.write_text("same\n")
+    b.write_text("same\n")
+
+    digest = store.put(a)
+    assert store.put(b) == digest
+    assert list(store.digests()) == [digest]
+    assert store.object_path(digest) == store.root / digest[:2] / digest[2:]
+    assert not (store.object_path(digest).stat().st_mode & 0o222)
+    with store.open(digest) as f:
+        assert f.read() == b"same\n"
+
+    a.write_text("edited in place\n")  # The stored blob is a copy, not a link to the source
+    with store.open(digest) as f:
+        assert f.read() == b"same\n"
+
+    assert store.delete(digest) == 5
+    assert digest not in store
+    assert store.delete(digest) == 0
+
+
+def test_reattaching_same_file_stores_one_blob(store, tmp_path):
+    source = tmp_path / "data.bin"
+    source.write_bytes(os.urandom(2 * 1024 * 1024))
+    history = tmp_path / ".vibedir" / "history"
+
+    entries = [
+        store_history_entry(store, history, "User", [source], when=datetime(2025, 11, 23, 14, 22, 31, i * 1000))
+        for i in range(50)
+    ]
+    assert len(list(store.digests())) == 1
+    digest = hash_file(source)
+    linked = entries[-1] / "data.bin"
+    assert linked.read_bytes() == source.read_bytes()
+    if os.stat(linked).st_nlink > 1:  # Hardlinks supported
+        assert os.stat(store.object_path(digest)).st_nlink == 51
+
+    manifest = HistoryManifest.load(entries[0])
+    assert manifest.hashes == {digest}
+    assert manifest.attachments[0].original_path == source.resolve()
+    assert manifest.attachments[0].path == (entries[0] / "data.bin").resolve()
+
+
+def test_history_entry_names_and_duplicates(store, tmp_path):
+    when = datetime(2025, 11, 23, 14, 22, 31, 222000)
+    assert history_entry_name("User", when) == "2025-11-23T14:22:31.222_User"
+
+    (tmp_path / "x").mkdir()
+    (tmp_path / "y").mkdir()
+    (tmp_path / "x" / "util.py").write_text("x\n")
+    (tmp_path / "y" / "util.py").write_text("y\n")
+    entry = store_history_entry(store, tmp_path / "history", "User", [tmp_path / "x/util.py", tmp_path / "y/util.py"], when)
+    assert sorted(p.name for p in entry.iterdir()) == ["manifest.json", "util-2.py", "util.py"]
+    assert (entry / "util-2.py").read_text() == "y\n"
+    assert HistoryManifest.load(tmp_path / "missing") == HistoryManifest()
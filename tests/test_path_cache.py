@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+from vibedir.models.attachment import FileAttachment
+from vibedir.models.history import HistoryManifest
+from vibedir.models.path_cache import PathStatCache
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for i in range(20):
+        path = tmp_path / f"file{i}.py"
+        path.write_text(str(i))
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def count_exists(monkeypatch):
+    calls = []
+    original = Path.exists
+    monkeypatch.setattr(Path, "exists", lambda self, *a, **k: calls.append(self) or original(self, *a, **k))
+    return calls
+
+
+def test_cache_reuses_checks_within_ttl(tmp_path, count_exists):
+    path = tmp_path / "a.py"
+    path.write_text("")
+    cache = PathStatCache(ttl=60)
+    for _ in range(10):
+        attachment = FileAttachment.model_validate({"path": path}, context={"path_cache": cache})
+    assert attachment.path == path.resolve()
+    assert len(count_exists) == 1
+    assert cache.stat_calls == 2  # One exists, one resolve
+
+    cache.resolve(attachment.path)  # Resolution results are known canonical
+    assert cache.stat_calls == 2
+
+
+def test_ttl_expiry_and_invalidate(tmp_path):
+    path = tmp_path / "later.py"
+    cache = PathStatCache(ttl=0)
+    assert not cache.exists(path)
+    path.write_text("")
+    assert cache.exists(path)  # ttl=0: always re-checked
+
+    cache = PathStatCache(ttl=60)
+    path.unlink()
+    assert not cache.exists(path)
+    path.write_text("")
+    assert not cache.exists(path)
+    cache.invalidate(path)
+    assert cache.exists(path)
+
+
+def test_manifest_load_batches_checks(files, tmp_path, count_exists):
+    HistoryManifest(attachments=tuple(FileAttachment(path=p) for p in files)).save(tmp_path)
+    count_exists.clear()
+
+    cache = PathStatCache()
+    manifest = HistoryManifest.load(tmp_path, path_cache=cache)
+    assert len(manifest.attachments) == 20
+    assert count_exists == []  # One directory listing instead of 20 exists() calls
+    assert cache.stat_calls == 1 + 20  # The listing plus one resolve per (not yet canonical) path
+    HistoryManifest.load(tmp_path, path_cache=cache)
+    assert cache.stat_calls == 21
+
+
+def test_lazy_validation(tmp_path, count_exists, caplog):
+    missing = tmp_path / "missing.py"
+    attachment = FileAttachment.model_validate({"path": missing}, context={"path_validation": "lazy"})
+    assert count_exists == [] and "does not exist" not in caplog.text
+    assert attachment.resolved_path == missing.resolve()
+    assert len(count_exists) == 1 and "does not exist" in caplog.text
+    assert attachment.resolved_path == missing.resolve()
+    assert len(count_exists) == 1
+
+    eager = FileAttachment(path=missing)
+    count_exists.clear()
+    assert eager.resolved_path == eager.path and count_exists == []
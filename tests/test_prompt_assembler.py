@@ -0,0 +1,79 @@
+import tracemalloc
+
+import pytest
+
+from vibedir.codebase_snapshot import CodebaseSnapshot
+from vibedir.prompt_assembler import PromptAssembler, PromptSection, iter_prompt, plan_parts
+
+
+def test_sections_are_tagged_and_empty_ones_left_out(tmp_path):
+    guidelines = tmp_path / "dev.md"
+    guidelines.write_text("Be clear.\n")
+    snapshot = CodebaseSnapshot(b"header\n", [b"file one", b"file two"])
+    sections = [
+        PromptSection("DEV_GUIDELINES", guidelines),
+        PromptSection("CODEBASE", snapshot),
+        PromptSection("COMMANDS_AND_RESULTS", "\n\n"),
+        PromptSection("TASK", lambda: iter(["Add ", "a test", "\n"])),
+    ]
+
+    text = "".join(iter_prompt(sections))
+
+    assert text == (
+        "[DEV_GUIDELINES]\nBe clear.\n[/DEV_GUIDELINES]\n"
+        "\n[CODEBASE]\nheader\nfile one\nfile two\n[/CODEBASE]\n"
+        "\n[TASK]\nAdd a test\n[/TASK]\n"
+    )
+
+
+def test_plan_breaks_on_lines_and_outside_fences():
+    lines = ["intro line\n"] * 3 + ["```python\n"] + ["code\n"] * 4 + ["```\n"] + ["after\n"] * 3
+    plan = plan_parts(lines, max_chars=50)
+
+    assert plan.total_chars == sum(map(len, lines))
+    assert all(offset == 0 for _, offset in plan.breaks)
+    assert plan.breaks[0] == (3, 0)  # Before the fence, not inside it
+
+
+def test_plan_cuts_overlong_lines():
+    plan = plan_parts(["short\n", "x" * 25 + "\n"], max_chars=10)
+    assert plan.breaks == ((1, 0), (1, 10), (1, 20))
+    assert plan.part_count == 4
+
+
+def test_write_parts_round_trips(tmp_path):
+    body = "".join(f"line {i}\n" for i in range(200)) + "```\n" + "y" * 130 + "\n```\n"
+    assembler = PromptAssembler([PromptSection("TASK", body)], max_chars_per_file=100, max_file_count=100)
+    (tmp_path / "vibedir_part1of99.txt").write_text("stale")
+
+    paths = assembler.write_parts(tmp_path)
+
+    total = len(paths)
+    assert [p.name for p in paths] == [f"vibedir_part{n}of{total}.txt" for n in range(1, total + 1)]
+    assert sorted(tmp_path.iterdir()) == sorted(paths)
+    assert all(len(p.read_text()) <= 100 for p in paths)
+    assert "".join(p.read_text() for p in paths) == "".join(assembler.lines())
+
+
+def test_too_many_parts_writes_nothing(tmp_path):
+    assembler = PromptAssembler([PromptSection("TASK", "x\n" * 100)], max_chars_per_file=20, max_file_count=2)
+    with pytest.raises(ValueError, match="clipboard_max_file_count"):
+        assembler.write_parts(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_streaming_memory_stays_flat(tmp_path):
+    source = tmp_path / "codebase.txt"
+    with open(source, "w") as f:
+        for i in range(100_000):
+            f.write(f"{i:08d} some source code line\n")
+    assembler = PromptAssembler([PromptSection("CODEBASE", source)], max_chars_per_file=40000, max_file_count=1000)
+
+    tracemalloc.start()
+    paths = assembler.write_parts(tmp_path / "parts")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert sum(p.stat().st_size for p in paths) > 3_000_000
+    assert peak < 1_000_000
+    assert assembler.write(tmp_path / "vibedir.txt") == sum(len(p.read_text()) for p in paths)
@@ -0,0 +1,175 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from vibedir.prompt_parser import PENDING_HEADER, VibedirPromptParser
+
+SAMPLE = Path(__file__).parent / "sample_prompt.md"
+
+HISTORY = """# vibedir session - 2025-11-17T14:22:31.111
+
+## 👤User - 2025-11-17 14:22:31.222
+
+Write a fastapi app.
+
+### Attachments
+.vibedir/history/2025-11-17T14:22:31.222_User/main.py
+
+## 🤖Assistant (grok-4) - 2025-11-17 14:23:15.312
+
+Here it is.
+
+## Notes
+
+A markdown heading inside a reply is content, not a message.
+
+"""
+
+
+@pytest.fixture
+def prompt_file(tmp_path):
+    path = tmp_path / "prompt.md"
+    path.write_text(HISTORY + f"{PENDING_HEADER}\n\nAdd auth.\n", encoding="utf-8")
+    return path
+
+
+def test_parse_sample_prompt():
+    parser = VibedirPromptParser(SAMPLE)
+    messages = parser.parse()
+
+    assert parser.session_timestamp == "2025-11-17T14:22:31.111"
+    assert [m.role for m in messages] == ["user", "assistant", "user", "assistant", "pending"]
+    assert messages[0].content == "Write a fastapi app that serves my plotly dashboards."
+    assert messages[0].timestamp == datetime(2025, 11, 17, 14, 22, 31, 222000)
+    assert messages[1].model == "grok-4"
+    assert messages[1].content.startswith("Here is the initial implementation...")
+    assert parser.pending.content.startswith("Make it use async")
+    assert len(parser.history) == 4
+
+
+def test_attachments_and_inner_headings(prompt_file):
+    parser = VibedirPromptParser(prompt_file)
+    user, assistant, pending = parser.parse()
+
+    assert user.content == "Write a fastapi app."
+    assert user.attachments == (".vibedir/history/2025-11-17T14:22:31.222_User/main.py",)
+    assert "## Notes" in assistant.content
+    assert pending.content == "Add auth."
+
+
+def test_refresh_without_changes_is_a_no_op(prompt_file):
+    parser = VibedirPromptParser(prompt_file)
+    assert parser.refresh() == 0
+    assert parser.refresh() is None
+
+
+def test_pending_edit_reparses_only_the_tail(prompt_file):
+    parser = VibedirPromptParser(prompt_file)
+    before = parser.parse()[:2]
+
+    prompt_file.write_text(HISTORY + f"{PENDING_HEADER}\n\nAdd auth and rate limiting.\n", encoding="utf-8")
+
+    assert parser.refresh() == 2
+    assert parser.messages[:2] == before
+    assert all(a is b for a, b in zip(parser.messages, before))  # Not re-parsed
+    assert parser.pending.content == "Add auth and rate limiting."
+
+
+def test_appended_messages(prompt_file):
+    parser = VibedirPromptParser(prompt_file)
+    parser.parse()
+
+    prompt_file.write_text(
+        HISTORY
+        + "## 👤User - 2025-11-17 14:25:10.123\n\nAdd auth.\n\n"
+        + f"{PENDING_HEADER}\n\n",
+        encoding="utf-8",
+    )
+
+    assert parser.refresh() == 2
+    assert [m.role for m in parser.messages] == ["user", "assistant", "user", "pending"]
+    assert parser.pending.content == ""
+
+
+def test_history_edit_reparses_from_the_edited_message(prompt_file):
+    parser = VibedirPromptParser(prompt_file)
+    first_message = parser.parse()[0]
+
+    prompt_file.write_text(
+        prompt_file.read_text(encoding="utf-8").replace("Here it is.", "Here it is, revised."), encoding="utf-8"
+    )
+
+    assert parser.refresh() == 1
+    assert parser.messages[0] is first_message
+    assert parser.messages[1].content.startswith("Here it is, revised.")
+    assert parser.messages[2].offset == prompt_file.read_bytes().index(PENDING_HEADER.encode())
+
+
+def test_removed_header_merges_into_previous_section(prompt_file):
+    parser = VibedirPromptParser(prompt_file)
+    parser.parse()
+
+    text = prompt_file.read_text(encoding="utf-8").replace(f"{PENDING_HEADER}\n", "")
+    prompt_file.write_text(text, encoding="utf-8")
+
+    assert parser.refresh() == 1
+    assert [m.role for m in parser.messages] == ["user", "assistant"]
+    assert parser.messages[1].content.endswith("Add auth.")
+    assert parser.pending is None
+
+
+def test_incremental_matches_full_parse(prompt_file):
+    parser = VibedirPromptParser(prompt_file)
+    parser.parse()
+    edits = [
+        lambda t: t.replace("Write a fastapi app.", "Write a flask app."),
+        lambda t: t + "More pending text.\n",
+        lambda t: t.replace("# vibedir session - 2025-11-17T14:22:31.111", "# vibedir session - 2025-12-01T00:00:00.000"),
+    ]
+    for edit in edits:
+        prompt_file.write_text(edit(prompt_file.read_text(encoding="utf-8")), encoding="utf-8")
+        parser.refresh()
+        assert parser.messages == VibedirPromptParser(prompt_file).parse()
+    assert parser.session_timestamp == "2025-12-01T00:00:00.000"
+
+
+def test_write_pending_rewrites_only_the_pending_section(prompt_file):
+    parser = VibedirPromptParser(prompt_file)
+    parser.parse()
+
+    parser.write_pending("Use async.", attachments=["src/app.py"])
+
+    text = prompt_file.read_text(encoding="utf-8")
+    assert text.startswith(HISTORY)
+    assert text.endswith(f"{PENDING_HEADER}\n\nUse async.\n\n### Attachments\nsrc/app.py\n")
+    assert parser.refresh() is None  # Our own write needs no re-parse
+    assert parser.messages == VibedirPromptParser(prompt_file).parse()
+
+    parser.write_pending("Use async, please.")
+    assert parser.pending.attachments == ("src/app.py",)
+
+
+def test_write_pending_creates_file_and_missing_section(tmp_path):
+    path = tmp_path / "prompt.md"
+    parser = VibedirPromptParser(path)
+    assert parser.refresh() is None
+
+    parser.write_pending("Hello")
+    assert path.read_text(encoding="utf-8").startswith("# vibedir session - ")
+    assert parser.session_timestamp is not None
+    assert [(m.role, m.content) for m in parser.messages] == [("pending", "Hello")]
+
+    path.write_text(HISTORY.rstrip("\n"), encoding="utf-8")
+    parser.write_pending("Next")
+    assert [m.role for m in parser.messages] == ["user", "assistant", "pending"]
+    assert parser.messages == VibedirPromptParser(path).parse()
+
+
+def test_deleted_file(prompt_file):
+    parser = VibedirPromptParser(prompt_file)
+    parser.parse()
+    prompt_file.unlink()
+
+    assert parser.refresh() == 0
+    assert parser.messages == []
@@ -0,0 +1,77 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from vibedir.config import load_settings
+from vibedir.models.settings import CommandConfig, VibedirSettings
+
+
+@pytest.fixture
+def clean_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    return tmp_path
+
+
+def test_bundled_config_compiles(clean_cwd):
+    settings = load_settings(quiet=True)
+    assert settings.mode == "clipboard"
+    assert settings.clipboard_max_chars_per_file == 40000
+    assert settings.llm.model == "grok-4"
+    assert settings.llm.context_window is None and settings.llm.refresh_threshold == 0.7
+    assert settings.status_icons.success == "✅"
+    assert settings.status_icons.by_status["running"] == "spinner"
+    assert settings.history.retention_messages == 50
+    assert settings.logging.level == "INFO"
+    assert [cmd.name for cmd in settings.commands] == ["Format", "Lint", "Tests"]
+    assert settings.commands_by_name["Tests"].hotkey == "t"
+    assert [cmd.name for cmd in settings.header_commands] == ["Lint", "Tests"]
+    assert settings.commands_for_event("changes_success") == settings.commands
+
+
+def test_compiled_once_per_loaded_config(clean_cwd):
+    custom = clean_cwd / "custom.toml"
+    custom.write_text('mode = "api"\n')
+    first = load_settings(config_path=str(custom))
+    assert load_settings(config_path=str(custom)) is first
+
+    custom.write_text('mode = "clipboard"\nauto_diff = true\n')
+    second = load_settings(config_path=str(custom))
+    assert second is not first
+    assert second.auto_diff is True
+
+
+def test_settings_are_frozen(clean_cwd):
+    settings = load_settings()
+    with pytest.raises(ValidationError):
+        settings.mode = "api"
+
+
+def test_validation_errors_surface_at_load_time(clean_cwd):
+    custom = clean_cwd / "custom.toml"
+    custom.write_text('mode = "telepathy"\n')
+    with pytest.raises(ValidationError, match="mode"):
+        load_settings(config_path=str(custom))
+
+
+def test_api_mode_requires_llm_model():
+    with pytest.raises(ValidationError, match="requires"):
+        VibedirSettings.model_validate({"mode": "api"})
+
+
+def test_command_config_validation():
+    cmd = CommandConfig.model_validate({"name": "Build", "hot_key": "b", "run_on": ["startup", "no_manual"]})
+    assert cmd.hotkey == "b"
+    assert not cmd.configured
+    assert not cmd.manual
+    with pytest.raises(ValidationError, match="Invalid run_on"):
+        CommandConfig.model_validate({"name": "Build", "run_on": ["sometimes"]})
+
+
+def test_skip_bundled_uses_schema_defaults(clean_cwd):
+    with patch.dict(os.environ, {"VIBEDIR_SKIP_BUNDLED_CONFIG_LOAD": "true", "VIBEDIR_SKIP_CONFIG_FILE_LOAD": "true"}):
+        settings = load_settings()
+    assert settings.commands == ()
+    assert settings.status_icons.failed == "❌"
@@ -0,0 +1,121 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from vibedir import token_counter
+from vibedir.codebase_snapshot import CodebaseSnapshot
+from vibedir.prompt_assembler import PromptSection, iter_prompt
+from vibedir.token_counter import HISTORY, TokenCounter, TokenReport
+
+SOURCES = sorted((Path(__file__).parents[1] / "src" / "vibedir").glob("*.py"))
+
+
+class WordEncoder:
+    """Counts whitespace-separated words and remembers what it was asked to encode."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode_ordinary(self, text):
+        self.calls.append(text)
+        return re.findall(r"\S+", text)
+
+
+def _tiktoken_encoding(monkeypatch, name):
+    """A real tiktoken Encoding with the named encoding's pre-tokenizer and a small BPE vocabulary (no download)."""
+    tiktoken = pytest.importorskip("tiktoken")
+    from tiktoken_ext import openai_public
+
+    sample = "".join(path.read_text(encoding="utf-8") for path in SOURCES[:5]).encode()
+    ranks = {bytes([b]): b for b in range(256)}
+    for size in (2, 3, 4):
+        for i in range(0, len(sample) - size, 3):
+            ranks.setdefault(sample[i : i + size], len(ranks))
+    monkeypatch.setattr(openai_public, "load_tiktoken_bpe", lambda *args, **kwargs: ranks)
+    spec = getattr(openai_public, name)()
+    return tiktoken.Encoding(name, pat_str=spec["pat_str"], mergeable_ranks=ranks, special_tokens={})
+
+
+def _sections(files):
+    snapshot = CodebaseSnapshot(b"File listing generated by prepdir\n", [f.encode() for f in files])
+    return [
+        PromptSection("DEV_GUIDELINES", "Keep it simple.\n\n/ note: slashes after punctuation ]\n/like this\n"),
+        PromptSection("CODEBASE", snapshot),
+        PromptSection("COMMANDS_AND_RESULTS", "$ pytest\r\n1 passed;\r\n\r\n[done]"),
+        PromptSection("TASK", "Add a test.\n"),
+    ]
+
+
+@pytest.mark.parametrize("name", ["o200k_base", "cl100k_base"])
+def test_chunked_counts_add_up_to_the_whole_prompt(monkeypatch, name):
+    encoding = _tiktoken_encoding(monkeypatch, name)
+    monkeypatch.setattr(token_counter, "_MIN_CHUNK", 64)
+    files = [path.read_text(encoding="utf-8") for path in SOURCES]
+    counter = TokenCounter(encoding)
+
+    report = counter.report(_sections(files))
+    whole = "".join(iter_prompt(_sections(files)))
+
+    assert report.chunks > len(files)
+    assert report.total == len(encoding.encode_ordinary(whole))
+    assert counter.count(whole) == report.total
+
+
+def test_only_changed_chunks_are_recounted():
+    encoder = WordEncoder()
+    counter = TokenCounter(encoder)
+    files = [f"=-=-= Begin File: 'f{i}.py' =-=-=\nvalue = {i}\n=-=-= End File =-=-=\n" for i in range(50)]
+
+    first = counter.report(_sections(files), history=["hello there", "general kenobi"])
+    encoder.calls.clear()
+    again = counter.report(_sections(files), history=["hello there", "general kenobi"])
+    assert again == TokenReport(first.sections, first.chunks, 0)
+    assert encoder.calls == []
+
+    files[10] = files[10].replace("value = 10", "value = 10 + 1")
+    changed = counter.report(_sections(files), history=["hello there", "general kenobi"])
+    assert changed.recounted == 1
+    assert encoder.calls == [files[10] + "\n"]  # The file with the newline joining it to the next
+    assert changed.sections["CODEBASE"] == first.sections["CODEBASE"] + 2
+
+
+def test_line_chunks_are_content_defined(monkeypatch):
+    monkeypatch.setattr(token_counter, "_MIN_CHUNK", 200)
+    counter = TokenCounter(WordEncoder())
+    lines = [f"line {i} of the command output\n" for i in range(3000)]
+
+    first = counter.report([PromptSection("COMMANDS_AND_RESULTS", "".join(lines))])
+    lines.insert(5, "an extra line near the top\n")
+    second = counter.report([PromptSection("COMMANDS_AND_RESULTS", "".join(lines))])
+
+    assert first.chunks > 20
+    assert second.recounted <= 2
+    assert second.total == first.total + 6
+
+
+def test_report_breakdown_and_refresh_check():
+    counter = TokenCounter(WordEncoder())
+    sections = [
+        PromptSection("CODEBASE", "a b c d e f\n"),
+        PromptSection("COMMANDS_AND_RESULTS", ""),
+        PromptSection("TASK", "x y"),
+    ]
+
+    report = counter.report(sections, history=["one two", "three"])
+
+    # Tags count as words for this encoder: "[CODEBASE]" + 6 + "[/CODEBASE]", "[TASK]" + 2 + "[/TASK]"
+    assert report.sections == {"CODEBASE": 8, "TASK": 4, HISTORY: 3}
+    assert report.largest()[0] == ("CODEBASE", 8)
+    assert report.total == 15
+    assert not report.needs_refresh(context_window=100)
+    assert report.needs_refresh(context_window=20)
+    assert report.needs_refresh(context_window=30, threshold=0.5)
+    assert report.summary(20) == "15 tokens (75% of 20): CODEBASE 8, TASK 4, HISTORY 3"
+
+
+def test_cache_is_bounded():
+    counter = TokenCounter(WordEncoder(), max_cache_entries=2)
+    for text in ("one", "two", "three"):
+        counter.count(text)
+    assert len(counter._cache) == 2
@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+from textual.app import App, ComposeResult
+from textual.widgets import Static
+
+from vibedir.prompt_parser import PENDING_HEADER, VibedirPromptParser
+from vibedir.vibedir_filewatcher_mixin import VibedirFileWatcherMixin
+
+
+class Chat(Static):
+    loads = 0
+
+    def load_from_file(self):
+        self.loads += 1
+
+
+class WatchingApp(VibedirFileWatcherMixin, App):
+    def compose(self) -> ComposeResult:
+        yield Chat(id="chat")
+
+
+def test_mixin_reloads_chat_once_per_save(tmp_path):
+    path = tmp_path / "prompt.md"
+    path.write_text(f"# vibedir session - 2025-11-17T14:22:31.111\n\n{PENDING_HEADER}\n\n")
+    parser = VibedirPromptParser(path)
+    parser.parse()
+
+    async def run():
+        app = WatchingApp(parser, "chat", debounce=0.05)
+        async with app.run_test() as pilot:
+            chat = app.query_one("#chat", Chat)
+            tmp = tmp_path / "prompt.md.tmp"
+            tmp.write_text(path.read_text() + "Edited externally.\n")
+            tmp.replace(path)
+            deadline = time.monotonic() + 5
+            while not chat.loads and time.monotonic() < deadline:
+                await pilot.pause(0.05)
+            await pilot.pause(0.2)
+            return chat.loads
+
+    assert asyncio.run(run()) == 1
+    assert parser.pending.content == "Edited externally."
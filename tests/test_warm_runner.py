@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import pytest
+
+from vibedir.command_runner import CommandScheduler
+from vibedir.models.settings import CommandConfig
+from vibedir.warm_runner import WarmCommand, WarmRunner, resolve_warm_command
+
+pytestmark = pytest.mark.skipif(not WarmRunner.supported(), reason="warm runner needs fork and SCM_RIGHTS")
+
+PY = f'"{sys.executable}"'
+
+
+def test_resolve_warm_command():
+    assert resolve_warm_command(f"{PY} -m pytest -q tests") == WarmCommand("module", "pytest", ("pytest", "-q", "tests"))
+    assert resolve_warm_command(f"{PY} -m pytest tests | tee log") is None
+    assert resolve_warm_command(f"{PY} -m pytest tests/*.py") is None
+    assert resolve_warm_command(f"{PY} script.py") is None
+    assert resolve_warm_command("FOO=1 pytest") is None
+    assert resolve_warm_command("definitely-not-a-command-xyz") is None
+    assert resolve_warm_command("") is None
+
+
+@pytest.fixture
+def code_base(tmp_path):
+    (tmp_path / "counter.py").write_text("count = 0\n")
+    (tmp_path / "probe.py").write_text(
+        "import sys\n"
+        "preloaded = 'counter' in sys.modules\n"
+        "import counter\n"
+        "counter.count += 1\n"
+        "print(f'preloaded={preloaded} count={counter.count} argv={sys.argv[1:]}')\n"
+        "sys.exit(int(sys.argv[1]))\n"
+    )
+    return tmp_path
+
+
+def run(scheduler, name):
+    return asyncio.run(scheduler.run(names=[name]))[name]
+
+
+def test_warm_runs_are_isolated_forks(code_base):
+    commands = [CommandConfig(name="Probe", command=f"{PY} -m probe 3", warm=True, preload=("counter",))]
+    scheduler = CommandScheduler(commands, code_base)
+    try:
+        for _ in range(2):
+            result = run(scheduler, "Probe")
+            assert result.output.strip() == "preloaded=True count=1 argv=['3']"  # State never carries over
+            assert result.returncode == 3 and result.status == "failed"
+    finally:
+        scheduler.close()
+
+
+def test_changed_preloaded_module_falls_back_cold_and_restarts(code_base):
+    commands = [CommandConfig(name="Probe", command=f"{PY} -m probe 0", warm=True, preload=("counter",))]
+    scheduler = CommandScheduler(commands, code_base)
+    try:
+        asyncio.run(scheduler.warm_up())
+        counter = code_base / "counter.py"
+        counter.write_text("count = 10\n")
+        os.utime(counter, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+        assert run(scheduler, "Probe").output.strip() == "preloaded=False count=11 argv=['0']"  # Cold
+        assert run(scheduler, "Probe").output.strip() == "preloaded=True count=11 argv=['0']"  # Restarted
+    finally:
+        scheduler.close()
+
+
+def test_not_warmable_command_runs_cold(code_base):
+    commands = [CommandConfig(name="Probe", command=f"{PY} -m probe 0 && echo done", warm=True)]
+    scheduler = CommandScheduler(commands, code_base)
+    result = run(scheduler, "Probe")
+    assert result.output.splitlines() == ["preloaded=False count=1 argv=['0']", "done"]
+    assert not scheduler._warm_runners
+
+
+def test_cancel_kills_warm_command(code_base):
+    (code_base / "slow.py").write_text("import time\ntime.sleep(30)\n")
+    scheduler = CommandScheduler([CommandConfig(name="Slow", command=f"{PY} -m slow", warm=True)], code_base)
+
+    async def main():
+        await scheduler.warm_up()
+        task = scheduler.schedule(names=["Slow"])
+        await asyncio.sleep(0.5)
+        await scheduler.cancel()
+        assert task.cancelled()
+
+    started = time.perf_counter()
+    try:
+        asyncio.run(main())
+    finally:
+        scheduler.close()
+    assert time.perf_counter() - started < 10
+    assert scheduler.statuses["Slow"] == "not_run"
+
+
+def test_hung_preload_times_out(code_base):
+    (code_base / "hang.py").write_text("import time\ntime.sleep(30)\n")
+    runner = WarmRunner(["hang"], code_base, start_timeout=0.5)
+    started = time.perf_counter()
+    try:
+        assert not runner.start()
+    finally:
+        runner.close()
+    assert time.perf_counter() - started < 5
+    assert not runner.alive
+
+
+def test_worker_stderr_is_logged(code_base, caplog):
+    (code_base / "noisy.py").write_text("import sys\nsys.stderr.write('noisy import\\n')\n")
+    runner = WarmRunner(["noisy"], code_base)
+    with caplog.at_level(logging.WARNING, logger="vibedir.warm_runner"):
+        try:
+            assert runner.start()
+            deadline = time.monotonic() + 5
+            while "noisy import" not in caplog.text and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            runner.close()
+    assert "noisy import" in caplog.text
+
+
+def test_warm_command_runs_atexit_handlers(code_base):
+    marker = code_base / "exited.txt"
+    (code_base / "exits.py").write_text(
+        f"import atexit, pathlib\natexit.register(pathlib.Path(r'{marker}').write_text, 'done')\nprint('ran')\n"
+    )
+    scheduler = CommandScheduler([CommandConfig(name="Exits", command=f"{PY} -m exits", warm=True)], code_base)
+    try:
+        result = run(scheduler, "Exits")
+        assert scheduler._warm_runners  # It did run warm
+    finally:
+        scheduler.close()
+    assert result.output.strip() == "ran" and result.returncode == 0
+    assert marker.read_text() == "done"